@@ -3,10 +3,29 @@ RAW_DATA_DIR = 'data/raw_telegram_data'
 PREPROCESSED_DATA_DIR = 'data/preprocessed_data'
 LABELED_DATA_DIR = 'data/labeled_data'
 
+# Incremental scraping: per-channel state (next to the session file) and JSONL shards
+SCRAPE_STATE_DB = 'data/raw_telegram_data/scrape_state.sqlite'
+RAW_SHARDS_DIR = 'data/raw_telegram_data/shards'
+
 # File names
 COMBINED_RAW_MESSAGES_FILE = 'data/all_telegram_ecommerce_messages.json'
 PREPROCESSED_MESSAGES_FILE = 'data/preprocessed_amharic_ecommerce_messages.json'
 ANNOTATION_SUBSET_FILE = 'data/annotation_subset.json'
 LABELED_CONLL_FILE = 'data/labeled_data.conll'
+# Partitioned Parquet datasets (directories) written by scripts/data_io/parquet_store.py
+RAW_MESSAGES_PARQUET = 'data/all_telegram_ecommerce_messages.parquet'
+PREPROCESSED_MESSAGES_PARQUET = 'data/preprocessed_amharic_ecommerce_messages.parquet'
+
+NUM_MESSAGES_TO_LABEL = 50 #(30-50 recommended for initial pilot)
 
-NUM_MESSAGES_TO_LABEL = 50 #(30-50 recommended for initial pilot)
\ No newline at end of file
+# NER model (PEFT LoRA adapter on top of xlm-roberta-base) and its label set
+NER_MODEL_DIR = 'models/fine_tuned_ner_XLM-Roberta'
+LABEL_NAMES = ["O", "B-PRODUCT", "I-PRODUCT", "B-LOC", "I-LOC", "B-PRICE", "I-PRICE"]
+QUANTIZED_NER_MODEL_DIR = 'models/ner_xlmr_merged_int8' # Written by scripts/inference/export_quantized_model.py
+NER_CACHE_DB = 'data/ner_cache/ner_results.sqlite' # Entities cached per (model fingerprint, normalized text)
+VENDOR_AGGREGATES_FILE = 'data/analytics/vendor_aggregates.json' # Running per-vendor totals for the scorecard
+MODEL_COMPARISON_DIR = 'models/comparison' # Reports and models from scripts/model_training/compare_models.py
+TOKEN_STORE_DIR = 'data/token_store' # Memory-mapped subword tokens, written by scripts/data_io/token_store.py
+NER_SERVER_HOST = '127.0.0.1' # scripts/inference/ner_server.py
+NER_SERVER_PORT = 8765
+RUN_REPORTS_DIR = 'data/run_reports' # JSON run reports from scripts/profiling/instrumentation.py
@@ -0,0 +1,452 @@
+# EthioMart_NER_Project/scripts/analytics/vendor_scorecard.py
+
+import argparse
+import json
+import os
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Add the project root to the Python path to import config
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+sys.path.insert(0, PROJECT_ROOT)
+import config # Import configuration from config.py
+from scripts.data_io.message_stream import iter_records
+from scripts.profiling import instrumentation
+from scripts.scraper.scrape_state import ScrapeStateStore
+
+PREPROCESSED_JSON_FILE = os.path.join(config.PREPROCESSED_DATA_DIR, config.PREPROCESSED_MESSAGES_FILE)
+VENDOR_AGGREGATES_FILE = config.VENDOR_AGGREGATES_FILE
+SCRAPE_STATE_DB = config.SCRAPE_STATE_DB
+
+# --- Vendor Scorecard (Lending Score) ---
+# The FinTech_Vendor_Scorecard.ipynb metrics, computed with grouped numpy/pandas
+# aggregation over a columnar frame of messages instead of a per-message loop.
+#
+# VendorAggregates keeps the running totals the scores are derived from (posts,
+# views, price sum/count, first/last post time, top post) per channel, so a day of
+# new messages updates them in place and the scorecard is re-derived in O(vendors).
+# Messages are remembered by a per-channel high-water mark of message ids; ones at
+# or below it are ignored, so re-reading a file only adds the new messages. The
+# mark used for that check is the one from the last load()/save(), not the running
+# maximum: the scraper writes every channel newest first, so within one run older
+# messages still arrive after newer ones.
+#
+# An interrupted scrape leaves a gap: the combined file holds the newest pages of
+# the unfinished run, and the resumed run later adds the older ones, all below the
+# mark. So when the scraper's state store is available, each channel is only
+# counted up to its last *completed* high_water_id (`scrape_limits`); newer
+# messages wait until their run has finished, when no gap can remain below them.
+#
+# Results equal the notebook's: price sums are accumulated in message order
+# (np.add.at), and the final formulas run per vendor on the same Python/numpy
+# types as the notebook, so rounding is identical too. Incremental updates equal a
+# full recomputation when new messages come after the ones already counted.
+
+MAX_POSTING_FREQ = 50.0
+MAX_AVG_VIEWS = 10000.0
+MAX_AVG_PRICE = 50000.0
+SCORE_WEIGHTS = (0.4, 0.4, 0.2) # Posting frequency, average views, average price
+SCORECARD_COLUMNS = ['Vendor Channel', 'Posts/Week', 'Avg. Views/Post', 'Avg. Price (ETB)',
+                     'Top Post Product', 'Top Post Price (ETB)', 'Lending Score']
+# Columns of the message frame passed to VendorAggregates.update
+FRAME_COLUMNS = ['channel_id', 'channel_name', 'id', 'date', 'views', 'price', 'product']
+# Message fields the scorecard reads (projection for Parquet input)
+MESSAGE_COLUMNS = ['id', 'channel_id', 'channel_name', 'date', 'views', 'cleaned_text']
+_NS_PER_DAY = 86400 * 10**9
+_NO_DATE_MIN = np.iinfo(np.int64).max
+_NO_DATE_MAX = np.iinfo(np.int64).min
+
+
+def extract_numerical_price(ner_output):
+    """Mean of the PRICE entities' numbers (x1000 for 'ሺህ'/'thousand'), or None."""
+    price_entities = []
+    for entity in ner_output:
+        if entity['entity_group'] == 'PRICE':
+            price_text = entity['word'].replace(',', '').lower()
+            numbers = re.findall(r'\d+\.?\d*', price_text)
+            if numbers:
+                try:
+                    price_value = float(numbers[0])
+                    if 'ሺህ' in price_text or 'thousand' in price_text:
+                        price_value *= 1000
+                    price_entities.append(price_value)
+                except ValueError:
+                    continue
+    if price_entities:
+        return np.mean(price_entities)
+    return None
+
+
+def first_product(ner_output):
+    """Word of the first PRODUCT entity, or None."""
+    return next((e['word'] for e in ner_output if e['entity_group'] == 'PRODUCT'), None)
+
+
+def is_scorable(record):
+    """The notebook skips messages without a channel id or cleaned text."""
+    return bool(record.get('channel_id')) and bool(record.get('cleaned_text', ''))
+
+
+def message_frame(records, entities):
+    """Builds the FRAME_COLUMNS frame from records and their NER entities (same order).
+
+    Records the notebook skips (see is_scorable) are left out.
+    """
+    columns = {name: [] for name in FRAME_COLUMNS}
+    for record, ner_output in zip(records, entities):
+        if not is_scorable(record):
+            continue
+        price = extract_numerical_price(ner_output)
+        columns['channel_id'].append(record.get('channel_id'))
+        columns['channel_name'].append(record.get('channel_name'))
+        columns['id'].append(record.get('id'))
+        columns['date'].append(record.get('date'))
+        columns['views'].append(record.get('views', 0))
+        columns['price'].append(np.nan if price is None else price)
+        columns['product'].append(first_product(ner_output))
+    frame = pd.DataFrame(columns)
+    frame['price'] = frame['price'].astype(np.float64)
+    frame['product'] = pd.Series(columns['product'], dtype=object)
+    return frame
+
+
+def to_utc_nanoseconds(dates):
+    """int64 UTC nanoseconds of ISO strings or datetimes (naive = UTC), plus a validity mask."""
+    dates = pd.Series(dates)
+    if not isinstance(dates.dtype, pd.DatetimeTZDtype) or str(dates.dt.tz) != 'UTC':
+        dates = pd.to_datetime(dates, utc=True, errors='coerce', format='ISO8601')
+    index = pd.DatetimeIndex(dates).as_unit('ns')
+    return index.asi8.copy(), ~index.isna()
+
+
+class VendorAggregates:
+    """Per-channel running totals behind the vendor scorecard.
+
+    Vendors are kept in first-seen order (the notebook's channel_data order) in
+    parallel numpy arrays. `update` adds a frame of new messages; `scorecard`
+    derives the table; `save`/`load` persist the totals as JSON.
+    """
+
+    _INT_FIELDS = ('channel_id', 'num_posts', 'total_views', 'price_count', 'first_date', 'last_date',
+                   'top_views', 'top_message_id', 'last_message_id')
+    _FLOAT_FIELDS = ('total_prices', 'top_price')
+    _OBJECT_FIELDS = ('name', 'top_product')
+
+    def __init__(self):
+        self._slot_of = {} # channel_id -> row in the arrays below
+        self.channel_id = np.empty(0, dtype=np.int64)
+        self.name = np.empty(0, dtype=object)
+        self.num_posts = np.empty(0, dtype=np.int64)
+        self.total_views = np.empty(0, dtype=np.int64)
+        self.total_prices = np.empty(0, dtype=np.float64)
+        self.price_count = np.empty(0, dtype=np.int64)
+        self.first_date = np.empty(0, dtype=np.int64) # UTC ns; _NO_DATE_MIN until a dated post
+        self.last_date = np.empty(0, dtype=np.int64) # UTC ns; _NO_DATE_MAX until a dated post
+        self.top_views = np.empty(0, dtype=np.int64)
+        self.top_message_id = np.empty(0, dtype=np.int64)
+        self.top_product = np.empty(0, dtype=object) # None -> 'N/A'
+        self.top_price = np.empty(0, dtype=np.float64) # NaN -> 'N/A'
+        self.last_message_id = np.empty(0, dtype=np.int64)
+        self.counted_message_id = np.empty(0, dtype=np.int64) # last_message_id as of the last load/save
+        self.scrape_limits = {} # channel_id -> newest id of its last completed scrape (not saved)
+
+    def __len__(self):
+        return len(self.channel_id)
+
+    @property
+    def total_messages(self):
+        return int(self.num_posts.sum())
+
+    def is_new(self, channel_id, message_id):
+        """True if the message is above its channel's saved high-water mark (not yet counted)
+        and not above its channel's scrape limit."""
+        if message_id > self.scrape_limits.get(channel_id, message_id):
+            return False
+        slot = self._slot_of.get(channel_id)
+        return slot is None or message_id > self.counted_message_id[slot]
+
+    def load_scrape_limits(self, state_db_path=SCRAPE_STATE_DB):
+        """Limits counting to the scraper's completed runs; returns the number of channels limited."""
+        if not state_db_path or not os.path.exists(state_db_path):
+            return 0
+        state = ScrapeStateStore(state_db_path)
+        try:
+            self.scrape_limits = state.completed_marks()
+        finally:
+            state.close()
+        return len(self.scrape_limits)
+
+    def _add_vendors(self, channel_ids, names):
+        count = len(channel_ids)
+        for offset, channel_id in enumerate(channel_ids.tolist()):
+            self._slot_of[channel_id] = len(self) + offset
+        defaults = {
+            'channel_id': channel_ids, 'name': names,
+            'num_posts': 0, 'total_views': 0, 'total_prices': 0.0, 'price_count': 0,
+            'first_date': _NO_DATE_MIN, 'last_date': _NO_DATE_MAX,
+            'top_views': -1, 'top_message_id': -1, 'top_product': None, 'top_price': np.nan,
+            'last_message_id': -1, 'counted_message_id': -1
+        }
+        for field, value in defaults.items():
+            current = getattr(self, field)
+            added = np.empty(count, dtype=current.dtype)
+            added[:] = value
+            setattr(self, field, np.concatenate([current, added]))
+
+    def update(self, frame):
+        """Adds the new messages of a FRAME_COLUMNS frame; returns how many were counted.
+
+        Rows without a channel id (and, if the frame has a cleaned_text column,
+        without text) are skipped like in the notebook, as are rows at or below
+        their channel's high-water mark as of the last load()/save(), so
+        messages may arrive in any id order within a run. Rows above their
+        channel's scrape limit are left for a later update. Missing views count as 0.
+        """
+        channel_ids = pd.to_numeric(frame['channel_id'], errors='coerce').fillna(0).to_numpy(dtype=np.int64)
+        keep = channel_ids != 0
+        if 'cleaned_text' in frame:
+            keep &= frame['cleaned_text'].fillna('').str.len().to_numpy() > 0
+        if not keep.all():
+            frame, channel_ids = frame[keep], channel_ids[keep]
+        if not len(frame):
+            return 0
+
+        # 1. Vendor slot of every row; new channels are appended in first-seen order
+        codes, uniques = pd.factorize(channel_ids)
+        unknown = np.fromiter((c not in self._slot_of for c in uniques.tolist()), dtype=bool, count=len(uniques))
+        if unknown.any():
+            first_rows = np.unique(codes, return_index=True)[1][unknown]
+            names = frame['channel_name'].to_numpy(dtype=object)[first_rows]
+            new_ids = uniques[unknown]
+            names = np.array([name if isinstance(name, str) else f"Channel_{channel_id}"
+                              for name, channel_id in zip(names, new_ids.tolist())], dtype=object)
+            self._add_vendors(new_ids, names)
+        slots = np.array([self._slot_of[c] for c in uniques.tolist()], dtype=np.int64)[codes]
+
+        # 2. Drop messages counted by an earlier update
+        message_ids = frame['id'].to_numpy(dtype=np.int64)
+        fresh = message_ids > self.counted_message_id[slots]
+        if self.scrape_limits:
+            no_limit = np.iinfo(np.int64).max
+            limits = np.array([self.scrape_limits.get(c, no_limit) for c in uniques.tolist()], dtype=np.int64)
+            fresh &= message_ids <= limits[codes]
+        if not fresh.all():
+            frame, slots, message_ids = frame[fresh], slots[fresh], message_ids[fresh]
+        if not len(frame):
+            return 0
+        views = pd.to_numeric(frame['views'], errors='coerce').fillna(0).to_numpy(dtype=np.int64)
+        prices = frame['price'].to_numpy(dtype=np.float64)
+        has_price = ~np.isnan(prices)
+        dates, has_date = to_utc_nanoseconds(frame['date'])
+
+        # 3. Grouped sums, counts and extremes (ufunc.at applies rows in order)
+        size = len(self)
+        self.num_posts += np.bincount(slots, minlength=size)
+        np.add.at(self.total_views, slots, views)
+        np.add.at(self.total_prices, slots[has_price], prices[has_price])
+        self.price_count += np.bincount(slots[has_price], minlength=size)
+        np.minimum.at(self.first_date, slots[has_date], dates[has_date])
+        np.maximum.at(self.last_date, slots[has_date], dates[has_date])
+        np.maximum.at(self.last_message_id, slots, message_ids)
+
+        # 4. Top post: the first message with strictly more views than any before it
+        top_rows = pd.Series(views).groupby(slots, sort=False).idxmax()
+        top_slots, top_rows = top_rows.index.to_numpy(), top_rows.to_numpy()
+        better = views[top_rows] > self.top_views[top_slots]
+        top_slots, top_rows = top_slots[better], top_rows[better]
+        self.top_views[top_slots] = views[top_rows]
+        self.top_message_id[top_slots] = message_ids[top_rows]
+        self.top_product[top_slots] = frame['product'].to_numpy(dtype=object)[top_rows]
+        self.top_price[top_slots] = prices[top_rows]
+        return len(frame)
+
+    def vendor_metrics(self, slot):
+        """Scorecard row of one vendor, computed exactly like notebook Step 6."""
+        num_posts = int(self.num_posts[slot])
+        activity_duration_days = 0
+        if self.first_date[slot] != _NO_DATE_MIN and self.last_date[slot] != _NO_DATE_MAX:
+            activity_duration_days = (int(self.last_date[slot]) - int(self.first_date[slot])) // _NS_PER_DAY
+
+        posting_frequency_per_week = 0
+        if activity_duration_days > 0:
+            posting_frequency_per_week = (num_posts / activity_duration_days) * 7
+        elif num_posts > 0:
+            posting_frequency_per_week = num_posts
+
+        # The notebook sums np.float64 prices onto an int 0; keep those types for round()
+        price_count = int(self.price_count[slot])
+        total_prices = self.total_prices[slot] if price_count else 0
+        average_views_per_post = int(self.total_views[slot]) / num_posts if num_posts > 0 else 0
+        average_price_point = total_prices / price_count if price_count > 0 else 0
+
+        normalized_posting_freq = min(posting_frequency_per_week / MAX_POSTING_FREQ, 1.0)
+        normalized_avg_views = min(average_views_per_post / MAX_AVG_VIEWS, 1.0)
+        normalized_avg_price = min(average_price_point / MAX_AVG_PRICE, 1.0)
+        freq_weight, views_weight, price_weight = SCORE_WEIGHTS
+        lending_score = (normalized_posting_freq * freq_weight) + \
+                        (normalized_avg_views * views_weight) + \
+                        (normalized_avg_price * price_weight)
+
+        top_product = self.top_product[slot]
+        top_price = self.top_price[slot]
+        return {
+            'Vendor Channel': self.name[slot],
+            'Posts/Week': round(posting_frequency_per_week, 2),
+            'Avg. Views/Post': round(average_views_per_post, 2),
+            'Avg. Price (ETB)': round(average_price_point, 2),
+            'Top Post Product': top_product if isinstance(top_product, str) else 'N/A',
+            'Top Post Price (ETB)': top_price if not np.isnan(top_price) else 'N/A',
+            'Lending Score': round(lending_score, 4)
+        }
+
+    @instrumentation.timed('scorecard.VendorAggregates.scorecard')
+    def scorecard(self):
+        """The vendor scorecard DataFrame, sorted by Lending Score (highest first)."""
+        vendor_scores = [self.vendor_metrics(slot) for slot in range(len(self))]
+        return pd.DataFrame(vendor_scores, columns=SCORECARD_COLUMNS).sort_values(by='Lending Score', ascending=False)
+
+    def save(self, path=VENDOR_AGGREGATES_FILE):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        vendors = []
+        for slot in range(len(self)):
+            vendor = {field: int(getattr(self, field)[slot]) for field in self._INT_FIELDS}
+            vendor.update({field: float(getattr(self, field)[slot]) for field in self._FLOAT_FIELDS})
+            vendor.update({field: getattr(self, field)[slot] for field in self._OBJECT_FIELDS})
+            vendor['top_price'] = None if np.isnan(vendor['top_price']) else vendor['top_price']
+            vendor['top_product'] = vendor['top_product'] if isinstance(vendor['top_product'], str) else None
+            vendors.append(vendor)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'vendors': vendors}, f, ensure_ascii=False, indent=2)
+        self.counted_message_id = self.last_message_id.copy()
+
+    @classmethod
+    def load(cls, path=VENDOR_AGGREGATES_FILE):
+        """Aggregates saved by `save`, or empty ones if `path` does not exist."""
+        aggregates = cls()
+        if not os.path.exists(path):
+            return aggregates
+        with open(path, 'r', encoding='utf-8') as f:
+            vendors = json.load(f)['vendors']
+        for field in cls._INT_FIELDS:
+            setattr(aggregates, field, np.array([v[field] for v in vendors], dtype=np.int64))
+        for field in cls._FLOAT_FIELDS:
+            values = [np.nan if v[field] is None else v[field] for v in vendors]
+            setattr(aggregates, field, np.array(values, dtype=np.float64))
+        for field in cls._OBJECT_FIELDS:
+            values = np.empty(len(vendors), dtype=object)
+            values[:] = [v[field] for v in vendors]
+            setattr(aggregates, field, values)
+        aggregates.counted_message_id = aggregates.last_message_id.copy()
+        aggregates._slot_of = {channel_id: slot for slot, channel_id in enumerate(aggregates.channel_id.tolist())}
+        return aggregates
+
+
+def compute_scorecard(frame):
+    """Full (non-incremental) scorecard of a FRAME_COLUMNS frame."""
+    aggregates = VendorAggregates()
+    aggregates.update(frame)
+    return aggregates.scorecard()
+
+
+class CleanedTexts:
+    """Re-iterable cleaned_text of every record in a message file, streamed on each pass."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def __iter__(self):
+        return (record.get('cleaned_text') or "" for record in iter_records(self.path))
+
+
+@instrumentation.stage('scorecard')
+def update_from_messages(aggregates, records, extractor, chunk_size=5000, token_store=None):
+    """Runs NER on the new, scorable records and adds them to `aggregates` chunk by chunk.
+
+    `extractor` is anything with an `extract(texts)` method (NerInferenceEngine or
+    CachedNerExtractor). With a TokenStore of the messages' cleaned_text, NER
+    batches are sliced from it instead of re-tokenized. Returns the number of
+    messages added.
+    """
+    added = 0
+    chunk = []
+
+    def flush():
+        with instrumentation.stage('ner', items=len(chunk)):
+            texts = [record['cleaned_text'] for record in chunk]
+            if token_store is None:
+                entities = extractor.extract(texts)
+            elif hasattr(extractor, 'extract_pretokenized'):
+                entities = extractor.extract_pretokenized(texts, token_store)
+            else: # CachedNerExtractor: only cache misses reach the store
+                entities = extractor.extract(texts, token_store=token_store)
+        with instrumentation.stage('aggregate', items=len(chunk)):
+            return aggregates.update(message_frame(chunk, entities))
+
+    read = 0
+    for record in records:
+        read += 1
+        if is_scorable(record) and aggregates.is_new(record['channel_id'], record['id']):
+            chunk.append(record)
+        if len(chunk) >= chunk_size:
+            added += flush()
+            chunk = []
+    if chunk:
+        added += flush()
+    instrumentation.count(items=read)
+    return added
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compute the vendor scorecard (Lending Score) from preprocessed messages.")
+    parser.add_argument('--input', default=PREPROCESSED_JSON_FILE, help="Preprocessed messages (JSON, JSONL or Parquet dataset).")
+    parser.add_argument('--aggregates', default=VENDOR_AGGREGATES_FILE,
+                        help="Running per-vendor totals; only messages not yet counted are added.")
+    parser.add_argument('--full', action='store_true', help="Ignore saved totals and recompute from all messages.")
+    parser.add_argument('--scrape-state', default=SCRAPE_STATE_DB,
+                        help="Scraper state store; messages of unfinished scrape runs are not counted yet ('' to ignore).")
+    parser.add_argument('--quantized', action='store_true', help="Use the int8 model from export_quantized_model.py.")
+    parser.add_argument('--output', help="Also write the scorecard to this CSV file.")
+    parser.add_argument('--token-store', help="Slice NER input ids from this token store of the input's cleaned_text "
+                                              "(token_store.py; rebuilt when stale) instead of re-tokenizing.")
+    instrumentation.add_report_args(parser)
+    args = parser.parse_args()
+
+    with instrumentation.run_from_args('scorecard', args):
+        from scripts.inference.ner_cache import CachedNerExtractor
+        from scripts.inference.ner_inference import NER_MODEL_DIR, NerInferenceEngine
+        from scripts.inference.export_quantized_model import QUANTIZED_NER_MODEL_DIR
+
+        if args.quantized:
+            engine, model_dir = NerInferenceEngine.from_quantized(QUANTIZED_NER_MODEL_DIR), QUANTIZED_NER_MODEL_DIR
+        else:
+            engine, model_dir = NerInferenceEngine.from_pretrained(NER_MODEL_DIR), NER_MODEL_DIR
+        aggregates = VendorAggregates() if args.full else VendorAggregates.load(args.aggregates)
+        print(f"Starting from {aggregates.total_messages} counted messages across {len(aggregates)} vendors.")
+        if aggregates.load_scrape_limits(args.scrape_state):
+            print(f"Counting up to the last completed scrape of {len(aggregates.scrape_limits)} channels.")
+
+        token_store = None
+        if args.token_store:
+            from scripts.data_io.token_store import open_or_build_token_store
+            with instrumentation.stage('token_store'):
+                token_store = open_or_build_token_store(args.token_store, CleanedTexts(args.input),
+                                                        engine.tokenizer, engine.max_length)
+        extractor = CachedNerExtractor.open(engine, model_dir)
+        try:
+            added = update_from_messages(aggregates, iter_records(args.input), extractor, token_store=token_store)
+        finally:
+            extractor.cache.close()
+        aggregates.save(args.aggregates)
+        print(f"Added {added} new messages; totals saved to {args.aggregates}")
+
+        vendor_scorecard_df = aggregates.scorecard()
+        print("\n--- FinTech Vendor Scorecard for Micro-Lending ---")
+        print(vendor_scorecard_df.to_string(index=False))
+        if args.output:
+            vendor_scorecard_df.to_csv(args.output, index=False)
+            print(f"Scorecard written to {args.output}")
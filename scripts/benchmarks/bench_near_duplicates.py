@@ -0,0 +1,120 @@
+# EthioMart_NER_Project/scripts/benchmarks/bench_near_duplicates.py
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+import numpy as np
+
+# Add the project root to the Python path to import project modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+from scripts.benchmarks.synthetic_corpus import EMOJIS, generate_texts
+from scripts.preprocessing.amharic_preprocessing import AmharicNormalizer
+from scripts.preprocessing.near_duplicates import DEFAULT_SHINGLE_SIZE, NearDuplicateIndex, normalize_for_dedup
+
+
+def edit_repost(text, rng):
+    """A repost of `text` with a small vendor-style edit."""
+    edit = rng.randrange(4)
+    if edit == 0: # New price
+        return re.sub(r'\d+', lambda m: str(int(m.group()) + rng.choice([50, 100, 500])), text, count=1)
+    if edit == 1: # Different emojis
+        return text + ' ' + rng.choice(EMOJIS) * rng.randrange(1, 4)
+    if edit == 2: # Extra word
+        return text + rng.choice([' ዛሬ ብቻ', ' በቅናሽ', ' FREE Delivery'])
+    return text # Exact repost
+
+
+def repost_corpus(num_messages, unique_fraction, seed=0):
+    """Cleaned texts plus, for each, the index of the original ad it was derived from."""
+    rng = random.Random(seed)
+    num_unique = max(1, int(num_messages * unique_fraction))
+    originals = generate_texts(num_unique, seed=seed)
+    raw, origin = list(originals), list(range(num_unique))
+    for _ in range(num_messages - num_unique):
+        source = rng.randrange(num_unique)
+        raw.append(edit_repost(originals[source], rng))
+        origin.append(source)
+    order = list(range(num_messages))
+    rng.shuffle(order)
+    normalizer = AmharicNormalizer()
+    return [normalizer.clean(raw[i]) for i in order], np.array([origin[i] for i in order])
+
+
+def shingle_set(text, k=DEFAULT_SHINGLE_SIZE):
+    text = normalize_for_dedup(text)
+    text = text if len(text) >= k else text.ljust(k)
+    return {text[i:i + k] for i in range(len(text) - k + 1)}
+
+
+def brute_force_clusters(texts, threshold):
+    """All-pairs exact Jaccard + connected components; only feasible for small corpora."""
+    sets = [shingle_set(text) for text in texts]
+    parent = list(range(len(texts)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i in range(len(sets)):
+        for j in range(i + 1, len(sets)):
+            if len(sets[i] & sets[j]) / len(sets[i] | sets[j]) >= threshold:
+                root_i, root_j = find(i), find(j)
+                parent[max(root_i, root_j)] = min(root_i, root_j)
+    return np.array([find(i) for i in range(len(texts))])
+
+
+def same_cluster_pairs(cluster_ids):
+    """Set of (i, j) position pairs placed in one cluster (for small corpora)."""
+    members = {}
+    for position, cluster_id in enumerate(cluster_ids.tolist()):
+        members.setdefault(cluster_id, []).append(position)
+    return {(a, b) for group in members.values() for i, a in enumerate(group) for b in group[i + 1:]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scaling and accuracy benchmark for MinHash/LSH near-duplicate detection.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--unique-fraction', type=float, default=0.4, help="Share of distinct ads; the rest are edited reposts.")
+    parser.add_argument('--threshold', type=float, default=0.8)
+    parser.add_argument('--check-size', type=int, default=1500, help="Corpus size for the all-pairs exact Jaccard check.")
+    args = parser.parse_args()
+
+    # 1. Accuracy against all-pairs exact Jaccard on a small corpus
+    texts, _ = repost_corpus(args.check_size, args.unique_fraction, seed=1)
+    index = NearDuplicateIndex(threshold=args.threshold)
+    index.add(texts)
+    lsh_pairs = same_cluster_pairs(index.cluster_ids())
+    exact_pairs = same_cluster_pairs(brute_force_clusters(texts, args.threshold))
+    recall = len(lsh_pairs & exact_pairs) / len(exact_pairs) if exact_pairs else 1.0
+    precision = len(lsh_pairs & exact_pairs) / len(lsh_pairs) if lsh_pairs else 1.0
+    print(f"All-pairs check on {len(texts)} messages: pair precision {precision:.3f}, recall {recall:.3f}")
+
+    # 2. Scaling
+    print(f"{'Messages':>10}{'Seconds':>9}{'Msgs/sec':>11}{'Clusters':>10}{'Repost recall':>15}{'False merges':>14}")
+    for size in args.sizes:
+        texts, origin = repost_corpus(size, args.unique_fraction, seed=2)
+        start = time.perf_counter()
+        index = NearDuplicateIndex(threshold=args.threshold)
+        for chunk_start in range(0, len(texts), 50000):
+            index.add(texts[chunk_start:chunk_start + 50000])
+        cluster_ids = index.cluster_ids()
+        seconds = time.perf_counter() - start
+        # A repost is found if it shares a cluster with its original ad; a false
+        # merge is a cluster whose members came from different original ads
+        representative_origin = origin[cluster_ids]
+        repost_recall = float((representative_origin == origin).mean())
+        mixed = np.zeros(len(origin), dtype=bool)
+        np.logical_or.at(mixed, cluster_ids, representative_origin != origin)
+        false_merges = int(mixed.sum())
+        print(f"{size:>10}{seconds:>9.2f}{size / seconds:>11.0f}{len(np.unique(cluster_ids)):>10}"
+              f"{repost_recall:>15.3f}{false_merges:>14}")
+
+
+if __name__ == '__main__':
+    main()
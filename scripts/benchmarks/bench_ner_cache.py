@@ -0,0 +1,116 @@
+# EthioMart_NER_Project/scripts/benchmarks/bench_ner_cache.py
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+# Add the project root to the Python path to import project modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+from scripts.benchmarks.bench_ner_inference import entities_match
+from scripts.benchmarks.synthetic_corpus import generate_texts
+from scripts.inference.ner_cache import (CachedNerExtractor, NerResultCache, cache_key, model_fingerprint,
+                                         normalize_for_cache)
+from scripts.inference.ner_inference import NER_MODEL_DIR, NerInferenceEngine
+from scripts.preprocessing.amharic_preprocessing import AmharicNormalizer
+
+
+def repost_corpus(num_messages, unique_fraction, seed=0):
+    """Cleaned texts where only `unique_fraction` are distinct ads; the rest are reposts."""
+    rng = random.Random(seed)
+    unique = AmharicNormalizer().clean_many(generate_texts(max(1, int(num_messages * unique_fraction)), seed=seed))
+    texts = list(unique) + [rng.choice(unique) for _ in range(num_messages - len(unique))]
+    rng.shuffle(texts)
+    return texts
+
+
+def print_stats(name, seconds, stats):
+    print(f"{name:<26}{seconds:>9.2f}{stats['hit_rate']:>10.1%}{stats['memory_hits']:>9}{stats['disk_hits']:>8}"
+          f"{stats['misses']:>8}{stats['inferred']:>10}{stats['time_saved_seconds']:>11.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hit rate, time saved and correctness of the NER result cache.")
+    parser.add_argument('--adapter-dir', default=NER_MODEL_DIR)
+    parser.add_argument('--base-model', default=None, help="Base model name/path (defaults to the adapter's base model).")
+    parser.add_argument('--messages', type=int, default=2000)
+    parser.add_argument('--unique-fraction', type=float, default=0.3, help="Share of distinct texts; the rest are reposts.")
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--tolerance', type=float, default=1e-4,
+                        help="Allowed score difference (batch composition changes padding, not results).")
+    args = parser.parse_args()
+
+    engine = NerInferenceEngine.from_pretrained(args.adapter_dir, base_model=args.base_model, batch_size=args.batch_size)
+    texts = repost_corpus(args.messages, args.unique_fraction)
+    workdir = tempfile.mkdtemp(prefix='ner_cache_bench_')
+    db_path = os.path.join(workdir, 'ner_results.sqlite')
+    failures = []
+    try:
+        # 1. No cache
+        start = time.perf_counter()
+        expected = engine.extract(texts)
+        uncached_seconds = time.perf_counter() - start
+        print(f"{'Run':<26}{'Seconds':>9}{'Hit rate':>10}{'Memory':>9}{'Disk':>8}{'Misses':>8}{'Inferred':>10}{'Saved (s)':>11}")
+        print(f"{'no cache':<26}{uncached_seconds:>9.2f}")
+
+        # 2. Cold cache (dedup within the corpus), then warm in-process and from disk only
+        fingerprint = model_fingerprint(args.adapter_dir)
+        runs = [('cold cache', 'keep'), ('warm, in-process LRU', 'keep'), ('warm, disk only', 'reopen')]
+        extractor = CachedNerExtractor(engine, NerResultCache(db_path, fingerprint))
+        for name, mode in runs:
+            if mode == 'reopen':
+                extractor.cache.close()
+                extractor = CachedNerExtractor(engine, NerResultCache(db_path, fingerprint))
+            else:
+                extractor = CachedNerExtractor(engine, extractor.cache)
+                extractor.cache.reset_stats()
+            start = time.perf_counter()
+            results = extractor.extract(texts)
+            print_stats(name, time.perf_counter() - start, extractor.stats())
+            if not all(entities_match(ref, ours, args.tolerance) for ref, ours in zip(expected, results)):
+                failures.append(f"{name}: cached entities differ from uncached inference")
+
+        # Raw text (as sent to ner_server.py --cache) gets spans of its own characters
+        raw = [text.replace(' ', ' \n ', 1) + '  ' for text in texts[:50]]
+        mapped = extractor.extract(raw)
+        spans = [[(e['entity_group'], normalize_for_cache(e['word'])) for e in entities]
+                 for entities in engine.extract([normalize_for_cache(text) for text in raw])]
+        if any(entity['word'] != text[entity['start']:entity['end']] for text, entities in zip(raw, mapped)
+               for entity in entities) or spans != [[(e['entity_group'], normalize_for_cache(e['word'])) for e in entities]
+                                                    for entities in mapped]:
+            failures.append("cached spans do not index the caller's unnormalized text")
+        extractor.cache.close()
+
+        # 3. Another model (e.g. the --quantized export) gets its own entries without
+        # touching these; a size limit then evicts the least recently used rows
+        stored = len(set(normalize_for_cache(text) for text in texts))
+        with NerResultCache(db_path, fingerprint + '-changed') as cache:
+            other_keys = [cache_key(cache.fingerprint, normalize_for_cache(text)) for text in texts]
+            if cache.get_many(other_keys):
+                failures.append("a new fingerprint hit entries of another model")
+            cache.put_many([(other_keys[0], [], 0.0)])
+        with NerResultCache(db_path, fingerprint) as cache:
+            keys = [cache_key(fingerprint, normalize_for_cache(text)) for text in texts]
+            if len(cache) != stored + 1 or len(cache.get_many(keys)) != stored:
+                failures.append(f"opening another fingerprint lost entries: {len(cache)} rows, expected {stored + 1}")
+            else:
+                print(f"Two fingerprints share the cache: {len(cache)} rows kept.")
+        with NerResultCache(db_path, fingerprint, max_entries=10) as cache:
+            if len(cache) != 10 or cache.get_many(other_keys[:1]):
+                failures.append(f"size limit kept {len(cache)} rows (expected 10, newest first)")
+            else:
+                print("Size limit: least recently used rows evicted.")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
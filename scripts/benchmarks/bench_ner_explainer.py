@@ -0,0 +1,157 @@
+# EthioMart_NER_Project/scripts/benchmarks/bench_ner_explainer.py
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import torch
+
+# Add the project root to the Python path to import project modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+from scripts.benchmarks.synthetic_corpus import generate_texts
+from scripts.inference.ner_inference import NER_MODEL_DIR, NerInferenceEngine
+from scripts.interpretability.ner_explainer import EXAMPLE_SENTENCE, LIME_MASK_STRING, NerExplainer
+from scripts.preprocessing.amharic_preprocessing import AmharicNormalizer
+
+
+def padded_word_proba(engine, texts):
+    """(num_words, num_labels) first-subword probabilities per text, from one padded batch."""
+    encoded = engine.tokenizer([text.split() for text in texts], is_split_into_words=True, padding=True,
+                               truncation=True, max_length=engine.max_length, return_tensors='pt')
+    with torch.no_grad():
+        probabilities = torch.softmax(engine.model(**encoded).logits, dim=-1).numpy()
+    results = []
+    for i, text in enumerate(texts):
+        rows = np.zeros((len(text.split()), probabilities.shape[-1]), dtype=np.float32)
+        seen = set()
+        for position, word in enumerate(encoded.word_ids(batch_index=i)):
+            if word is not None and word not in seen:
+                seen.add(word)
+                rows[word] = probabilities[i, position]
+        results.append(rows)
+    return results
+
+
+def notebook_word_proba(engine, texts, word_index):
+    """The notebook's predict_proba_for_token_classification: all texts in one padded
+    batch, no dedup or memo, probabilities of one target word."""
+    return np.array([rows[word_index] for rows in padded_word_proba(engine, texts)])
+
+
+def notebook_lime(engine, text, targets, num_samples, num_features):
+    """One LIME run (and one full set of forward passes) per target word."""
+    from lime.lime_text import LimeTextExplainer
+    results = []
+    for index, label, _ in targets:
+        explainer = LimeTextExplainer(split_expression=r'\s+', bow=False, random_state=42)
+        explanation = explainer.explain_instance(
+            text, lambda texts: notebook_word_proba(engine, texts, index), labels=[label],
+            num_features=num_features, num_samples=num_samples
+        )
+        results.append(dict(explanation.as_list(label=label)))
+    return results
+
+
+def notebook_shap_values(engine, words, num_labels, nsamples):
+    """KernelSHAP with the notebook's ner_shap_predict_fn pattern: one forward pass per text."""
+    import shap
+
+    def predict(masks):
+        texts = [' '.join(word if keep else LIME_MASK_STRING for word, keep in zip(words, row)) for row in masks]
+        return np.array([padded_word_proba(engine, [text])[0].reshape(-1) for text in texts])
+
+    np.random.seed(0)
+    explainer = shap.KernelExplainer(predict, np.zeros((1, len(words))), link='identity')
+    values = explainer.shap_values(np.ones((1, len(words))), nsamples=nsamples, silent=True)
+    return np.asarray(values).reshape(len(words), len(words) * num_labels)
+
+
+def max_weight_difference(reference, results):
+    """Largest |weight| difference between per-word LIME feature dicts (missing = 0)."""
+    worst = 0.0
+    for expected, result in zip(reference, results):
+        actual = dict(result['weights'])
+        for word in set(expected) | set(actual):
+            worst = max(worst, abs(expected.get(word, 0.0) - actual.get(word, 0.0)))
+    return worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Explanations/sec of the notebook's LIME/SHAP usage vs. NerExplainer.")
+    parser.add_argument('--adapter-dir', default=NER_MODEL_DIR)
+    parser.add_argument('--base-model', default=None, help="Base model name/path (defaults to the adapter's base model).")
+    parser.add_argument('--sentences', type=int, default=3, help="Synthetic messages explained besides the notebook example.")
+    parser.add_argument('--max-words', type=int, default=16)
+    parser.add_argument('--num-samples', type=int, default=1000)
+    parser.add_argument('--num-features', type=int, default=5)
+    parser.add_argument('--tolerance', type=float, default=1e-3, help="Allowed LIME/SHAP weight difference.")
+    args = parser.parse_args()
+
+    engine = NerInferenceEngine.from_pretrained(args.adapter_dir, base_model=args.base_model)
+    normalizer = AmharicNormalizer()
+    texts = [EXAMPLE_SENTENCE] + [' '.join(normalizer.clean(text).split()[:args.max_words])
+                                  for text in generate_texts(args.sentences, seed=4)]
+    texts = [text for text in texts if text]
+    num_labels = len(engine.id2label)
+    failures = []
+
+    # 1. LIME: one run per word (notebook) vs. one shared run per sentence
+    explainer = NerExplainer(engine)
+    timings = {'notebook LIME': 0.0, 'batched LIME (cold)': 0.0, 'batched LIME (memoized)': 0.0,
+               'notebook SHAP': 0.0, 'batched SHAP': 0.0}
+    words_explained = sum(len(text.split()) for text in texts)
+    worst_lime = worst_shap = 0.0
+    for text in texts:
+        targets = explainer._targets(text.split())
+        start = time.perf_counter()
+        reference = notebook_lime(engine, text, targets, args.num_samples, args.num_features)
+        timings['notebook LIME'] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = explainer.explain_lime(text, num_samples=args.num_samples, num_features=args.num_features)
+        timings['batched LIME (cold)'] += time.perf_counter() - start
+        worst_lime = max(worst_lime, max_weight_difference(reference, results))
+
+        start = time.perf_counter()
+        explainer.explain_lime(text, num_samples=args.num_samples, num_features=args.num_features)
+        timings['batched LIME (memoized)'] += time.perf_counter() - start
+    lime_stats = explainer.stats()
+
+    # 2. SHAP: per-text forward passes vs. deduplicated, memoized micro-batches
+    explainer = NerExplainer(engine)
+    for text in texts:
+        words = text.split()
+        start = time.perf_counter()
+        reference = notebook_shap_values(engine, words, num_labels, args.num_samples)
+        timings['notebook SHAP'] += time.perf_counter() - start
+
+        np.random.seed(0)
+        start = time.perf_counter()
+        results = explainer.explain_shap(text, nsamples=args.num_samples)
+        timings['batched SHAP'] += time.perf_counter() - start
+        for result in results:
+            expected = reference[:, result['index'] * num_labels + explainer.label_names.index(result['label'])]
+            worst_shap = max(worst_shap, float(np.max(np.abs(expected - np.array(result['shap_values'])))))
+
+    print(f"{len(texts)} sentences, {words_explained} word-level explanations, {args.num_samples} samples each")
+    print(f"{'Method':<26}{'Seconds':>9}{'Expl/sec':>10}")
+    for name, seconds in timings.items():
+        print(f"{name:<26}{seconds:>9.2f}{words_explained / seconds:>10.1f}")
+    print(f"LIME: {lime_stats['requested']} texts requested, {lime_stats['inferred']} distinct variants inferred; "
+          f"max weight difference vs. notebook {worst_lime:.2e}")
+    print(f"SHAP: max value difference vs. notebook {worst_shap:.2e}")
+    if worst_lime > args.tolerance:
+        failures.append(f"LIME weights differ from the per-word runs by {worst_lime:.2e}")
+    if worst_shap > args.tolerance:
+        failures.append(f"SHAP values differ from the per-text predict function by {worst_shap:.2e}")
+
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
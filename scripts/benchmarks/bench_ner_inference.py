@@ -0,0 +1,93 @@
+# EthioMart_NER_Project/scripts/benchmarks/bench_ner_inference.py
+
+import argparse
+import os
+import sys
+import time
+
+import torch
+from transformers import pipeline
+
+# Add the project root to the Python path to import project modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+from scripts.benchmarks.synthetic_corpus import generate_texts
+from scripts.inference.ner_inference import NER_MODEL_DIR, NerInferenceEngine
+from scripts.preprocessing.amharic_preprocessing import AmharicNormalizer
+
+
+def entities_match(reference, entities, tolerance):
+    """True if two entity lists agree on groups, spans and words, with scores within `tolerance`."""
+    return len(reference) == len(entities) and all(
+        (ref['entity_group'], ref['word'], ref['start'], ref['end']) ==
+        (ours['entity_group'], ours['word'], ours['start'], ours['end'])
+        and abs(float(ref['score']) - ours['score']) <= tolerance
+        for ref, ours in zip(reference, entities)
+    )
+
+
+def check_parity(engine, texts, tolerance):
+    """Compares engine output with pipeline(aggregation_strategy="simple"), one text at a time.
+
+    Returns the number of texts whose entities differ (groups, spans or words),
+    or whose scores differ by more than `tolerance`.
+    """
+    ner_pipeline = pipeline("ner", model=engine.model, tokenizer=engine.tokenizer,
+                            aggregation_strategy="simple", device=engine.device)
+    mismatches = 0
+    for text, batched in zip(texts, engine.extract(texts)):
+        reference = ner_pipeline(text)
+        if not entities_match(reference, batched, tolerance):
+            mismatches += 1
+            if mismatches <= 3:
+                print(f"MISMATCH for {text!r}:\n  pipeline: {reference}\n  engine:   {batched}")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput benchmark and pipeline parity check for batched NER inference.")
+    parser.add_argument('--adapter-dir', default=NER_MODEL_DIR)
+    parser.add_argument('--base-model', default=None, help="Base model name/path (defaults to the adapter's base model).")
+    parser.add_argument('--messages', type=int, default=512)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument('--parity-messages', type=int, default=200)
+    parser.add_argument('--tolerance', type=float, default=1e-4, help="Allowed absolute score difference vs. the pipeline.")
+    parser.add_argument('--threads', type=int, default=None, help="torch.set_num_threads value.")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    engine = NerInferenceEngine.from_pretrained(args.adapter_dir, base_model=args.base_model)
+    normalizer = AmharicNormalizer()
+    texts = normalizer.clean_many(generate_texts(args.messages, seed=7))
+
+    # 1. Parity with the per-message pipeline the notebooks use
+    parity_texts = texts[:args.parity_messages]
+    mismatches = check_parity(engine, parity_texts, args.tolerance)
+    print(f"Parity: {len(parity_texts) - mismatches}/{len(parity_texts)} messages match the pipeline output.")
+
+    # 2. Per-message pipeline baseline
+    ner_pipeline = pipeline("ner", model=engine.model, tokenizer=engine.tokenizer,
+                            aggregation_strategy="simple", device=engine.device)
+    start = time.perf_counter()
+    for text in texts:
+        ner_pipeline(text)
+    baseline = time.perf_counter() - start
+
+    # 3. Batched engine at each batch size
+    num_tokens = sum(len(encoding['input_ids']) for encoding in engine.encode(texts))
+    print(f"{'Mode':<22}{'Seconds':>9}{'Msgs/sec':>10}{'Tokens/sec':>12}{'Speedup':>9}")
+    print(f"{'pipeline, per message':<22}{baseline:>9.2f}{len(texts) / baseline:>10.1f}{num_tokens / baseline:>12.0f}{1.0:>9.2f}")
+    for batch_size in args.batch_sizes:
+        start = time.perf_counter()
+        engine.extract(texts, batch_size=batch_size)
+        seconds = time.perf_counter() - start
+        print(f"{f'engine, batch {batch_size}':<22}{seconds:>9.2f}{len(texts) / seconds:>10.1f}"
+              f"{num_tokens / seconds:>12.0f}{baseline / seconds:>9.2f}")
+
+    if mismatches:
+        print(f"FAILED: {mismatches} messages differ from the pipeline output.")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,255 @@
+# EthioMart_NER_Project/scripts/benchmarks/bench_ner_server.py
+
+import argparse
+import http.client
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Add the project root to the Python path to import project modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+from scripts.benchmarks.bench_ner_inference import entities_match
+from scripts.benchmarks.synthetic_corpus import generate_texts
+from scripts.inference.ner_cache import CachedNerExtractor
+from scripts.inference.ner_inference import NER_MODEL_DIR, NerInferenceEngine
+from scripts.inference.ner_server import MicroBatcher, QueueFull, create_server, entity_spans
+from scripts.preprocessing.amharic_preprocessing import AmharicNormalizer
+
+
+def post(port, path, body, headers=None):
+    """One request on a fresh connection; returns (status, body text)."""
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+    try:
+        connection.request('POST', path, body=body, headers=headers or {'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        data = response.read().decode('utf-8')
+        return response.status, data
+    finally:
+        connection.close()
+
+
+def get_json(port, path):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    try:
+        connection.request('GET', path)
+        return json.loads(connection.getresponse().read())
+    finally:
+        connection.close()
+
+
+def run_load(port, texts, rps, duration, max_clients):
+    """Open-loop load: requests start on a fixed schedule whether or not earlier ones finished.
+
+    Returns (latencies in ms of successful requests, rejected count, wall seconds).
+    """
+    total = max(1, int(rps * duration))
+    latencies, rejected = [], []
+    lock = threading.Lock()
+
+    def one(i, scheduled):
+        body = json.dumps({'text': texts[i % len(texts)]}, ensure_ascii=False).encode('utf-8')
+        status, _ = post(port, '/extract', body)
+        with lock:
+            if status == 200:
+                latencies.append((time.perf_counter() - scheduled) * 1000) # Includes time waiting for a client
+            else:
+                rejected.append(status)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_clients) as pool:
+        for i in range(total):
+            scheduled = start + i / rps
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(one, i, scheduled)
+    return np.array(latencies), len(rejected), time.perf_counter() - start
+
+
+def queue_stress(seconds=5.0, max_queue=8):
+    """Blocking and all-or-nothing submits racing on a small queue, with a stub model.
+
+    Returns a list of problems: exceptions other than QueueFull, an overfilled
+    queue, futures that never finish, and cancelled texts that were inferred.
+    """
+    problems = []
+    batcher = MicroBatcher(lambda texts: [[] for _ in texts],
+                           max_batch_size=8, max_wait_ms=1, max_queue=max_queue)
+    stop = threading.Event()
+    accepted, errors, depths = [], [], []
+
+    def submitter(block):
+        while not stop.is_set():
+            try:
+                accepted.extend(batcher.submit(['x'] * (1 if block else 3), block=block, timeout=1.0))
+            except QueueFull:
+                pass
+            except Exception as e:
+                errors.append(type(e).__name__)
+
+    threads = [threading.Thread(target=submitter, args=(block,)) for block in (True, True, True, False, False, False)]
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6) # Switch threads often so the submits interleave
+    try:
+        for thread in threads:
+            thread.start()
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            depths.append(batcher.queue_depth)
+            time.sleep(0.001)
+        stop.set()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+    unfinished = sum(1 for future in accepted if future.exception(timeout=10) is not None)
+    batcher.close()
+    if errors:
+        problems.append(f"{len(errors)} submits raised {sorted(set(errors))} instead of QueueFull")
+    if max(depths) > max_queue:
+        problems.append(f"queue held {max(depths)} texts, more than max_queue={max_queue}")
+    if unfinished:
+        problems.append(f"{unfinished} accepted texts failed")
+
+    # A blocking submit that times out must not leave its earlier texts to be inferred
+    gate, seen = threading.Event(), []
+    batcher = MicroBatcher(lambda texts: gate.wait() and (seen.extend(texts) or [[] for _ in texts]),
+                           max_batch_size=1, max_wait_ms=0, max_queue=4)
+    first = batcher.submit(['first'])
+    while batcher.queue_depth:
+        time.sleep(0.001)
+    try:
+        batcher.submit(['a', 'b', 'c', 'd', 'e'], block=True, timeout=0.05)
+        problems.append("blocking submit on a full queue did not time out")
+    except QueueFull:
+        pass
+    gate.set()
+    first[0].result(timeout=10)
+    batcher.submit(['last'])[0].result(timeout=10)
+    batcher.close()
+    if seen != ['first', 'last']:
+        problems.append(f"texts of a timed-out submit were inferred: {seen}")
+    return problems
+
+
+def sequential_baseline(engine, texts, count):
+    """Latencies (ms) of one extract() call per text, the notebook's per-message pipeline usage."""
+    latencies = []
+    for i in range(count):
+        start = time.perf_counter()
+        engine.extract([texts[i % len(texts)]])
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="p50/p99 latency vs. request rate of the micro-batching NER server.")
+    parser.add_argument('--adapter-dir', default=NER_MODEL_DIR)
+    parser.add_argument('--base-model', default=None, help="Base model name/path (defaults to the adapter's base model).")
+    parser.add_argument('--rps', type=float, nargs='+', default=[5, 20, 50, 100])
+    parser.add_argument('--duration', type=float, default=5.0, help="Seconds of load per rate.")
+    parser.add_argument('--clients', type=int, default=64, help="Concurrent client connections.")
+    parser.add_argument('--max-batch-size', type=int, default=32)
+    parser.add_argument('--max-wait-ms', type=float, default=10)
+    parser.add_argument('--max-queue', type=int, default=256)
+    parser.add_argument('--texts', type=int, default=200, help="Distinct synthetic messages sent.")
+    parser.add_argument('--tolerance', type=float, default=1e-3)
+    args = parser.parse_args()
+
+    failures = queue_stress()
+    print("Queue stress (blocking + all-or-nothing submits): " + ("ok" if not failures else "FAILED"))
+
+    engine = NerInferenceEngine.from_pretrained(args.adapter_dir, base_model=args.base_model)
+    normalizer = AmharicNormalizer()
+    texts = [text for text in (normalizer.clean(t) for t in generate_texts(args.texts, seed=14)) if text]
+    server = create_server(engine.extract, port=0, max_batch_size=args.max_batch_size,
+                           max_wait_ms=args.max_wait_ms, max_queue=args.max_queue)
+    port = server.server_address[1]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    # 1. Correctness: /extract and /extract/bulk against direct engine calls
+    reference = [entity_spans(entities) for entities in engine.extract(texts)]
+    sample = texts[:min(20, args.max_queue)]
+    status, data = post(port, '/extract', json.dumps({'texts': sample}, ensure_ascii=False).encode('utf-8'))
+    served = json.loads(data)['results'] if status == 200 else []
+    if status != 200 or not all(entities_match(expected, actual, args.tolerance)
+                                for expected, actual in zip(reference, served)):
+        failures.append(f"/extract results differ from NerInferenceEngine.extract (status {status})")
+
+    bulk_lines = ''.join(json.dumps({'id': i, 'text': text}, ensure_ascii=False) + '\n' for i, text in enumerate(texts))
+    status, data = post(port, '/extract/bulk', bulk_lines.encode('utf-8'), {'Content-Type': 'application/x-ndjson'})
+    records = [json.loads(line) for line in data.splitlines() if line]
+    if status != 200 or [r['id'] for r in records] != list(range(len(texts))) or not all(
+            entities_match(expected, record['entities'], args.tolerance)
+            for expected, record in zip(reference, records)):
+        failures.append(f"/extract/bulk output is out of order or differs from direct extraction (status {status})")
+
+    bad_lines = '5\n[1]\n{"text": 5}\nnot json\n' + json.dumps({'id': 'ok', 'text': texts[0]}, ensure_ascii=False) + '\n'
+    try:
+        status, data = post(port, '/extract/bulk', bad_lines.encode('utf-8'), {'Content-Type': 'application/x-ndjson'})
+    except http.client.HTTPException as e: # Stream cut off by an exception in the handler
+        status, data = type(e).__name__, ''
+    records = [json.loads(line) for line in data.splitlines() if line] if status == 200 else []
+    if len(records) != 5 or not all('error' in record for record in records[:4]) or 'entities' not in records[4]:
+        failures.append(f"/extract/bulk did not answer malformed lines with per-line errors (status {status})")
+
+    # The cache is opened here but used from the batcher thread, as with ner_server.py --cache
+    cache_dir = tempfile.mkdtemp(prefix='ner_server_cache_')
+    cached = CachedNerExtractor.open(engine, args.adapter_dir, db_path=os.path.join(cache_dir, 'cache.sqlite'))
+    cache_server = create_server(cached.extract, port=0, max_batch_size=args.max_batch_size,
+                                 max_wait_ms=args.max_wait_ms, max_queue=args.max_queue)
+    threading.Thread(target=cache_server.serve_forever, daemon=True).start()
+    try:
+        for attempt in range(2): # Miss, then hit
+            status, data = post(cache_server.server_address[1], '/extract',
+                                json.dumps({'texts': sample}, ensure_ascii=False).encode('utf-8'))
+            served = json.loads(data).get('results', []) if status == 200 else []
+            if status != 200 or not all(entities_match(expected, actual, args.tolerance)
+                                        for expected, actual in zip(reference, served)):
+                failures.append(f"/extract with the result cache failed (status {status}, attempt {attempt + 1})")
+                break
+    finally:
+        cache_server.shutdown()
+        cache_server.server_close()
+        cache_server.batcher.close()
+        cached.cache.close()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    # 2. Latency vs. offered load
+    baseline = sequential_baseline(engine, texts, 50)
+    print(f"Sequential single-text extract(): p50 {np.percentile(baseline, 50):.1f} ms, "
+          f"capacity ~{1000 / baseline.mean():.0f} req/s")
+    print(f"{'Target RPS':>10}{'Achieved':>10}{'p50 ms':>9}{'p99 ms':>9}{'503s':>7}{'Batch':>7}")
+    for rps in args.rps:
+        before = get_json(port, '/metrics')
+        latencies, rejected, seconds = run_load(port, texts, rps, args.duration, args.clients)
+        after = get_json(port, '/metrics')
+        batches = after['batches'] - before['batches']
+        mean_batch = (after['texts'] - before['texts']) / batches if batches else 0.0
+        p50, p99 = (np.percentile(latencies, 50), np.percentile(latencies, 99)) if len(latencies) else (0.0, 0.0)
+        print(f"{rps:>10.0f}{len(latencies) / seconds:>10.1f}{p50:>9.1f}{p99:>9.1f}{rejected:>7}{mean_batch:>7.1f}")
+        if not len(latencies):
+            failures.append(f"no request succeeded at {rps} RPS")
+
+    metrics = get_json(port, '/metrics')
+    print(f"Server totals: {metrics['requests']} requests, {metrics['texts']} texts in {metrics['batches']} batches, "
+          f"{metrics['rejected']} rejected")
+    server.shutdown()
+    server.server_close()
+    server.batcher.close()
+
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
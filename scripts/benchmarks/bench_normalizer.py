@@ -0,0 +1,105 @@
+# EthioMart_NER_Project/scripts/benchmarks/bench_normalizer.py
+
+import argparse
+import os
+import random
+import sys
+import time
+
+# Add the project root to the Python path to import project modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+from scripts.benchmarks.synthetic_corpus import generate_texts
+from scripts.preprocessing.amharic_preprocessing import (
+    AMHARIC_CHAR_NORM_MAP,
+    AMHARIC_PUNCTUATION,
+    AMHARIC_STOP_WORDS,
+    EMOJI_RANGES,
+    AmharicNormalizer,
+    clean_amharic_text
+)
+
+# Characters worth over-sampling in the fuzz corpus: everything the cleaner
+# treats specially, plus unusual Unicode whitespace and cased Latin letters.
+SPECIAL_CHARS = (
+    list(AMHARIC_CHAR_NORM_MAP) + list(AMHARIC_PUNCTUATION) + list("!\"',-.:;?_}~]") +
+    [chr(first) for first, _ in EMOJI_RANGES] + [chr(last) for _, last in EMOJI_RANGES] +
+    [chr(last + 1) for _, last in EMOJI_RANGES] +
+    [' ', '\t', '\n', '\r', '\x0b', '\x0c', '\x1c', '\x85', '\xa0', ' ', '　'] +
+    list("ABCXYZİ")
+)
+
+
+def generate_fuzz_texts(num_texts, seed=7):
+    """Random strings built from stop words, special characters and random code points."""
+    rng = random.Random(seed)
+    stopwords = sorted(AMHARIC_STOP_WORDS)
+    texts = []
+    for _ in range(num_texts):
+        pieces = []
+        for _ in range(rng.randrange(0, 40)):
+            kind = rng.random()
+            if kind < 0.3:
+                pieces.append(rng.choice(stopwords))
+            elif kind < 0.7:
+                pieces.append(rng.choice(SPECIAL_CHARS))
+            elif kind < 0.85:
+                pieces.append(chr(rng.randrange(0x1200, 0x1400)))
+            else:
+                pieces.append(chr(rng.randrange(0x20, 0x20000)))
+        texts.append(''.join(pieces))
+    return texts + ["", None, "   ", "}~]", "a}~]b", "ሀ\U0001F600።ሰ"]
+
+
+def check_equivalence(texts, normalizer):
+    """Returns the number of texts where the normalizer differs from clean_amharic_text."""
+    mismatches = 0
+    for text in texts:
+        expected = clean_amharic_text(text)
+        actual = normalizer.clean(text)
+        if expected.encode('utf-8', 'surrogatepass') != actual.encode('utf-8', 'surrogatepass'):
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"  MISMATCH for {text!r}:\n    expected {expected!r}\n    actual   {actual!r}")
+    return mismatches
+
+
+def time_cleaner(clean, texts, repeats):
+    """Best-of-N wall time for cleaning every text once."""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for text in texts:
+            clean(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Differential check and throughput benchmark for AmharicNormalizer.")
+    parser.add_argument('--messages', type=int, default=50000, help="Synthetic messages to benchmark on.")
+    parser.add_argument('--fuzz', type=int, default=20000, help="Random fuzz strings for the differential check.")
+    parser.add_argument('--repeats', type=int, default=3, help="Timing repeats (best is reported).")
+    args = parser.parse_args()
+
+    normalizer = AmharicNormalizer()
+    texts = generate_texts(args.messages)
+
+    print(f"Differential check on {len(texts)} synthetic messages + {args.fuzz} fuzz strings...")
+    mismatches = check_equivalence(texts + generate_fuzz_texts(args.fuzz), normalizer)
+    if mismatches:
+        print(f"FAILED: {mismatches} outputs differ from clean_amharic_text.")
+        sys.exit(1)
+    print("OK: outputs are byte-identical.")
+
+    total_bytes = sum(len(text.encode('utf-8')) for text in texts if text)
+    legacy_time = time_cleaner(clean_amharic_text, texts, args.repeats)
+    compiled_time = time_cleaner(normalizer.clean, texts, args.repeats)
+
+    print(f"\n{'Implementation':<24}{'Seconds':>10}{'Msgs/sec':>14}{'MB/sec':>10}")
+    for name, seconds in [("clean_amharic_text", legacy_time), ("AmharicNormalizer", compiled_time)]:
+        print(f"{name:<24}{seconds:>10.3f}{len(texts) / seconds:>14,.0f}{total_bytes / 1e6 / seconds:>10.2f}")
+    print(f"\nSpeedup: {legacy_time / compiled_time:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+# EthioMart_NER_Project/scripts/benchmarks/bench_parallel_preprocess.py
+
+import argparse
+import filecmp
+import os
+import sys
+import tempfile
+import time
+
+# Add the project root to the Python path to import project modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+from scripts.benchmarks.synthetic_corpus import generate_messages
+from scripts.data_io.message_stream import open_record_writer
+from scripts.preprocessing.amharic_preprocessing import DEFAULT_CHUNK_SIZE, stream_preprocess_telegram_data
+
+
+def default_worker_counts():
+    """1, 2, 4, ... up to the number of available cores."""
+    cores = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= cores:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cores:
+        counts.append(cores)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scaling benchmark for multi-core preprocessing (--workers N).")
+    parser.add_argument('--messages', type=int, default=200000, help="Synthetic messages in the benchmark corpus.")
+    parser.add_argument('--workers', type=int, nargs='+', default=None, help="Worker counts to compare (default: 1, 2, 4, ... cores).")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    worker_counts = args.workers or default_worker_counts()
+    if 1 not in worker_counts:
+        worker_counts = [1] + worker_counts
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_path = os.path.join(tmp_dir, 'raw.jsonl')
+        with open_record_writer(input_path) as writer:
+            for record in generate_messages(args.messages):
+                writer.write(record)
+
+        timings = {}
+        for workers in worker_counts:
+            output_path = os.path.join(tmp_dir, f'out_{workers}.jsonl')
+            start = time.perf_counter()
+            stream_preprocess_telegram_data(input_path, output_path, workers=workers, chunk_size=args.chunk_size)
+            timings[workers] = time.perf_counter() - start
+
+        serial_output = os.path.join(tmp_dir, 'out_1.jsonl')
+        print(f"\n{'Workers':>8}{'Seconds':>10}{'Msgs/sec':>12}{'Speedup':>9}{'Efficiency':>12}{'Identical':>11}")
+        all_identical = True
+        for workers in worker_counts:
+            identical = filecmp.cmp(serial_output, os.path.join(tmp_dir, f'out_{workers}.jsonl'), shallow=False)
+            all_identical &= identical
+            speedup = timings[1] / timings[workers]
+            print(f"{workers:>8}{timings[workers]:>10.2f}{args.messages / timings[workers]:>12,.0f}"
+                  f"{speedup:>9.2f}{speedup / workers:>12.0%}{str(identical):>11}")
+
+    if not all_identical:
+        print("FAILED: parallel output differs from the serial path.")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
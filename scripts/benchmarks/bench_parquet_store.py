@@ -0,0 +1,121 @@
+# EthioMart_NER_Project/scripts/benchmarks/bench_parquet_store.py
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+# Add the project root to the Python path to import project modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+from scripts.benchmarks.synthetic_corpus import generate_messages
+from scripts.data_io.message_stream import iter_records, open_record_writer
+from scripts.data_io.parquet_store import ParquetMessageWriter, read_messages_df
+from scripts.labeling_preparation.extract_annotation_subset import iter_unique_records
+from scripts.preprocessing.amharic_preprocessing import AmharicNormalizer
+from scripts.preprocessing.near_duplicates import tag_duplicates
+
+SCORECARD_COLUMNS = ['channel_id', 'date', 'views', 'cleaned_text']
+DEDUP_CHECK_MESSAGES = 20000 # Near-duplicate tagging holds the records in memory
+
+
+def path_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(folder, name)) for folder, _, names in os.walk(path) for name in names)
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def _write_parquet(path, records):
+    with ParquetMessageWriter(path) as writer:
+        for record in records:
+            writer.write(record)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Size and load time of the JSON array vs. the partitioned Parquet dataset.")
+    parser.add_argument('--messages', type=int, default=200000)
+    parser.add_argument('--channels', type=int, default=9)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='parquet_bench_')
+    json_path = os.path.join(workdir, 'preprocessed.json')
+    parquet_path = os.path.join(workdir, 'preprocessed.parquet')
+    try:
+        normalizer = AmharicNormalizer()
+        records = list(generate_messages(args.messages, seed=3, num_channels=args.channels))
+        for record in records:
+            record['cleaned_text'] = normalizer.clean(record['message'])
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(records, f, ensure_ascii=False, indent=4)
+        write_seconds, _ = timed(lambda: _write_parquet(parquet_path, records))
+
+        # Near-duplicate tags must pick the same representatives after the Parquet
+        # round trip, which reads the records back grouped by channel/month
+        tagged = tag_duplicates(records[:DEDUP_CHECK_MESSAGES])
+        tagged_jsonl, tagged_parquet = os.path.join(workdir, 'tagged.jsonl'), os.path.join(workdir, 'tagged.parquet')
+        for path in (tagged_jsonl, tagged_parquet):
+            with open_record_writer(path) as writer:
+                for record in tagged:
+                    writer.write(record)
+        del records, tagged
+        unique_keys = [{(record['channel_id'], record['id']) for record in iter_unique_records(path)}
+                       for path in (tagged_jsonl, tagged_parquet)]
+        if unique_keys[0] != unique_keys[1]:
+            print(f"FAILED: --unique keeps {len(unique_keys[0])} records from JSONL but "
+                  f"{len(unique_keys[1])} from Parquet.")
+            sys.exit(1)
+        print(f"Near-duplicate tags survive the Parquet round trip ({len(unique_keys[0])} unique records).")
+
+        json_size, parquet_size = path_size(json_path), path_size(parquet_path)
+        print(f"Size: JSON {json_size / 1e6:.1f} MB, Parquet {parquet_size / 1e6:.1f} MB "
+              f"({json_size / parquet_size:.1f}x smaller); Parquet write {write_seconds:.2f}s")
+
+        def json_scorecard_frame():
+            with open(json_path, 'r', encoding='utf-8') as f:
+                return pd.DataFrame(json.load(f))[SCORECARD_COLUMNS]
+
+        first_channel = 1000000
+        scenarios = [
+            ("JSON json.load, all fields", json_scorecard_frame),
+            ("JSON streamed records", lambda: sum(1 for _ in iter_records(json_path))),
+            ("Parquet, all columns", lambda: read_messages_df(parquet_path)),
+            ("Parquet, scorecard columns", lambda: read_messages_df(parquet_path, columns=SCORECARD_COLUMNS)),
+            ("Parquet, 1 channel", lambda: read_messages_df(parquet_path, columns=SCORECARD_COLUMNS,
+                                                            channel_ids=[first_channel])),
+        ]
+        print(f"{'Load':<30}{'Seconds':>9}{'Rows':>10}")
+        frames = {}
+        for name, load in scenarios:
+            seconds, result = timed(load)
+            frames[name] = result
+            print(f"{name:<30}{seconds:>9.2f}{len(result) if hasattr(result, '__len__') else result:>10}")
+
+        # The projected Parquet read must hold the same data as the JSON file
+        expected = frames["JSON json.load, all fields"].copy()
+        expected['date'] = pd.to_datetime(expected['date'], utc=True)
+        actual = frames["Parquet, scorecard columns"]
+        key = ['channel_id', 'date']
+        expected = expected.sort_values(key).reset_index(drop=True)
+        actual = actual.sort_values(key).reset_index(drop=True)
+        if not (expected['views'].equals(actual['views'].astype(expected['views'].dtype))
+                and expected['cleaned_text'].tolist() == actual['cleaned_text'].tolist()
+                and (expected['date'] == actual['date']).all()):
+            print("FAILED: Parquet columns differ from the JSON records.")
+            sys.exit(1)
+        print("Projected Parquet columns match the JSON records.")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
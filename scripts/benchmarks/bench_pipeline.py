@@ -0,0 +1,141 @@
+# EthioMart_NER_Project/scripts/benchmarks/bench_pipeline.py
+
+import argparse
+import asyncio
+import contextlib
+import glob
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# Add the project root to the Python path to import project modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import config # Import configuration from config.py
+from scripts.analytics.vendor_scorecard import VendorAggregates, is_scorable, update_from_messages
+from scripts.data_io.message_stream import iter_records
+from scripts.inference.ner_inference import NER_MODEL_DIR, NerInferenceEngine
+from scripts.labeling_preparation.extract_annotation_subset import extract_subset
+from scripts.preprocessing.amharic_preprocessing import stream_preprocess_telegram_data
+from scripts.profiling import instrumentation
+from scripts.scraper.fake_telegram_client import FakeTelegramClient
+from scripts.scraper.telegram_scraper import connect_and_scrape
+
+RUN_NAME = 'bench_pipeline'
+
+
+def hook_overhead_ns(calls=200000):
+    """Extra nanoseconds per call of a @timed function and of count() while no run is active."""
+    def bare():
+        return None
+
+    hooked = instrumentation.timed('bench.noop')(bare)
+    timings = []
+    for function in (bare, hooked, instrumentation.count):
+        start = time.perf_counter()
+        for _ in range(calls):
+            function()
+        timings.append((time.perf_counter() - start) / calls * 1e9)
+    return timings[1] - timings[0], timings[2]
+
+
+def previous_report(report_dir, messages, exclude):
+    """Latest earlier report of this bench for the same corpus size, or None."""
+    for path in sorted(glob.glob(os.path.join(report_dir, f"{RUN_NAME}-*.json")), reverse=True):
+        if path == exclude:
+            continue
+        report = instrumentation.load_report(path)
+        if report['params'].get('messages') == messages:
+            return report
+    return None
+
+
+def run_pipeline(args, work_dir):
+    """Scrape (fake Telegram) -> preprocess -> annotation subset -> NER + scorecard, all in `work_dir`."""
+    per_channel = [args.messages // args.channels + (i < args.messages % args.channels) for i in range(args.channels)]
+    channels = {f"@bench_shop_{i}": count for i, count in enumerate(per_channel)}
+    with instrumentation.stage('generate_corpus', items=args.messages):
+        client = FakeTelegramClient(channels, latency=0.0, max_requests_per_second=1e6)
+    raw_path = os.path.join(work_dir, 'raw_messages.jsonl')
+    asyncio.run(connect_and_scrape(client=client, output_path=raw_path, channels=list(channels),
+                                   state_db_path=os.path.join(work_dir, 'scrape_state.sqlite'),
+                                   shards_dir=os.path.join(work_dir, 'shards')))
+
+    preprocessed_path = os.path.join(work_dir, 'preprocessed.jsonl')
+    stream_preprocess_telegram_data(raw_path, preprocessed_path, workers=args.workers)
+    extract_subset(preprocessed_path, os.path.join(work_dir, 'annotation_subset.json'),
+                   config.NUM_MESSAGES_TO_LABEL, unique=args.unique)
+
+    with instrumentation.stage('load_model'):
+        engine = NerInferenceEngine.from_pretrained(args.adapter_dir, base_model=args.base_model)
+    aggregates = VendorAggregates()
+    added = update_from_messages(aggregates, iter_records(preprocessed_path), engine)
+    scorecard = aggregates.scorecard()
+    scorable = sum(1 for record in iter_records(preprocessed_path) if is_scorable(record))
+    return added, scorable, len(scorecard)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs the whole pipeline on a synthetic Amharic corpus and saves a run report.")
+    parser.add_argument('--messages', type=int, default=10000, help="Synthetic corpus size.")
+    parser.add_argument('--channels', type=int, default=9)
+    parser.add_argument('--adapter-dir', default=NER_MODEL_DIR)
+    parser.add_argument('--base-model', default=None, help="Base model name/path (defaults to the adapter's base model).")
+    parser.add_argument('--workers', type=int, default=1, help="Preprocessing worker processes.")
+    parser.add_argument('--unique', action='store_true', help="Near-duplicate filtering for the annotation subset.")
+    parser.add_argument('--report-dir', default=instrumentation.RUN_REPORTS_DIR, help="Where run reports are saved.")
+    parser.add_argument('--profile-interval', type=float, default=None, metavar='SECONDS',
+                        help="Also sample the stack every SECONDS (e.g. 0.005).")
+    parser.add_argument('--verbose', action='store_true', help="Show the pipeline scripts' own progress output.")
+    args = parser.parse_args()
+    failures = []
+
+    off_timed_ns, off_count_ns = hook_overhead_ns()
+    print(f"Hook overhead with instrumentation off: @timed +{off_timed_ns:.0f} ns/call, count() {off_count_ns:.0f} ns/call")
+
+    work_dir = tempfile.mkdtemp(prefix='pipeline_bench_')
+    params = {key: value for key, value in vars(args).items() if key not in ('report_dir', 'verbose')}
+    try:
+        instrumentation.start_run(RUN_NAME, args.report_dir, args.profile_interval, params)
+        try:
+            with contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO()):
+                added, scorable, vendors = run_pipeline(args, work_dir)
+        finally:
+            report_path, report = instrumentation.finish_run()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(instrumentation.format_report(report))
+    print(f"\nRun report saved to {report_path}")
+    earlier = previous_report(args.report_dir, args.messages, report_path)
+    if earlier:
+        print(f"\nCompared with the previous run on {args.messages:,} messages:")
+        print(instrumentation.compare_reports(earlier, report))
+
+    # The report's counts must match what the pipeline actually did
+    stages = {stage_stats['name']: stage_stats for stage_stats in report['stages']}
+    expected = {
+        'scrape': args.messages, 'combine_shards': args.messages, 'preprocess': args.messages,
+        'annotation_subset': None if args.unique else min(args.messages, config.NUM_MESSAGES_TO_LABEL),
+        'scorecard': args.messages, 'scorecard/ner': scorable
+    }
+    for name, items in expected.items():
+        if name not in stages:
+            failures.append(f"stage '{name}' missing from the report")
+        elif items is not None and stages[name]['items'] != items:
+            failures.append(f"stage '{name}' counted {stages[name]['items']} items, expected {items}")
+    if added != scorable or not vendors:
+        failures.append(f"scorecard added {added} of {scorable} scorable messages for {vendors} vendors")
+    if not any(function['name'] == 'ner.forward' for function in report['functions']):
+        failures.append("ner.forward was not timed")
+
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+# EthioMart_NER_Project/scripts/benchmarks/bench_quantized_model.py
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+from seqeval.metrics import f1_score
+
+# Add the project root to the Python path to import project modules
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+sys.path.insert(0, PROJECT_ROOT)
+import config
+from scripts.benchmarks.synthetic_corpus import generate_texts
+from scripts.inference.export_quantized_model import QUANTIZED_NER_MODEL_DIR, directory_size, export_quantized_model
+from scripts.inference.ner_inference import NER_MODEL_DIR, NerInferenceEngine
+from scripts.model_training.conll_data import parse_conll_file, tokenize_and_align_labels
+from scripts.preprocessing.amharic_preprocessing import AmharicNormalizer
+
+# Run in a fresh interpreter so the cold start includes imports and nothing is
+# shared with the benchmark process; it imports only what a worker would.
+COLD_START_CODE = """
+import json, resource, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {root!r})
+from scripts.inference.ner_inference import NerInferenceEngine
+if {mode!r} == 'int8':
+    engine = NerInferenceEngine.from_quantized({quantized_dir!r})
+else:
+    engine = NerInferenceEngine.from_pretrained({adapter_dir!r}, base_model={base_model!r})
+loaded = time.perf_counter()
+engine.extract(["ሳምሰንግ ስልክ ዋጋ 5000 ብር"])
+done = time.perf_counter()
+print(json.dumps({{
+    'load_seconds': loaded - start,
+    'first_request_seconds': done - loaded,
+    'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+}}))
+"""
+
+
+def load_engine(mode, args):
+    if mode == 'int8':
+        return NerInferenceEngine.from_quantized(args.quantized_dir, batch_size=args.batch_size)
+    return NerInferenceEngine.from_pretrained(args.adapter_dir, base_model=args.base_model, batch_size=args.batch_size)
+
+
+def measure_cold_start(mode, args):
+    """Loads the model and answers one request in a subprocess; returns its timings and peak RSS."""
+    code = COLD_START_CODE.format(root=PROJECT_ROOT, mode=mode, quantized_dir=args.quantized_dir,
+                                  adapter_dir=args.adapter_dir, base_model=args.base_model)
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report['wall_seconds'] = time.perf_counter() - start
+    return report
+
+
+def entity_set(entities_per_text):
+    return {(i, e['entity_group'], e['start'], e['end']) for i, entities in enumerate(entities_per_text) for e in entities}
+
+
+def agreement_f1(reference, predicted):
+    """Entity-level F1 of `predicted` against `reference` (exact span and type match)."""
+    reference, predicted = entity_set(reference), entity_set(predicted)
+    if not reference and not predicted:
+        return 1.0
+    return 2 * len(reference & predicted) / (len(reference) + len(predicted))
+
+
+def gold_f1(engine, sentences):
+    """seqeval entity F1 on labeled CoNLL sentences, scored like the notebooks' compute_metrics."""
+    label2id = {label: i for i, label in engine.id2label.items()}
+    tokenized = tokenize_and_align_labels(engine.tokenizer, sentences, label2id, max_length=engine.max_length)
+    encodings = [{'input_ids': ids} for ids in tokenized['input_ids']]
+    true_labels, true_predictions = [], []
+    for logits, labels in zip(engine.predict_logits(encodings), tokenized['labels']):
+        predictions = np.argmax(logits, axis=-1)
+        true_labels.append([engine.id2label[l] for l in labels if l != -100])
+        true_predictions.append([engine.id2label[int(p)] for p, l in zip(predictions, labels) if l != -100])
+    return f1_score(true_labels, true_predictions)
+
+
+def measure_throughput(engine, texts):
+    num_tokens = sum(len(encoding['input_ids']) for encoding in engine.encode(texts))
+    start = time.perf_counter()
+    entities = engine.extract(texts)
+    return num_tokens / (time.perf_counter() - start), entities
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start, memory, throughput and F1 of the merged int8 model vs. the fp32 LoRA path.")
+    parser.add_argument('--adapter-dir', default=NER_MODEL_DIR)
+    parser.add_argument('--base-model', default=None, help="Base model name/path (defaults to the adapter's base model).")
+    parser.add_argument('--quantized-dir', default=QUANTIZED_NER_MODEL_DIR, help="Exported here first if it does not exist.")
+    parser.add_argument('--conll', default=config.LABELED_CONLL_FILE, help="Labeled data for the gold F1 check (skipped if missing).")
+    parser.add_argument('--messages', type=int, default=512)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--f1-tolerance', type=float, default=0.01, help="Largest allowed F1 drop from quantization.")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.quantized_dir):
+        print(f"Exporting the int8 model to {args.quantized_dir}...")
+        export_quantized_model(args.adapter_dir, args.quantized_dir, args.base_model)
+
+    # 1. Cold start and peak memory, each in a fresh process
+    print(f"{'Model':<14}{'Wall (s)':>10}{'Load (s)':>10}{'1st req (s)':>13}{'Peak RSS (MB)':>15}")
+    for mode in ('fp32', 'int8'):
+        report = measure_cold_start(mode, args)
+        print(f"{mode:<14}{report['wall_seconds']:>10.2f}{report['load_seconds']:>10.2f}"
+              f"{report['first_request_seconds']:>13.3f}{report['peak_rss_mb']:>15.0f}")
+    print(f"int8 artifact size: {directory_size(args.quantized_dir) / 1e6:.1f} MB")
+
+    # 2. Throughput and agreement on synthetic messages
+    texts = AmharicNormalizer().clean_many(generate_texts(args.messages, seed=11))
+    fp32 = load_engine('fp32', args)
+    int8 = load_engine('int8', args)
+    fp32_rate, fp32_entities = measure_throughput(fp32, texts)
+    int8_rate, int8_entities = measure_throughput(int8, texts)
+    print(f"Tokens/sec: fp32 {fp32_rate:.0f}, int8 {int8_rate:.0f} ({int8_rate / fp32_rate:.2f}x)")
+    agreement = agreement_f1(fp32_entities, int8_entities)
+    print(f"Entity agreement F1 (int8 vs. fp32 on synthetic messages): {agreement:.4f}")
+
+    # 3. Gold F1 on labeled data, when available and the label sets match
+    sentences = parse_conll_file(args.conll) if os.path.exists(args.conll) else []
+    known_labels = set(fp32.id2label.values())
+    sentences = [s for s in sentences if set(s['ner_tags']) <= known_labels]
+    if sentences:
+        fp32_f1, int8_f1 = gold_f1(fp32, sentences), gold_f1(int8, sentences)
+        drop = fp32_f1 - int8_f1
+        print(f"Gold entity F1 on {len(sentences)} sentences: fp32 {fp32_f1:.4f}, int8 {int8_f1:.4f} (drop {drop:+.4f})")
+    else:
+        drop = 1.0 - agreement
+        print("No labeled sentences matching the model's labels; using 1 - agreement F1 as the F1 drop.")
+
+    if drop > args.f1_tolerance:
+        print(f"FAILED: quantization costs {drop:.4f} F1 (tolerance {args.f1_tolerance}).")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+# EthioMart_NER_Project/scripts/benchmarks/bench_rule_extractor.py
+
+import argparse
+import os
+import re
+import sys
+import time
+from collections import Counter
+
+# Add the project root to the Python path to import project modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import config # Import configuration from config.py
+from scripts.benchmarks.synthetic_corpus import generate_labeled_sentences, generate_texts
+from scripts.inference.ner_inference import NER_MODEL_DIR, NerInferenceEngine
+from scripts.model_training.conll_data import parse_conll_file
+from scripts.preprocessing.amharic_preprocessing import AmharicNormalizer
+from scripts.preprocessing.rule_based_extractor import (ROUTE_FULL, ROUTE_SHORTEN, ROUTE_SKIP, RuleRoutedExtractor,
+                                                         RuleRouter, extract_rule_entities)
+
+# Hand-written messages and the route they must take; prefixes with attached punctuation included
+ROUTE_CASES = [
+    ("ዋጋ 2500 ብር", ROUTE_SKIP),
+    ("ዋጋ፦ 2,500ብር", ROUTE_SKIP),
+    ("ዋጋ: 2500 ብር", ROUTE_SKIP),
+    ("Price: 300", ROUTE_SKIP),
+    ("PRICE- 1,200 ETB።", ROUTE_SKIP),
+    ("ዋጋ፦ 2,500ብር 0911234567", ROUTE_SKIP),
+    ("ቦርሳ ዋጋ፦ 2,500ብር", ROUTE_SHORTEN),
+    ("Price: 300 ቦሌ", ROUTE_SHORTEN),
+    ("ሽያጭ ቦርሳ", ROUTE_FULL),
+]
+
+
+def rule_price_tags(tokens):
+    """Word-level BIO tags of the rule PRICE spans on a space-joined sentence."""
+    text = ' '.join(tokens)
+    starts = [match.start() for match in re.finditer(r'\S+', text)]
+    tags = ['O'] * len(tokens)
+    for entity in extract_rule_entities(text):
+        if entity['entity_group'] != 'PRICE':
+            continue
+        inside = [i for i, start in enumerate(starts) if entity['start'] <= start < entity['end']]
+        for position, i in enumerate(inside):
+            tags[i] = 'B-PRICE' if position == 0 else 'I-PRICE'
+    return tags
+
+
+def price_agreement(sentences, router):
+    """PRICE precision/recall/F1 of the rules against gold tags, and unsafe skips."""
+    from seqeval.metrics import f1_score, precision_score, recall_score
+
+    gold = [[tag if tag.endswith('PRICE') else 'O' for tag in sentence['ner_tags']] for sentence in sentences]
+    predicted = [rule_price_tags(sentence['tokens']) for sentence in sentences]
+    unsafe_skips = skipped = 0
+    for sentence in sentences:
+        if router.route(' '.join(sentence['tokens'])).action == ROUTE_SKIP:
+            skipped += 1
+            unsafe_skips += any(not tag.endswith('PRICE') and tag != 'O' for tag in sentence['ner_tags'])
+    return {
+        'precision': precision_score(gold, predicted), 'recall': recall_score(gold, predicted),
+        'f1': f1_score(gold, predicted), 'skipped': skipped, 'unsafe_skips': unsafe_skips
+    }
+
+
+def span_set(results, groups):
+    return {(i, e['entity_group'], e['start'], e['end']) for i, entities in enumerate(results)
+            for e in entities if e['entity_group'] in groups}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Traffic removed from the NER model by the rule-based fast path.")
+    parser.add_argument('--adapter-dir', default=NER_MODEL_DIR)
+    parser.add_argument('--base-model', default=None, help="Base model name/path (defaults to the adapter's base model).")
+    parser.add_argument('--conll', default=config.LABELED_CONLL_FILE,
+                        help="Labeled data for the agreement check (synthetic labeled sentences if missing).")
+    parser.add_argument('--messages', type=int, default=2000, help="Synthetic messages for the routing/speed test.")
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--min-precision', type=float, default=0.95, help="Required rule PRICE precision.")
+    args = parser.parse_args()
+    failures = []
+
+    # 1. Agreement with labeled CoNLL data
+    router = RuleRouter()
+    if os.path.exists(args.conll):
+        source, sentences = args.conll, parse_conll_file(args.conll)
+    else:
+        source, sentences = "synthetic labeled sentences", generate_labeled_sentences(1000, seed=15)
+    agreement = price_agreement(sentences, router)
+    print(f"PRICE agreement with {source} ({len(sentences)} sentences): precision {agreement['precision']:.3f}, "
+          f"recall {agreement['recall']:.3f}, F1 {agreement['f1']:.3f}")
+    print(f"Skipped sentences: {agreement['skipped']}, of which {agreement['unsafe_skips']} have gold PRODUCT/LOC")
+    if agreement['precision'] < args.min_precision:
+        failures.append(f"rule PRICE precision {agreement['precision']:.3f} < {args.min_precision}")
+    if agreement['unsafe_skips']:
+        failures.append(f"{agreement['unsafe_skips']} skipped sentences contain PRODUCT/LOC entities")
+
+    wrong_routes = [(text, router.route(text).action, action) for text, action in ROUTE_CASES
+                    if router.route(text).action != action]
+    for text, got, action in wrong_routes:
+        failures.append(f"'{text}' routed to '{got}', expected '{action}'")
+    print(f"Hand-written route cases: {len(ROUTE_CASES) - len(wrong_routes)}/{len(ROUTE_CASES)} as expected")
+
+    # 2. Routing and model input saved on the synthetic corpus
+    normalizer = AmharicNormalizer()
+    texts = normalizer.clean_many(generate_texts(args.messages, seed=15))
+    start = time.perf_counter()
+    routes = [router.route(text) for text in texts]
+    rule_seconds = time.perf_counter() - start
+    engine = NerInferenceEngine.from_pretrained(args.adapter_dir, base_model=args.base_model)
+    count_tokens = lambda strings: sum(len(ids) for ids in engine.tokenizer(strings, truncation=True)['input_ids']) if strings else 0
+    full_tokens = count_tokens([text for text in texts if text])
+    routed_tokens = count_tokens([route.model_text for route in routes if route.model_text])
+    actions = Counter(route.action for route in routes)
+    print(f"\nRule pass: {len(texts) / rule_seconds:,.0f} messages/s")
+    print("Routes: " + ', '.join(f"{action} {actions[action] / len(texts):.1%}" for action in ('skip', 'shorten', 'full')))
+    print(f"Model input: {full_tokens:,} -> {routed_tokens:,} subword tokens "
+          f"({1 - routed_tokens / full_tokens:.1%} of model traffic removed)")
+
+    # 3. End to end: model on every message vs. rules first
+    start = time.perf_counter()
+    full_results = engine.extract(texts, batch_size=args.batch_size)
+    full_seconds = time.perf_counter() - start
+    routed_extractor = RuleRoutedExtractor(engine)
+    start = time.perf_counter()
+    routed_results = routed_extractor.extract(texts, batch_size=args.batch_size)
+    routed_seconds = time.perf_counter() - start
+    print(f"End to end: model only {full_seconds:.2f}s, rules + model {routed_seconds:.2f}s "
+          f"({full_seconds / routed_seconds:.2f}x)")
+
+    kept = span_set(full_results, ('PRODUCT', 'LOC'))
+    routed = span_set(routed_results, ('PRODUCT', 'LOC'))
+    overlap = len(kept & routed) / len(kept) if kept else 1.0
+    print(f"PRODUCT/LOC spans of the full-text model also found after routing: {overlap:.1%} "
+          "(differences come from the model seeing shorter inputs)")
+    if len(routed_results) != len(texts):
+        failures.append("routed extractor returned a different number of results")
+
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
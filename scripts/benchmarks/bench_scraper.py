@@ -0,0 +1,79 @@
+# EthioMart_NER_Project/scripts/benchmarks/bench_scraper.py
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import time
+
+# Add the project root to the Python path to import project modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+from scripts.scraper.fake_telegram_client import FakeTelegramClient
+from scripts.scraper.telegram_scraper import AdaptiveRateLimiter, scrape_channels
+
+
+class FixedDelayLimiter:
+    """Reproduces the old pacing: await each page, then sleep a fixed delay."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.requests = 0
+        self.flood_waits = 0
+
+    async def call(self, make_request):
+        self.requests += 1
+        result = await make_request()
+        await asyncio.sleep(self.delay)
+        return result
+
+
+async def run_scrape(args, concurrency, limiter, resolve_flood_waits=0):
+    """Scrapes all fake channels once; returns (seconds, messages, client, limiter)."""
+    channels = {f"@fake_channel_{i}": args.messages_per_channel for i in range(args.channels)}
+    client = FakeTelegramClient(
+        channels,
+        latency=args.latency,
+        max_requests_per_second=args.server_rate,
+        flood_wait_seconds=args.flood_wait,
+        resolve_flood_waits=resolve_flood_waits
+    )
+    fetched = []
+    start = time.perf_counter()
+    # The scraper prints a line per page; keep the benchmark output readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        await scrape_channels(client, list(channels), lambda channel, entity, records: fetched.extend(records),
+                              concurrency=concurrency, limiter=limiter)
+    return time.perf_counter() - start, len(fetched), client, limiter
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline throughput/back-off benchmark for the concurrent scraper.")
+    parser.add_argument('--channels', type=int, default=9)
+    parser.add_argument('--messages-per-channel', type=int, default=1000)
+    parser.add_argument('--latency', type=float, default=0.2, help="Simulated request round-trip time (s).")
+    parser.add_argument('--server-rate', type=float, default=20.0, help="Requests/sec the fake server allows before FloodWaitError.")
+    parser.add_argument('--flood-wait', type=int, default=1, help="Seconds demanded by each FloodWaitError.")
+    parser.add_argument('--legacy-delay', type=float, default=1.0, help="Fixed per-page sleep of the old sequential scraper.")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 3, 9])
+    args = parser.parse_args()
+
+    scenarios = [("sequential, fixed delay", 1, FixedDelayLimiter(args.legacy_delay))]
+    scenarios += [(f"concurrent x{c}, adaptive", c, AdaptiveRateLimiter()) for c in args.concurrency]
+    # Every channel's username lookup is flooded once; no channel may be dropped
+    scenarios += [("x3, flooded get_entity", 3, AdaptiveRateLimiter(), 1)]
+
+    print(f"{'Scenario':<28}{'Seconds':>9}{'Messages':>10}{'Msgs/sec':>10}{'Requests':>10}{'FloodWaits':>12}")
+    expected = args.channels * args.messages_per_channel
+    for name, concurrency, limiter, *resolve_flood_waits in scenarios:
+        seconds, messages, client, limiter = asyncio.run(run_scrape(args, concurrency, limiter, *resolve_flood_waits))
+        print(f"{name:<28}{seconds:>9.2f}{messages:>10}{messages / seconds:>10.0f}"
+              f"{client.requests:>10}{limiter.flood_waits:>12}")
+        if messages != expected:
+            print(f"FAILED: expected {expected} messages, got {messages}.")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
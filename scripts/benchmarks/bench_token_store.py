@@ -0,0 +1,186 @@
+# EthioMart_NER_Project/scripts/benchmarks/bench_token_store.py
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+# Add the project root to the Python path to import project modules
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+sys.path.insert(0, PROJECT_ROOT)
+import config # Import configuration from config.py
+from scripts.benchmarks.synthetic_corpus import generate_labeled_sentences, generate_messages
+from scripts.analytics.vendor_scorecard import CleanedTexts, VendorAggregates, update_from_messages
+from scripts.data_io.message_stream import iter_records, open_record_writer
+from scripts.data_io.token_store import build_token_store, open_or_build_token_store
+from scripts.inference.ner_cache import CachedNerExtractor, NerResultCache
+from scripts.inference.ner_inference import NER_MODEL_DIR, NerInferenceEngine
+from scripts.model_training.conll_data import parse_conll_file, tokenize_and_align_labels
+from scripts.preprocessing.amharic_preprocessing import AmharicNormalizer
+
+# Each way of getting token ids for the whole corpus runs in a fresh interpreter,
+# so peak RSS is its own. 'tokenize' is what every notebook run pays today: load
+# the texts and tokenize them all into Python lists. 'store' opens the token
+# store and walks every row.
+PASS_CODE = """
+import json, resource, sys, time
+sys.path.insert(0, {root!r})
+
+def peak_rss_mb():
+    # VmHWM starts fresh at exec; ru_maxrss can still include the forking parent's pages
+    try:
+        with open('/proc/self/status') as f:
+            return next(int(line.split()[1]) for line in f if line.startswith('VmHWM')) / 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+start = time.perf_counter()
+if {mode!r} == 'tokenize':
+    from scripts.inference.ner_inference import load_tokenizer
+    tokenizer = load_tokenizer({model_dir!r}, {base_model!r})
+    with open({texts_file!r}, 'r', encoding='utf-8') as f:
+        texts = [json.loads(line) for line in f]
+    start = time.perf_counter()
+    encodings = []
+    for i in range(0, len(texts), 10000):
+        encoded = tokenizer(texts[i:i + 10000], truncation=True, max_length={max_length},
+                            return_offsets_mapping=True, return_special_tokens_mask=True)
+        encodings.extend(zip(encoded['input_ids'], encoded['offset_mapping'], encoded['special_tokens_mask']))
+    num_tokens = sum(len(ids) for ids, _, _ in encodings)
+else:
+    from scripts.data_io.token_store import TokenStore
+    store = TokenStore({store_dir!r})
+    num_tokens = 0
+    for row in range(len(store)):
+        encoding = store.encoding(row)
+        num_tokens += int(encoding['input_ids'].shape[0])
+        encoding['offsets'][-1:].sum() # Touch the pages as a consumer would
+print(json.dumps({{
+    'seconds': time.perf_counter() - start,
+    'num_tokens': num_tokens,
+    'peak_rss_mb': peak_rss_mb()
+}}))
+"""
+
+
+def run_pass(mode, args, texts_file, store_dir, max_length):
+    code = PASS_CODE.format(root=PROJECT_ROOT, mode=mode, model_dir=args.adapter_dir, base_model=args.base_model,
+                            texts_file=texts_file, store_dir=store_dir, max_length=max_length)
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True)
+    if result.returncode != 0:
+        # A negative code is a signal, e.g. the OOM killer when the lists outgrow RAM
+        print(f"{mode} pass failed with exit code {result.returncode}: {result.stderr.strip()[-300:]}")
+        return None
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tokenization time and memory: re-tokenizing vs. the memory-mapped token store.")
+    parser.add_argument('--adapter-dir', default=NER_MODEL_DIR)
+    parser.add_argument('--base-model', default=None, help="Base model name/path (defaults to the adapter's base model).")
+    parser.add_argument('--messages', type=int, default=1000000)
+    parser.add_argument('--conll', default=config.LABELED_CONLL_FILE,
+                        help="Labeled data for the training alignment check (synthetic labeled sentences if missing).")
+    parser.add_argument('--parity-messages', type=int, default=500, help="Messages run through the model for the parity check.")
+    args = parser.parse_args()
+    failures = []
+
+    engine = NerInferenceEngine.from_pretrained(args.adapter_dir, base_model=args.base_model)
+    tokenizer, max_length = engine.tokenizer, engine.max_length
+    work_dir = tempfile.mkdtemp(prefix='token_store_bench_')
+    try:
+        # 1. Corpus and one-off store build
+        normalizer = AmharicNormalizer()
+        texts_file = os.path.join(work_dir, 'texts.jsonl')
+        texts = []
+        with open(texts_file, 'w', encoding='utf-8') as f:
+            for record in generate_messages(args.messages, seed=16):
+                text = normalizer.clean(record['message'])
+                texts.append(text)
+                f.write(json.dumps(text, ensure_ascii=False) + '\n')
+        store_dir = os.path.join(work_dir, 'messages')
+        start = time.perf_counter()
+        store = build_token_store(store_dir, texts, tokenizer, max_length)
+        build_seconds = time.perf_counter() - start
+        store_mb = sum(os.path.getsize(os.path.join(store_dir, name)) for name in os.listdir(store_dir)) / 1e6
+        print(f"{args.messages:,} messages, {store.meta['num_tokens']:,} tokens; store built once in "
+              f"{build_seconds:.1f}s ({store_mb:,.0f} MB on disk)")
+
+        # 2. Every later run: re-tokenize vs. slice the store (fresh processes)
+        tokenized = run_pass('tokenize', args, texts_file, store_dir, max_length)
+        sliced = run_pass('store', args, texts_file, store_dir, max_length)
+        print(f"{'Pass':<12}{'Seconds':>9}{'Peak RSS MB':>13}")
+        for name, report in (('tokenize', tokenized), ('store', sliced)):
+            if report:
+                print(f"{name:<12}{report['seconds']:>9.2f}{report['peak_rss_mb']:>13.0f}")
+            else:
+                print(f"{name:<12}{'failed':>9}")
+        if tokenized and sliced:
+            print(f"Tokenization time saved per run: {tokenized['seconds'] - sliced['seconds']:.1f}s "
+                  f"({tokenized['seconds'] / sliced['seconds']:.1f}x)")
+            if tokenized['num_tokens'] != sliced['num_tokens']:
+                failures.append(f"store holds {sliced['num_tokens']} tokens, tokenizer produced {tokenized['num_tokens']}")
+        if not sliced:
+            failures.append("reading the token store failed")
+
+        # 3. Inference parity: same entities from stored and fresh tokens
+        sample = texts[:args.parity_messages]
+        if engine.extract(sample) != engine.extract_pretokenized(sample, store):
+            failures.append("extract_pretokenized differs from extract")
+
+        # 4. Training parity: tokenize_and_align_labels from the store
+        if os.path.exists(args.conll):
+            sentences = parse_conll_file(args.conll)
+        else:
+            sentences = generate_labeled_sentences(500, seed=16)
+        conll_store = build_token_store(os.path.join(work_dir, 'labeled'), [s['tokens'] for s in sentences],
+                                        tokenizer, max_length, is_split_into_words=True)
+        label2id = {label: i for i, label in engine.id2label.items()}
+        split = sentences[len(sentences) // 5:] # A subset, like the training split
+        expected = tokenize_and_align_labels(tokenizer, split, label2id, max_length=max_length)
+        actual = tokenize_and_align_labels(tokenizer, split, label2id, max_length=max_length, token_store=conll_store)
+        if (expected['labels'] != actual['labels']
+                or expected['input_ids'] != [ids.tolist() for ids in actual['input_ids']]):
+            failures.append("tokenize_and_align_labels differs when read from the token store")
+        print(f"Parity: {len(sample)} messages through the model, {len(split)} labeled sentences aligned")
+
+        # 5. Scorecard NER batches from open_or_build_token_store, plain and behind the cache
+        messages_path = os.path.join(work_dir, 'messages.jsonl')
+        with open_record_writer(messages_path) as writer:
+            for record in generate_messages(args.parity_messages, seed=16):
+                record['cleaned_text'] = normalizer.clean(record.pop('message'))
+                writer.write(record)
+        scorecard_store = os.path.join(work_dir, 'scorecard_store')
+        open_or_build_token_store(scorecard_store, CleanedTexts(messages_path), tokenizer, max_length)
+        built_at = os.path.getmtime(os.path.join(scorecard_store, 'meta.json'))
+        store = open_or_build_token_store(scorecard_store, CleanedTexts(messages_path), tokenizer, max_length)
+        if os.path.getmtime(os.path.join(scorecard_store, 'meta.json')) != built_at:
+            failures.append("open_or_build_token_store rebuilt an up-to-date store")
+        scorecards = []
+        for token_store, cached in ((None, False), (store, False), (store, True)):
+            aggregates = VendorAggregates()
+            extractor = engine
+            if cached:
+                extractor = CachedNerExtractor(engine, NerResultCache(os.path.join(work_dir, 'cache.sqlite'), 'bench'))
+            update_from_messages(aggregates, iter_records(messages_path), extractor, chunk_size=64,
+                                 token_store=token_store)
+            if cached:
+                extractor.cache.close()
+            scorecards.append(aggregates.scorecard().to_dict('split'))
+        if scorecards[1] != scorecards[0] or scorecards[2] != scorecards[0]:
+            failures.append("scorecard differs when NER batches come from the token store")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
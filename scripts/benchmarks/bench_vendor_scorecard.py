@@ -0,0 +1,281 @@
+# EthioMart_NER_Project/scripts/benchmarks/bench_vendor_scorecard.py
+
+import argparse
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+# Add the project root to the Python path to import project modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+from scripts.analytics.vendor_scorecard import (
+    VendorAggregates, compute_scorecard, extract_numerical_price, is_scorable, message_frame, update_from_messages
+)
+from scripts.benchmarks.synthetic_corpus import PRODUCTS, generate_messages
+
+
+def fake_entities(text, rng):
+    """NER-style output for a synthetic message: its numbers as PRICE, maybe a PRODUCT."""
+    entities = []
+    for number in re.findall(r'\d[\d,]*', text)[:rng.randrange(0, 3)]:
+        word = number + rng.choice(['', ' ብር', ' ሺህ', ' thousand'])
+        entities.append({'entity_group': 'PRICE', 'word': word, 'score': 0.9})
+    if rng.random() < 0.7:
+        entities.insert(rng.randrange(len(entities) + 1),
+                        {'entity_group': 'PRODUCT', 'word': rng.choice(PRODUCTS), 'score': 0.9})
+    return entities
+
+
+def check_corpus(num_messages, num_channels, seed=5):
+    """Synthetic records (with the notebook's edge cases) and their entities."""
+    rng = random.Random(seed)
+    records, entities = [], []
+    for record in generate_messages(num_messages, seed=seed, num_channels=num_channels):
+        record['cleaned_text'] = record.pop('message')
+        edge = rng.randrange(40)
+        if edge == 0:
+            record['cleaned_text'] = '' # Skipped by the notebook
+        elif edge == 1:
+            record['date'] = 'not a date'
+        elif edge == 2:
+            record['date'] = record['date'].replace('+00:00', '+03:00')
+        elif edge == 3:
+            record['date'] = record['date'].replace('+00:00', '') # Naive = UTC
+        elif edge == 4:
+            record['views'] = 0
+        records.append(record)
+        entities.append(fake_entities(record['cleaned_text'], rng))
+    # A channel with only undated posts and one without a name
+    records.append({'id': 1, 'channel_id': 42, 'date': None, 'views': 10, 'cleaned_text': 'ሱሪ'})
+    entities.append([])
+    return records, entities
+
+
+def notebook_scorecard(records, entities):
+    """Notebook Steps 5-7 with the NER call replaced by precomputed entities."""
+    channel_data = {}
+    for message, ner_results in zip(records, entities):
+        channel_id = message.get('channel_id')
+        channel_name = message.get('channel_name', f"Channel_{channel_id}")
+        cleaned_text = message.get('cleaned_text', '')
+        views = message.get('views', 0)
+        timestamp_str = message.get('date')
+        if not channel_id or not cleaned_text:
+            continue
+        if channel_id not in channel_data:
+            channel_data[channel_id] = {
+                'name': channel_name, 'posts': [],
+                'first_post_date': datetime.max.replace(tzinfo=timezone.utc),
+                'last_post_date': datetime.min.replace(tzinfo=timezone.utc),
+                'total_views': 0, 'total_prices': 0, 'price_count': 0,
+                'top_post_views': -1, 'top_post_details': {}
+            }
+        numerical_price = extract_numerical_price(ner_results)
+        post_timestamp = None
+        if timestamp_str:
+            try:
+                dt_object = datetime.fromisoformat(timestamp_str)
+                if dt_object.tzinfo is None:
+                    post_timestamp = dt_object.replace(tzinfo=timezone.utc)
+                else:
+                    post_timestamp = dt_object.astimezone(timezone.utc)
+            except ValueError:
+                post_timestamp = None
+        data = channel_data[channel_id]
+        data['posts'].append({'id': message['id'], 'views': views, 'timestamp': post_timestamp})
+        data['total_views'] += views
+        if numerical_price is not None:
+            data['total_prices'] += numerical_price
+            data['price_count'] += 1
+        if views > data['top_post_views']:
+            data['top_post_views'] = views
+            top_product = next((e['word'] for e in ner_results if e['entity_group'] == 'PRODUCT'), 'N/A')
+            top_price = numerical_price if numerical_price is not None else 'N/A'
+            data['top_post_details'] = {'product': top_product, 'price': top_price}
+        if post_timestamp:
+            data['first_post_date'] = min(data['first_post_date'], post_timestamp)
+            data['last_post_date'] = max(data['last_post_date'], post_timestamp)
+
+    vendor_scores = []
+    for data in channel_data.values():
+        num_posts = len(data['posts'])
+        activity_duration_days = 0
+        if data['first_post_date'] != datetime.max.replace(tzinfo=timezone.utc) and \
+                data['last_post_date'] != datetime.min.replace(tzinfo=timezone.utc):
+            activity_duration_days = (data['last_post_date'] - data['first_post_date']).days
+        posting_frequency_per_week = 0
+        if activity_duration_days > 0:
+            posting_frequency_per_week = (num_posts / activity_duration_days) * 7
+        elif num_posts > 0:
+            posting_frequency_per_week = num_posts
+        average_views_per_post = data['total_views'] / num_posts if num_posts > 0 else 0
+        average_price_point = data['total_prices'] / data['price_count'] if data['price_count'] > 0 else 0
+        normalized_posting_freq = min(posting_frequency_per_week / 50.0, 1.0)
+        normalized_avg_views = min(average_views_per_post / 10000.0, 1.0)
+        normalized_avg_price = min(average_price_point / 50000.0, 1.0)
+        lending_score = (normalized_posting_freq * 0.4) + (normalized_avg_views * 0.4) + (normalized_avg_price * 0.2)
+        vendor_scores.append({
+            'Vendor Channel': data['name'],
+            'Posts/Week': round(posting_frequency_per_week, 2),
+            'Avg. Views/Post': round(average_views_per_post, 2),
+            'Avg. Price (ETB)': round(average_price_point, 2) if average_price_point is not None else 'N/A',
+            'Top Post Product': data['top_post_details'].get('product', 'N/A'),
+            'Top Post Price (ETB)': data['top_post_details'].get('price', 'N/A'),
+            'Lending Score': round(lending_score, 4)
+        })
+    return pd.DataFrame(vendor_scores).sort_values(by='Lending Score', ascending=False)
+
+
+class PrecomputedExtractor:
+    """extract() that hands out precomputed entities in call order."""
+
+    def __init__(self, entities):
+        self._entities = iter(entities)
+
+    def extract(self, texts, batch_size=None):
+        return [next(self._entities) for _ in texts]
+
+
+def same_scorecard(expected, actual):
+    """Exact equality of values, row order and index."""
+    return expected.to_dict('split') == actual.to_dict('split')
+
+
+def synthetic_frame(num_messages, num_vendors, seed=0, start=0):
+    """A FRAME_COLUMNS frame of `num_messages` posts in time order, built with numpy."""
+    rng = np.random.default_rng(seed)
+    positions = np.arange(start, start + num_messages, dtype=np.int64)
+    channel_ids = 1000000 + rng.zipf(1.3, num_messages) % num_vendors # A few large vendors, many small
+    products = np.array([None] + PRODUCTS, dtype=object)
+    prices = np.round(rng.lognormal(7, 1.2, num_messages), 2)
+    prices[rng.random(num_messages) < 0.4] = np.nan
+    return pd.DataFrame({
+        'channel_id': channel_ids,
+        'channel_name': pd.Categorical.from_codes(channel_ids - 1000000, [f"Shop {i}" for i in range(num_vendors)]),
+        'id': positions + 1, # Increasing within every channel
+        'date': pd.Timestamp('2024-01-01', tz='UTC') + pd.to_timedelta(positions * 3, unit='s'),
+        'views': rng.integers(0, 20000, num_messages),
+        'price': prices,
+        'product': products[rng.integers(0, len(products), num_messages)]
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized and incremental vendor scorecard vs. the notebook loop.")
+    parser.add_argument('--messages', type=int, default=10000000, help="Corpus size for the full vs. incremental timing.")
+    parser.add_argument('--daily', type=int, default=50000, help="New messages per incremental update.")
+    parser.add_argument('--vendors', type=int, default=2000)
+    parser.add_argument('--check-messages', type=int, default=100000, help="Corpus size for the exact check against the notebook loop.")
+    args = parser.parse_args()
+    failures = []
+
+    # 1. Exactness: notebook loop vs. vectorized full and incremental (with save/load)
+    records, entities = check_corpus(args.check_messages, num_channels=25)
+    start = time.perf_counter()
+    expected = notebook_scorecard(records, entities)
+    loop_seconds = time.perf_counter() - start
+    frame = message_frame(records, entities)
+    start = time.perf_counter()
+    full = compute_scorecard(frame)
+    vectorized_seconds = time.perf_counter() - start
+    print(f"{len(records)} messages: notebook loop {loop_seconds:.2f}s, vectorized {vectorized_seconds:.3f}s "
+          f"(entities precomputed for both)")
+    if not same_scorecard(expected, full):
+        failures.append("vectorized scorecard differs from the notebook loop")
+
+    workdir = tempfile.mkdtemp(prefix='scorecard_bench_')
+    try:
+        path = os.path.join(workdir, 'vendor_aggregates.json')
+        for batch_start in range(0, len(frame), len(frame) // 7 + 1):
+            aggregates = VendorAggregates.load(path)
+            aggregates.update(frame.iloc[batch_start:batch_start + len(frame) // 7 + 1])
+            aggregates.save(path)
+        aggregates = VendorAggregates.load(path)
+        if aggregates.update(frame) != 0:
+            failures.append("re-reading counted messages added them again")
+        if not same_scorecard(expected, aggregates.scorecard()):
+            failures.append("incremental scorecard (7 saved/loaded updates) differs from the notebook loop")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    # Scraper order: every channel newest first, spread over several NER chunks
+    newest_first = sorted(zip(records, entities), key=lambda pair: (pair[0]['channel_id'], -pair[0]['id']))
+    newest_first = [pair for pair in newest_first if is_scorable(pair[0])]
+    aggregates = VendorAggregates()
+    added = update_from_messages(aggregates, [record for record, _ in newest_first],
+                                 PrecomputedExtractor([found for _, found in newest_first]), chunk_size=30)
+    if added != len(newest_first):
+        failures.append(f"newest-first input: {added} of {len(newest_first)} messages counted")
+    elif not same_scorecard(notebook_scorecard(*zip(*newest_first)), aggregates.scorecard()):
+        failures.append("newest-first input: scorecard differs from the notebook loop")
+
+    # Interrupted scrape: the file holds each channel's first completed run plus the
+    # newest pages of an unfinished one; the resumed run later adds the ids between
+    by_channel = {}
+    for record, found in zip(records, entities):
+        by_channel.setdefault(record['channel_id'], []).append((record, found))
+    first_run, unfinished, resumed, completed, resumed_limits = [], [], [], {}, {}
+    for channel_id, pairs in by_channel.items():
+        pairs.sort(key=lambda pair: pair[0]['id'])
+        third = len(pairs) // 3
+        first_run += pairs[:third]
+        resumed += pairs[third:len(pairs) - third]
+        unfinished += pairs[len(pairs) - third:]
+        completed[channel_id] = pairs[third - 1][0]['id'] if third else 0
+        resumed_limits[channel_id] = pairs[-1][0]['id']
+    workdir = tempfile.mkdtemp(prefix='scorecard_bench_')
+    try:
+        path = os.path.join(workdir, 'vendor_aggregates.json')
+        for limits, pairs in ((completed, first_run + unfinished), (resumed_limits, first_run + unfinished + resumed)):
+            aggregates = VendorAggregates.load(path)
+            aggregates.scrape_limits = limits
+            aggregates.update(message_frame(*zip(*pairs)))
+            aggregates.save(path)
+        counted = VendorAggregates.load(path).total_messages
+        scorable = sum(1 for record in records if is_scorable(record))
+        if counted != scorable:
+            failures.append(f"resumed scrape: {counted} of {scorable} messages counted")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    if not failures:
+        print("Full, incremental and newest-first scorecards match the notebook loop exactly; "
+              "a resumed scrape is counted in full.")
+
+    # 2. Full recomputation vs. an incremental daily update at scale
+    history = synthetic_frame(args.messages - args.daily, args.vendors, seed=1)
+    new_day = synthetic_frame(args.daily, args.vendors, seed=2, start=len(history))
+    everything = pd.concat([history, new_day], ignore_index=True)
+    aggregates = VendorAggregates()
+    start = time.perf_counter()
+    aggregates.update(history)
+    history_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    full = compute_scorecard(everything)
+    full_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    aggregates.update(new_day)
+    incremental = aggregates.scorecard()
+    incremental_seconds = time.perf_counter() - start
+    print(f"{'Run':<44}{'Seconds':>9}{'Msgs/sec':>13}")
+    print(f"{f'initial aggregates ({len(history)} msgs)':<44}{history_seconds:>9.2f}{len(history) / history_seconds:>13.0f}")
+    print(f"{f'full recomputation ({len(everything)} msgs)':<44}{full_seconds:>9.2f}{len(everything) / full_seconds:>13.0f}")
+    print(f"{f'incremental update (+{len(new_day)} msgs)':<44}{incremental_seconds:>9.3f}{len(new_day) / incremental_seconds:>13.0f}")
+    print(f"Incremental update is {full_seconds / incremental_seconds:.0f}x faster than recomputing "
+          f"{aggregates.total_messages} messages for {len(aggregates)} vendors.")
+    if not same_scorecard(full, incremental):
+        failures.append("incremental scorecard differs from full recomputation at scale")
+
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
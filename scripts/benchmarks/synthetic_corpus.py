@@ -0,0 +1,116 @@
+# EthioMart_NER_Project/scripts/benchmarks/synthetic_corpus.py
+
+import random
+from datetime import datetime, timedelta, timezone
+
+# --- Synthetic Amharic E-commerce Corpus ---
+# Generates Telegram-like message records (same fields as telegram_scraper.py)
+# for benchmarks and equivalence checks, and CoNLL-style labeled sentences
+# following docs/annotation_guideline.md. Output is deterministic for a seed.
+
+PRODUCTS = [
+    "የሴቶች ቦርሳ", "አነሶላ", "የልጆች ቀሚስ", "iPhone 15 Pro Max", "Samsung Galaxy S24 Ultra",
+    "የወንዶች ጫማ", "ብርድ ልብስ", "የቡና ማሽን", "ሰዓት", "የፀጉር ማድረቂያ", "ሐበሻ ቀሚስ",
+    "ጸሃይ መነጽር", "ኤሌክትሪክ ምድጃ", "የሕፃናት ጠርሙስ", "ኮምፒውተር ቦርሳ",
+]
+LOCATIONS = ["አዲስ አበባ", "ቦሌ", "ፒያሳ", "መገናኛ", "ሰሚት", "ጀሞ", "ሐዋሳ", "አዳማ", "ባሕር ዳር"]
+FILLERS = [
+    "ዋጋው", "ዋጋ", "አድራሻ", "ይደውሉ", "በጣም", "ጥራት", "ያለው", "አዲስ", "እቃ", "ነው",
+    "እና", "ለማዘዝ", "ኦሪጅናል", "በቅናሽ", "ዛሬ", "ብቻ", "ሁሉም", "ከ", "የ", "ውስጥ",
+    "ሐሙስ", "ኀይል", "ሠላም", "ዐይን", "ጸጋ", "ፀሐይ", "ሀገር", "ኸረ", "Delivery", "FREE",
+]
+PUNCTUATION = ["።", "፡", "፣", "፤", "!", "?", ".", ",", "-", ":", "(", ")", "«", "»", "/", "#", "@", "}~]", "*", "~"]
+EMOJIS = ["\U0001F600", "\U0001F525", "\U0001F4E6", "\U0001F69A", "\U0001F1EA\U0001F1F9", "✅", "❤"]
+WHITESPACE = [" ", " ", " ", "  ", "\n", "\t", " "]
+GEEZ_DIGITS = "፩፪፫፬፭፮፯፰፱፲"
+
+
+def _price(rng):
+    value = rng.choice([350, 500, 1200, 2500, 4800, 15000, 70000])
+    style = rng.randrange(5)
+    if style == 0:
+        return f"{value} ብር"
+    if style == 1:
+        return f"ዋጋ {value:,} ብር"
+    if style == 2:
+        return f"{value // 1000 or 1} ሺህ ብር"
+    if style == 3:
+        return f"{value}ETB"
+    return f"{rng.choice(GEEZ_DIGITS)} ሺህ ብር"
+
+
+def _phone(rng):
+    number = f"09{rng.randrange(10**8):08d}"
+    return rng.choice([number, f"+251{number[1:]}", f"{number[:4]} {number[4:7]} {number[7:]}"])
+
+
+def generate_message_text(rng):
+    """Builds one synthetic message mixing products, prices, locations, noise and emojis."""
+    parts = [rng.choice(PRODUCTS), _price(rng), rng.choice(LOCATIONS), _phone(rng)]
+    parts += [rng.choice(FILLERS) for _ in range(rng.randrange(3, 25))]
+    parts += [rng.choice(PUNCTUATION) for _ in range(rng.randrange(0, 6))]
+    parts += [rng.choice(EMOJIS) for _ in range(rng.randrange(0, 4))]
+    rng.shuffle(parts)
+    text = ''.join(part + rng.choice(WHITESPACE) for part in parts)
+    # Occasionally pad with leading/trailing whitespace or return an empty message
+    if rng.random() < 0.05:
+        return ""
+    return rng.choice(["", " ", "\n"]) + text + rng.choice(["", " ", "\n\n"])
+
+
+def generate_messages(num_messages, seed=42, num_channels=9, start_date=None):
+    """Yields `num_messages` synthetic message records in scraper format."""
+    rng = random.Random(seed)
+    start_date = start_date or datetime(2024, 1, 1, tzinfo=timezone.utc)
+    channel_ids = [1000000 + i for i in range(num_channels)]
+    next_ids = {channel_id: 1 for channel_id in channel_ids}
+    for i in range(num_messages):
+        channel_id = channel_ids[i % num_channels]
+        message_id = next_ids[channel_id]
+        next_ids[channel_id] += 1
+        yield {
+            'id': message_id,
+            'channel_id': channel_id,
+            'channel_name': f"Synthetic Shop {channel_id - 1000000}",
+            'date': (start_date + timedelta(minutes=17 * i)).isoformat(),
+            'sender_id': None,
+            'message': generate_message_text(rng),
+            'views': rng.randrange(0, 20000),
+            'forwards': rng.randrange(0, 50),
+            'replies_count': 0,
+            'media_type': rng.choice([None, 'Photo']),
+            'file_name': None,
+            'file_path': None
+        }
+
+
+def generate_texts(num_messages, seed=42):
+    """Returns a list of synthetic message texts only."""
+    return [record['message'] for record in generate_messages(num_messages, seed=seed)]
+
+
+def _labeled(words, label):
+    return [(word, f"{'B' if i == 0 else 'I'}-{label}") for i, word in enumerate(words)]
+
+
+def _labeled_price(rng):
+    """Price tokens and tags; a 'ዋጋ' prefix is O, amount and currency are PRICE."""
+    words = _price(rng).split()
+    if words[0] == "ዋጋ":
+        return [("ዋጋ", "O")] + _labeled(words[1:], "PRICE")
+    return _labeled(words, "PRICE")
+
+
+def generate_labeled_sentences(num_sentences, seed=42):
+    """Returns {'tokens', 'ner_tags'} dicts like parse_conll_file, with PRODUCT, PRICE and LOC tagged."""
+    rng = random.Random(seed)
+    sentences = []
+    for _ in range(num_sentences):
+        parts = [_labeled(rng.choice(PRODUCTS).split(), "PRODUCT"), _labeled(rng.choice(LOCATIONS).split(), "LOC"),
+                 [(word, "O") for word in _phone(rng).split()]]
+        parts += [_labeled_price(rng) for _ in range(rng.choice([0, 1, 1, 1, 2]))]
+        parts += [[(rng.choice(FILLERS), "O")] for _ in range(rng.randrange(2, 12))]
+        rng.shuffle(parts)
+        pairs = [pair for part in parts for pair in part]
+        sentences.append({'tokens': [word for word, _ in pairs], 'ner_tags': [tag for _, tag in pairs]})
+    return sentences
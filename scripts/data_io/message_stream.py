@@ -0,0 +1,211 @@
+# EthioMart_NER_Project/scripts/data_io/message_stream.py
+
+import json
+import os
+
+# --- Streaming Readers/Writers for Message Records ---
+# Message files are either a single JSON array (the historical format written by
+# telegram_scraper.py and amharic_preprocessing.py) or JSONL (one record per line).
+# The helpers below read and write both formats one record at a time, so memory
+# stays constant regardless of file size. Paths ending in `.parquet` (or existing
+# directories) are partitioned Parquet datasets, handled by parquet_store.py.
+
+READ_CHUNK_SIZE = 1 << 16 # Characters read per refill of the incremental JSON parser
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+_NUMBER_CHARS = frozenset('0123456789+-.eE')
+
+
+def iter_json_array(f, chunk_size=READ_CHUNK_SIZE):
+    """Incrementally parses a top-level JSON array from a text file object.
+
+    Yields one decoded element at a time while keeping only a small read buffer
+    in memory. Raises json.JSONDecodeError on malformed input.
+    """
+    buffer = f.read(chunk_size)
+    eof = not buffer
+    pos = 0
+
+    def refill(buffer, pos):
+        more = f.read(chunk_size)
+        return buffer[pos:] + more, 0, not more
+
+    # Skip leading whitespace and expect '['
+    while True:
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+            pos += 1
+        if pos < len(buffer) or eof:
+            break
+        buffer, pos, eof = refill(buffer, pos)
+    if pos >= len(buffer) or buffer[pos] != '[':
+        raise json.JSONDecodeError("Expecting '['", buffer, pos)
+    pos += 1
+
+    expect_value = True # True right after '[' or ','
+    first = True
+    while True:
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+            pos += 1
+        if pos >= len(buffer):
+            if eof:
+                raise json.JSONDecodeError("Unterminated array", buffer, pos)
+            buffer, pos, eof = refill(buffer, pos)
+            continue
+
+        char = buffer[pos]
+        if char == ']' and (first or not expect_value):
+            return
+        if not expect_value:
+            if char != ',':
+                raise json.JSONDecodeError("Expecting ',' delimiter", buffer, pos)
+            pos += 1
+            expect_value = True
+            continue
+
+        try:
+            value, end = _decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            buffer, pos, eof = refill(buffer, pos)
+            continue
+        # A scalar ending at the buffer edge may continue in the next chunk; a number
+        # cut inside ('1.', '1.5e', '-') decodes as a shorter prefix, so also refill
+        # while only number characters follow the decoded value
+        if not eof and all(char in _NUMBER_CHARS for char in buffer[end:]):
+            buffer, pos, eof = refill(buffer, pos)
+            continue
+
+        yield value
+        pos = end
+        expect_value = False
+        first = False
+        # Drop consumed text so the buffer does not grow with the file
+        if pos > chunk_size:
+            buffer, pos = buffer[pos:], 0
+
+
+def iter_jsonl(f):
+    """Yields one decoded record per non-blank line of a JSONL file object."""
+    for line in f:
+        if line.strip():
+            yield json.loads(line)
+
+
+def _detect_json_array(f):
+    """Peeks at the first non-whitespace character; True for a JSON array."""
+    start = f.tell()
+    while True:
+        char = f.read(1)
+        if not char or char not in _WHITESPACE:
+            break
+    f.seek(start)
+    return char == '['
+
+
+def is_json_array_file(path):
+    """True if the file holds a single JSON array rather than JSONL."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return _detect_json_array(f)
+
+
+def is_parquet_path(path):
+    """True for a `.parquet` path or an existing directory (a Parquet dataset)."""
+    return path.endswith('.parquet') or os.path.isdir(path)
+
+
+def iter_records(path):
+    """Streams message records from a JSON-array, JSONL or Parquet source, auto-detecting the format."""
+    if is_parquet_path(path):
+        from scripts.data_io.parquet_store import iter_parquet_records
+        yield from iter_parquet_records(path)
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        if _detect_json_array(f):
+            yield from iter_json_array(f)
+        else:
+            yield from iter_jsonl(f)
+
+
+def iter_jsonl_lines(path):
+    """Yields the raw, undecoded non-blank lines of a JSONL file.
+
+    Lets callers hand decoding off to worker processes instead of paying for
+    json.loads (and pickling the decoded dict) in the reading process.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield line
+
+
+def serialize_jsonl_record(record):
+    """Serializes a record as one JSONL line (without the newline)."""
+    return json.dumps(record, ensure_ascii=False)
+
+
+def serialize_json_array_record(record):
+    """Serializes a record as an element of an indent=4 JSON array."""
+    # Strings are escaped by json.dumps, so every '\n' is a structural line break
+    return json.dumps(record, ensure_ascii=False, indent=4).replace('\n', '\n    ')
+
+
+class JsonlRecordWriter:
+    """Writes one JSON record per line."""
+
+    serialize = staticmethod(serialize_jsonl_record)
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._f = open(path, 'w', encoding='utf-8')
+
+    def write(self, record):
+        self.write_serialized(self.serialize(record))
+
+    def write_serialized(self, text):
+        """Writes a record already produced by `self.serialize`."""
+        self._f.write(text)
+        self._f.write('\n')
+        self.count += 1
+
+    def close(self):
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class JsonArrayRecordWriter(JsonlRecordWriter):
+    """Writes records incrementally as one JSON array.
+
+    Output is byte-identical to json.dump(records, f, ensure_ascii=False, indent=4),
+    so downstream consumers of the historical format are unaffected.
+    """
+
+    serialize = staticmethod(serialize_json_array_record)
+
+    def write_serialized(self, text):
+        self._f.write(',\n    ' if self.count else '[\n    ')
+        self._f.write(text)
+        self.count += 1
+
+    def close(self):
+        if not self._f.closed:
+            self._f.write('\n]' if self.count else '[]')
+        super().close()
+
+
+def open_record_writer(path):
+    """Returns a Parquet dataset writer for `.parquet` paths, a JSONL writer for
+    `.jsonl` paths and a JSON-array writer otherwise."""
+    if path.endswith('.parquet'):
+        from scripts.data_io.parquet_store import ParquetMessageWriter
+        return ParquetMessageWriter(path)
+    if path.endswith('.jsonl'):
+        return JsonlRecordWriter(path)
+    return JsonArrayRecordWriter(path)
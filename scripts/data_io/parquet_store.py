@@ -0,0 +1,229 @@
+# EthioMart_NER_Project/scripts/data_io/parquet_store.py
+
+import argparse
+import os
+import shutil
+import sys
+import uuid
+from datetime import datetime, timezone
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+# Add the project root to the Python path to import config
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import config # Import configuration from config.py
+
+# --- Columnar Message Storage (Parquet) ---
+# Message records stored as a Hive-partitioned Parquet dataset:
+#   <root>/channel_id=<id>/month=<YYYY-MM>/part-*.parquet
+# Readers load only the columns they ask for (projection pushdown) and skip
+# whole channel/month directories that a filter excludes (partition pruning).
+#
+# Every dataset uses MESSAGE_SCHEMA, whatever stage wrote it; fields a stage does
+# not produce (e.g. cleaned_text in raw scraper output) are null. Records read
+# back come grouped by channel and month rather than in the original file order.
+
+RAW_PARQUET_DATASET = os.path.join(config.PREPROCESSED_DATA_DIR, config.RAW_MESSAGES_PARQUET)
+PREPROCESSED_PARQUET_DATASET = os.path.join(config.PREPROCESSED_DATA_DIR, config.PREPROCESSED_MESSAGES_PARQUET)
+
+PARTITION_SCHEMA = pa.schema([
+    ('channel_id', pa.int64()),
+    ('month', pa.string()) # 'YYYY-MM' of the message date in UTC
+])
+MESSAGE_SCHEMA = pa.schema([
+    ('id', pa.int64()),
+    ('channel_name', pa.string()),
+    ('date', pa.timestamp('us', tz='UTC')),
+    ('sender_id', pa.int64()),
+    ('message', pa.string()),
+    ('views', pa.int64()),
+    ('forwards', pa.int64()),
+    ('replies_count', pa.int64()),
+    ('media_type', pa.string()),
+    ('file_name', pa.string()),
+    ('file_path', pa.string()),
+    ('cleaned_text', pa.string()), # Added by amharic_preprocessing.py
+    ('dup_cluster_id', pa.string()) # Representative's 'channel_id/id', added by near_duplicates.py
+]) # channel_id and month are stored in the partition path
+DATASET_SCHEMA = pa.unify_schemas([MESSAGE_SCHEMA, PARTITION_SCHEMA])
+# Key order of records read back, matching the scraper's records
+RECORD_FIELDS = ['id', 'channel_id'] + [name for name in MESSAGE_SCHEMA.names if name != 'id']
+# Columns left out of records read back when null, so raw records round-trip unchanged
+OPTIONAL_FIELDS = ('cleaned_text', 'dup_cluster_id')
+UNKNOWN_MONTH = 'unknown'
+DEFAULT_ROWS_PER_FLUSH = 100000
+_PARTITIONING = ds.partitioning(PARTITION_SCHEMA, flavor='hive')
+
+
+def _parse_date(value):
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+
+def _month(date):
+    if date is None:
+        return UNKNOWN_MONTH
+    if date.tzinfo is not None:
+        date = date.astimezone(timezone.utc)
+    return f"{date.year:04d}-{date.month:02d}"
+
+
+def serialize_parquet_record(record):
+    """Records are buffered as-is; columns are built when a batch is flushed."""
+    return record
+
+
+class ParquetMessageWriter:
+    """Writes message records to a partitioned Parquet dataset.
+
+    Same interface as the JSON writers in message_stream.py. Records are
+    buffered and written every `rows_per_flush` records; an existing dataset at
+    `root` is replaced. Fields outside MESSAGE_SCHEMA are not stored.
+    """
+
+    serialize = staticmethod(serialize_parquet_record)
+
+    def __init__(self, root, rows_per_flush=DEFAULT_ROWS_PER_FLUSH):
+        self.root = root
+        self.path = root
+        self.rows_per_flush = rows_per_flush
+        self.count = 0
+        self._buffer = []
+        self._flushes = 0
+        self._prefix = uuid.uuid4().hex[:8]
+        if os.path.isdir(root):
+            shutil.rmtree(root)
+        os.makedirs(root)
+
+    def write(self, record):
+        self.write_serialized(self.serialize(record))
+
+    def write_serialized(self, record):
+        self._buffer.append(record)
+        self.count += 1
+        if len(self._buffer) >= self.rows_per_flush:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        table = records_to_table(self._buffer)
+        self._buffer = []
+        ds.write_dataset(
+            table, self.root, format='parquet', partitioning=_PARTITIONING,
+            basename_template=f"part-{self._prefix}-{self._flushes:05d}-{{i}}.parquet",
+            existing_data_behavior='overwrite_or_ignore'
+        )
+        self._flushes += 1
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def records_to_table(records):
+    """Builds a DATASET_SCHEMA table (message columns plus partition keys) from records."""
+    columns = {name: [] for name in DATASET_SCHEMA.names}
+    for record in records:
+        date = _parse_date(record.get('date'))
+        for name in MESSAGE_SCHEMA.names:
+            columns[name].append(record.get(name))
+        columns['date'][-1] = date
+        columns['channel_id'].append(record.get('channel_id'))
+        columns['month'].append(_month(date))
+    return pa.table(columns, schema=DATASET_SCHEMA)
+
+
+def open_dataset(root):
+    return ds.dataset(root, format='parquet', partitioning=_PARTITIONING, schema=DATASET_SCHEMA)
+
+
+def build_filter(channel_ids=None, months=None, start_month=None, end_month=None):
+    """Partition filter for the given channels and months ('YYYY-MM', inclusive range)."""
+    conditions = []
+    if channel_ids is not None:
+        conditions.append(ds.field('channel_id').isin([int(c) for c in channel_ids]))
+    if months is not None:
+        conditions.append(ds.field('month').isin(list(months)))
+    if start_month is not None:
+        conditions.append(ds.field('month') >= start_month)
+    if end_month is not None:
+        conditions.append(ds.field('month') <= end_month)
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+def read_messages(root, columns=None, channel_ids=None, months=None, start_month=None, end_month=None):
+    """Loads a pyarrow Table with only `columns`, from only the matching partitions.
+
+    Args:
+        root: Dataset directory.
+        columns: Column names to load (default: all, including channel_id and month).
+        channel_ids: Only these channels.
+        months / start_month / end_month: Only these 'YYYY-MM' months, or an
+            inclusive range of them.
+    """
+    dataset = open_dataset(root)
+    return dataset.to_table(columns=columns, filter=build_filter(channel_ids, months, start_month, end_month))
+
+
+def read_messages_df(root, columns=None, **filters):
+    """read_messages as a pandas DataFrame."""
+    return read_messages(root, columns=columns, **filters).to_pandas()
+
+
+def iter_parquet_records(root, columns=None, batch_size=10000, **filters):
+    """Streams records (dicts in the JSON record format) batch by batch."""
+    dataset = open_dataset(root)
+    scanner = dataset.scanner(columns=columns, filter=build_filter(**filters), batch_size=batch_size)
+    for batch in scanner.to_batches():
+        for row in batch.to_pylist():
+            row = {name: row[name] for name in RECORD_FIELDS if name in row}
+            if row.get('date') is not None:
+                row['date'] = row['date'].isoformat()
+            for name in OPTIONAL_FIELDS:
+                if name in row and row[name] is None:
+                    del row[name]
+            yield row
+
+
+def convert_json_to_parquet(input_file, output_root, rows_per_flush=DEFAULT_ROWS_PER_FLUSH):
+    """One-time conversion of a JSON-array or JSONL message file to a Parquet dataset."""
+    from scripts.data_io.message_stream import iter_records
+    with ParquetMessageWriter(output_root, rows_per_flush) as writer:
+        for record in iter_records(input_file):
+            writer.write(record)
+    return writer.count
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Convert the JSON message files to partitioned Parquet datasets.")
+    parser.add_argument('--input', help="JSON array or JSONL file (default: convert both files from config.py).")
+    parser.add_argument('--output', help="Output dataset directory (required with --input).")
+    args = parser.parse_args()
+
+    if args.input:
+        if not args.output:
+            parser.error("--output is required with --input")
+        pairs = [(args.input, args.output)]
+    else:
+        pairs = [
+            (os.path.join(config.PREPROCESSED_DATA_DIR, config.COMBINED_RAW_MESSAGES_FILE), RAW_PARQUET_DATASET),
+            (os.path.join(config.PREPROCESSED_DATA_DIR, config.PREPROCESSED_MESSAGES_FILE), PREPROCESSED_PARQUET_DATASET)
+        ]
+
+    for input_file, output_root in pairs:
+        if not os.path.exists(input_file):
+            print(f"Skipping '{input_file}': file not found.")
+            continue
+        count = convert_json_to_parquet(input_file, output_root)
+        print(f"Converted {count} messages from {input_file} to {output_root}")
@@ -0,0 +1,244 @@
+# EthioMart_NER_Project/scripts/data_io/token_store.py
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import shutil
+import sys
+import time
+import weakref
+
+import numpy as np
+
+# Add the project root to the Python path to import config
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import config # Import configuration from config.py
+
+# --- Pre-tokenized, Memory-Mapped Token Store ---
+# Tokenizes every cleaned message (or labeled CoNLL sentence) once and keeps the
+# result as flat NumPy arrays on disk, one value per subword token:
+#   <store>/input_ids.bin, attention_mask.bin, special_tokens_mask.bin,
+#   word_ids.bin (-1 for special tokens), offsets.bin ((start, end) pairs),
+#   index.bin (int64 row boundaries, length rows + 1), row_hashes.bin (uint64
+#   hash of each source row), meta.json
+# Arrays are opened with np.memmap, so opening a store costs almost nothing, pages
+# are shared between processes, and a row is a zero-copy slice.
+#
+# Callers find their rows by content (rows_for), so a train/eval split or a batch
+# of messages can use a store built over the whole file, and texts that were not
+# tokenized are caught. meta.json records the tokenizer fingerprint and
+# max_length; readers refuse a store built by another tokenizer or truncation
+# length. meta.json is written last, so a store without it is incomplete.
+
+MESSAGE_TOKEN_STORE = os.path.join(config.TOKEN_STORE_DIR, 'messages')
+LABELED_TOKEN_STORE = os.path.join(config.TOKEN_STORE_DIR, 'labeled')
+PREPROCESSED_JSON_FILE = os.path.join(config.PREPROCESSED_DATA_DIR, config.PREPROCESSED_MESSAGES_FILE)
+TOKEN_ARRAYS = {
+    'input_ids': np.int32,
+    'attention_mask': np.uint8,
+    'special_tokens_mask': np.uint8,
+    'word_ids': np.int32,
+    'offsets': np.int32, # Two values per token
+}
+DEFAULT_MAX_LENGTH = 512 # XLM-R's position limit, the same cap as NerInferenceEngine.max_length
+DEFAULT_CHUNK_SIZE = 10000 # Rows tokenized per tokenizer call
+
+
+_fingerprints = weakref.WeakKeyDictionary() # Serializing a 250k-entry vocabulary takes about a second
+
+
+def tokenizer_fingerprint(tokenizer):
+    """sha256 of everything that decides the tokenizer's output ids."""
+    if tokenizer not in _fingerprints:
+        digest = hashlib.sha256(type(tokenizer).__name__.encode('utf-8'))
+        digest.update(tokenizer.backend_tokenizer.to_str().encode('utf-8'))
+        digest.update(json.dumps(tokenizer.special_tokens_map, sort_keys=True).encode('utf-8'))
+        _fingerprints[tokenizer] = digest.hexdigest()
+    return _fingerprints[tokenizer]
+
+
+def row_hash(item):
+    """64-bit hash of one source row (a text or a list of words)."""
+    item = item or ''
+    data = (item if isinstance(item, str) else '\t'.join(item)).encode('utf-8')
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little')
+
+
+def build_token_store(path, items, tokenizer, max_length=DEFAULT_MAX_LENGTH, is_split_into_words=False,
+                      chunk_size=DEFAULT_CHUNK_SIZE):
+    """Tokenizes `items` in chunks and writes them to a token store at `path`.
+
+    Args:
+        items: Iterable of texts, or of word lists with is_split_into_words=True
+            (e.g. CoNLL 'tokens'). Streamed, so memory does not grow with the input.
+        max_length: Truncation length; readers must use the same one.
+
+    Returns:
+        The opened TokenStore.
+    """
+    tmp_path = path + '.tmp'
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    files = {name: open(os.path.join(tmp_path, f"{name}.bin"), 'wb') for name in list(TOKEN_ARRAYS) + ['row_hashes']}
+    boundaries = [np.zeros(1, dtype=np.int64)]
+    num_rows = num_tokens = 0
+    iterator = iter(items)
+    try:
+        while True:
+            chunk = [item or ([] if is_split_into_words else "") for item in itertools.islice(iterator, chunk_size)]
+            if not chunk:
+                break
+            hashes = np.fromiter((row_hash(item) for item in chunk), dtype=np.uint64, count=len(chunk))
+            files['row_hashes'].write(hashes.tobytes())
+            encoded = tokenizer(
+                chunk, is_split_into_words=is_split_into_words, truncation=True, max_length=max_length,
+                return_offsets_mapping=True, return_special_tokens_mask=True, return_attention_mask=True
+            )
+            lengths = np.fromiter((len(ids) for ids in encoded['input_ids']), dtype=np.int64, count=len(chunk))
+            for name in ('input_ids', 'attention_mask', 'special_tokens_mask'):
+                values = np.fromiter(itertools.chain.from_iterable(encoded[name]), dtype=TOKEN_ARRAYS[name])
+                files[name].write(values.tobytes())
+            word_ids = itertools.chain.from_iterable(encoded.word_ids(i) for i in range(len(chunk)))
+            files['word_ids'].write(np.fromiter((-1 if w is None else w for w in word_ids), dtype=np.int32).tobytes())
+            offsets = itertools.chain.from_iterable(itertools.chain.from_iterable(encoded['offset_mapping']))
+            files['offsets'].write(np.fromiter(offsets, dtype=np.int32).tobytes())
+            boundaries.append(num_tokens + np.cumsum(lengths))
+            num_rows += len(chunk)
+            num_tokens += int(lengths.sum())
+    finally:
+        for f in files.values():
+            f.close()
+
+    np.concatenate(boundaries).tofile(os.path.join(tmp_path, 'index.bin'))
+    meta = {
+        'num_rows': num_rows,
+        'num_tokens': num_tokens,
+        'max_length': max_length,
+        'is_split_into_words': is_split_into_words,
+        'tokenizer': type(tokenizer).__name__,
+        'tokenizer_fingerprint': tokenizer_fingerprint(tokenizer),
+        'dtypes': {name: np.dtype(dtype).name for name, dtype in TOKEN_ARRAYS.items()},
+    }
+    with open(os.path.join(tmp_path, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+    return TokenStore(path)
+
+
+class TokenStore:
+    """Read-only view of a token store; rows are zero-copy slices of memory-mapped arrays."""
+
+    def __init__(self, path):
+        self.path = path
+        meta_path = os.path.join(path, 'meta.json')
+        if not os.path.exists(meta_path):
+            raise FileNotFoundError(f"No complete token store at '{path}' (meta.json missing).")
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.index = np.fromfile(os.path.join(path, 'index.bin'), dtype=np.int64)
+        self.row_hashes = np.fromfile(os.path.join(path, 'row_hashes.bin'), dtype=np.uint64)
+        self._hash_order = self._sorted_hashes = None # Built on the first rows_for call
+        self._arrays = {}
+        for name, dtype in TOKEN_ARRAYS.items():
+            shape = (self.meta['num_tokens'], 2) if name == 'offsets' else (self.meta['num_tokens'],)
+            # np.memmap cannot map an empty file
+            self._arrays[name] = (np.memmap(os.path.join(path, f"{name}.bin"), dtype=dtype, mode='r', shape=shape)
+                                  if self.meta['num_tokens'] else np.zeros(shape, dtype=dtype))
+
+    def __len__(self):
+        return self.meta['num_rows']
+
+    @property
+    def max_length(self):
+        return self.meta['max_length']
+
+    def check(self, tokenizer, max_length=None):
+        """Raises ValueError unless the store was built by this tokenizer (and truncation length)."""
+        if self.meta['tokenizer_fingerprint'] != tokenizer_fingerprint(tokenizer):
+            raise ValueError(f"Token store '{self.path}' was built with a different tokenizer; rebuild it.")
+        if max_length is not None and max_length != self.max_length:
+            raise ValueError(f"Token store '{self.path}' truncates at {self.max_length} tokens, not {max_length}.")
+
+    def rows_for(self, items):
+        """Store row of each text (or word list); ValueError if one was never tokenized into the store."""
+        if self._hash_order is None:
+            self._hash_order = np.argsort(self.row_hashes, kind='stable')
+            self._sorted_hashes = self.row_hashes[self._hash_order]
+        hashes = np.fromiter((row_hash(item) for item in items), dtype=np.uint64)
+        if not len(hashes):
+            return np.zeros(0, dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self._sorted_hashes, hashes), len(self) - 1)
+        if len(self) == 0 or not np.array_equal(self._sorted_hashes[positions], hashes):
+            raise ValueError(f"Token store '{self.path}' does not contain every requested row; rebuild it.")
+        return self._hash_order[positions]
+
+    def row_slice(self, row):
+        return slice(int(self.index[row]), int(self.index[row + 1]))
+
+    def get(self, name, row):
+        """One row of one array, e.g. store.get('input_ids', 5)."""
+        return self._arrays[name][self.row_slice(row)]
+
+    def lengths(self, rows=None):
+        lengths = np.diff(self.index)
+        return lengths if rows is None else lengths[np.asarray(rows, dtype=np.int64)]
+
+    def encoding(self, row):
+        """All arrays of one row, in the layout NerInferenceEngine.encode returns."""
+        row_slice = self.row_slice(row)
+        return {
+            'input_ids': self._arrays['input_ids'][row_slice],
+            'attention_mask': self._arrays['attention_mask'][row_slice],
+            'special_tokens_mask': self._arrays['special_tokens_mask'][row_slice],
+            'word_ids': self._arrays['word_ids'][row_slice],
+            'offsets': self._arrays['offsets'][row_slice]
+        }
+
+
+def open_or_build_token_store(path, items, tokenizer, max_length=DEFAULT_MAX_LENGTH, is_split_into_words=False):
+    """Opens the store at `path`, rebuilding it when missing, built differently or lacking some of `items`.
+
+    `items` must be re-iterable, e.g. a list or an object whose __iter__ restarts
+    a file stream (it is looked up, then possibly tokenized).
+    """
+    try:
+        store = TokenStore(path)
+        store.check(tokenizer, max_length)
+        if store.meta['is_split_into_words'] == is_split_into_words:
+            store.rows_for(items)
+            return store
+    except (FileNotFoundError, ValueError):
+        pass
+    return build_token_store(path, items, tokenizer, max_length, is_split_into_words)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Tokenize cleaned messages or labeled CoNLL data once into a memory-mapped token store.")
+    parser.add_argument('--input', default=PREPROCESSED_JSON_FILE, help="Preprocessed messages (JSON, JSONL or Parquet dataset).")
+    parser.add_argument('--conll', help="Build the training store from this labeled CoNLL file instead.")
+    parser.add_argument('--output', help=f"Store directory (default: {MESSAGE_TOKEN_STORE}, or {LABELED_TOKEN_STORE} with --conll).")
+    parser.add_argument('--model-dir', default=None, help="Adapter/model directory whose tokenizer is used (default: config.NER_MODEL_DIR).")
+    parser.add_argument('--base-model', default=None, help="Base model name/path (defaults to the adapter's base model).")
+    parser.add_argument('--max-length', type=int, default=DEFAULT_MAX_LENGTH)
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    from scripts.inference.ner_inference import NER_MODEL_DIR, load_tokenizer
+    tokenizer = load_tokenizer(args.model_dir or NER_MODEL_DIR, args.base_model)
+    start_time = time.perf_counter()
+    if args.conll:
+        from scripts.model_training.conll_data import parse_conll_file
+        output = args.output or LABELED_TOKEN_STORE
+        items = [sentence['tokens'] for sentence in parse_conll_file(args.conll)]
+        store = build_token_store(output, items, tokenizer, args.max_length, is_split_into_words=True,
+                                  chunk_size=args.chunk_size)
+    else:
+        from scripts.data_io.message_stream import iter_records
+        output = args.output or MESSAGE_TOKEN_STORE
+        items = (record.get('cleaned_text') or "" for record in iter_records(args.input))
+        store = build_token_store(output, items, tokenizer, args.max_length, chunk_size=args.chunk_size)
+    print(f"Tokenized {len(store):,} rows ({store.meta['num_tokens']:,} tokens) into {output} "
+          f"in {time.perf_counter() - start_time:.1f}s.")
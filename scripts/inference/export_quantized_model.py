@@ -0,0 +1,154 @@
+# EthioMart_NER_Project/scripts/inference/export_quantized_model.py
+
+import argparse
+import json
+import os
+import sys
+import warnings
+
+import torch
+from safetensors import safe_open
+from safetensors.torch import save_file
+from torch.ao.nn.quantized.dynamic import Linear as DynamicQuantizedLinear
+from torch.ao.quantization import quantize_dynamic
+from transformers import AutoConfig, AutoModelForTokenClassification, AutoTokenizer
+
+# Add the project root to the Python path to import project modules
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+sys.path.insert(0, PROJECT_ROOT)
+import config # Import configuration from config.py
+from scripts.inference.ner_inference import NER_MODEL_DIR, load_ner_model
+
+try:
+    from transformers.initialization import no_init_weights
+except ImportError: # transformers < 5
+    from transformers.modeling_utils import no_init_weights
+
+# torch.ao dynamic quantization is deprecated in favour of torchao, which is not a
+# dependency of this project; it still works, so keep its notices out of the output
+warnings.filterwarnings('ignore', message='torch.ao.quantization is deprecated')
+warnings.filterwarnings('ignore', message='torch.quantize_per_tensor')
+
+# --- Merged, int8-Quantized CPU Model ---
+# Folds the LoRA adapter into the base weights (merge_and_unload), applies dynamic
+# int8 quantization to every nn.Linear and saves the result as one standalone
+# safetensors file plus config and tokenizer. Loading it needs neither PEFT nor
+# the base model download.
+#
+# Quantized linears are stored as plain tensors so safetensors can hold them:
+#   <module>.weight_int8        int8 weight (per-tensor affine)
+#   <module>.weight_scale       float64 scalar
+#   <module>.weight_zero_point  int64 scalar
+#   <module>.bias               float32 (if the layer has a bias)
+# Every other parameter/buffer (embeddings, LayerNorm) is kept in float32.
+
+QUANTIZED_NER_MODEL_DIR = os.path.join(PROJECT_ROOT, config.QUANTIZED_NER_MODEL_DIR)
+WEIGHTS_NAME = 'model_int8.safetensors'
+FORMAT_NAME = 'dynamic_int8'
+
+
+def merge_adapter(adapter_dir=NER_MODEL_DIR, base_model=None, label_names=None):
+    """Loads base model + LoRA adapter and merges the adapter into the base weights."""
+    model, tokenizer = load_ner_model(adapter_dir, base_model, label_names)
+    model = model.merge_and_unload()
+    model.eval()
+    return model, tokenizer
+
+
+def quantize_model(model):
+    """Applies dynamic int8 quantization to all nn.Linear layers."""
+    return quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def quantized_state_dict(model):
+    """Flattens a dynamically quantized model into safetensors-compatible tensors."""
+    tensors = {}
+    quantized_prefixes = []
+    for name, module in model.named_modules():
+        if isinstance(module, DynamicQuantizedLinear):
+            weight, bias = module._weight_bias()
+            tensors[f"{name}.weight_int8"] = weight.int_repr().contiguous()
+            tensors[f"{name}.weight_scale"] = torch.tensor(weight.q_scale(), dtype=torch.float64)
+            tensors[f"{name}.weight_zero_point"] = torch.tensor(weight.q_zero_point(), dtype=torch.int64)
+            if bias is not None:
+                tensors[f"{name}.bias"] = bias.detach().contiguous()
+            quantized_prefixes.append(name + '.')
+    for key, value in model.state_dict().items():
+        if not any(key.startswith(prefix) for prefix in quantized_prefixes):
+            tensors[key] = value.detach().contiguous()
+    return tensors
+
+
+def export_quantized_model(adapter_dir=NER_MODEL_DIR, output_dir=QUANTIZED_NER_MODEL_DIR, base_model=None, label_names=None):
+    """Merges, quantizes and saves the NER model; returns the output directory."""
+    model, tokenizer = merge_adapter(adapter_dir, base_model, label_names)
+    model = quantize_model(model)
+    os.makedirs(output_dir, exist_ok=True)
+    save_file(quantized_state_dict(model), os.path.join(output_dir, WEIGHTS_NAME),
+              metadata={'format': 'pt', 'quantization': FORMAT_NAME})
+    model.config.save_pretrained(output_dir)
+    tokenizer.save_pretrained(output_dir)
+    return output_dir
+
+
+def load_quantized_model(model_dir=QUANTIZED_NER_MODEL_DIR):
+    """Rebuilds the int8 model from its config and saved tensors.
+
+    Returns:
+        (model, tokenizer), with the model in eval mode.
+    """
+    model_config = AutoConfig.from_pretrained(model_dir)
+    with no_init_weights():
+        model = AutoModelForTokenClassification.from_config(model_config)
+
+    with safe_open(os.path.join(model_dir, WEIGHTS_NAME), framework='pt') as f:
+        if f.metadata().get('quantization') != FORMAT_NAME:
+            raise ValueError(f"{model_dir} does not contain a {FORMAT_NAME} model.")
+        tensors = {key: f.get_tensor(key) for key in f.keys()}
+
+    # Load the float tensors first, then swap each stored linear for a quantized
+    # one holding its saved int8 weight
+    quantized_names = [key[:-len('.weight_int8')] for key in tensors if key.endswith('.weight_int8')]
+    quantized = {}
+    for name in quantized_names:
+        quantized[name] = (
+            tensors.pop(f"{name}.weight_int8"),
+            float(tensors.pop(f"{name}.weight_scale")),
+            int(tensors.pop(f"{name}.weight_zero_point")),
+            tensors.pop(f"{name}.bias", None)
+        )
+    missing, unexpected = model.load_state_dict(tensors, strict=False)
+    missing = [key for key in missing if key.rpartition('.')[0] not in quantized]
+    if missing or unexpected:
+        raise ValueError(f"Quantized weights do not match the model config (missing: {missing}, unexpected: {unexpected}).")
+
+    for name, (weight_int8, scale, zero_point, bias) in quantized.items():
+        parent_name, _, child_name = name.rpartition('.')
+        parent = model.get_submodule(parent_name)
+        linear = getattr(parent, child_name)
+        quantized_linear = DynamicQuantizedLinear(linear.in_features, linear.out_features,
+                                                  bias_=linear.bias is not None, dtype=torch.qint8)
+        quantized_linear.set_weight_bias(torch._make_per_tensor_quantized_tensor(weight_int8, scale, zero_point), bias)
+        setattr(parent, child_name, quantized_linear)
+    model.eval()
+    return model, AutoTokenizer.from_pretrained(model_dir)
+
+
+def directory_size(path):
+    """Total size in bytes of the files in a directory."""
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path)
+               if os.path.isfile(os.path.join(path, name)))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Merge the LoRA adapter and export an int8-quantized CPU model.")
+    parser.add_argument('--adapter-dir', default=NER_MODEL_DIR)
+    parser.add_argument('--base-model', default=None, help="Base model name/path (defaults to the adapter's base model).")
+    parser.add_argument('--output-dir', default=QUANTIZED_NER_MODEL_DIR)
+    args = parser.parse_args()
+
+    print(f"Merging {args.adapter_dir} into its base model and quantizing linear layers to int8...")
+    output_dir = export_quantized_model(args.adapter_dir, args.output_dir, args.base_model)
+    with open(os.path.join(output_dir, 'config.json'), 'r', encoding='utf-8') as f:
+        num_labels = len(json.load(f)['id2label'])
+    print(f"Saved quantized model ({num_labels} labels, {directory_size(output_dir) / 1e6:.1f} MB) to {output_dir}")
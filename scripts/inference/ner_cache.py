@@ -0,0 +1,297 @@
+# EthioMart_NER_Project/scripts/inference/ner_cache.py
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# Add the project root to the Python path to import config
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+sys.path.insert(0, PROJECT_ROOT)
+import config # Import configuration from config.py
+from scripts.profiling import instrumentation
+
+# --- Content-Hash NER Result Cache ---
+# Channels repost the same ad text over and over, so entities are cached on disk
+# (SQLite) keyed by sha256(model fingerprint + whitespace-normalized text), with an
+# in-process LRU in front for hot items. Only cache misses reach the model.
+#
+# The fingerprint hashes the model weights and config (adapter_model.safetensors
+# and adapter_config.json for the LoRA adapter) and is part of every key, so
+# entries of different models (e.g. fp32 and --quantized runs) live side by side.
+# Each row records when it was last stored or read from disk; opening and closing
+# the cache evict rows unused for `max_age_days` and then the least recently used
+# rows beyond `max_entries`.
+
+NER_CACHE_DB = config.NER_CACHE_DB
+DEFAULT_LRU_SIZE = 50000
+DEFAULT_MAX_ENTRIES = 1000000 # Rows kept on disk, across all model fingerprints
+DEFAULT_MAX_AGE_DAYS = 90
+# Files whose bytes identify a model directory, in hashing order
+FINGERPRINT_FILES = (
+    'adapter_model.safetensors', 'adapter_config.json', # LoRA adapter
+    'model_int8.safetensors', 'config.json' # Merged int8 export
+)
+_SQLITE_BATCH = 500 # Stays under SQLite's bound-parameter limit
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ner_results (
+    key TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    entities TEXT NOT NULL,
+    inference_seconds REAL NOT NULL,
+    last_used REAL NOT NULL DEFAULT 0
+)
+"""
+_INDEX = "CREATE INDEX IF NOT EXISTS ner_results_last_used ON ner_results (last_used)"
+
+
+def model_fingerprint(model_dir):
+    """sha256 over the weight and config files of a model directory."""
+    digest = hashlib.sha256()
+    found = False
+    for name in FINGERPRINT_FILES:
+        path = os.path.join(model_dir, name)
+        if not os.path.exists(path):
+            continue
+        found = True
+        digest.update(name.encode('utf-8') + b'\0')
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    if not found:
+        raise FileNotFoundError(f"No model weights found in {model_dir} to fingerprint.")
+    return digest.hexdigest()
+
+
+def normalize_for_cache(text):
+    """Collapses runs of whitespace so reposts that differ only in spacing share an entry."""
+    return ' '.join((text or "").split())
+
+
+def original_positions(text):
+    """Index in `text` of every character of normalize_for_cache(text); a collapsed
+    whitespace run maps to the character before it."""
+    positions = []
+    for match in re.finditer(r'\S+', text or ""):
+        if positions:
+            positions.append(match.start() - 1)
+        positions.extend(range(match.start(), match.end()))
+    return positions
+
+
+def to_original_offsets(text, normalized, entities):
+    """Copies of `entities` (spans of `normalized`) with start/end/word mapped back to `text`."""
+    if text == normalized:
+        return entities
+    positions = original_positions(text)
+    mapped = []
+    for entity in entities:
+        start, end = positions[entity['start']], positions[entity['end'] - 1] + 1
+        mapped.append(dict(entity, start=start, end=end, word=text[start:end]))
+    return mapped
+
+
+def cache_key(fingerprint, normalized_text):
+    return hashlib.sha256(f"{fingerprint}\0{normalized_text}".encode('utf-8')).hexdigest()
+
+
+class NerResultCache:
+    """SQLite-backed entity cache with an in-memory LRU layer; safe to share between threads."""
+
+    def __init__(self, db_path, fingerprint, lru_size=DEFAULT_LRU_SIZE,
+                 max_entries=DEFAULT_MAX_ENTRIES, max_age_days=DEFAULT_MAX_AGE_DAYS):
+        self.db_path = db_path
+        self.fingerprint = fingerprint
+        self.lru_size = lru_size
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self._lru = OrderedDict() # key -> (entities, inference_seconds)
+        self.reset_stats()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # The server opens the cache on the main thread and uses it from its batcher thread
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(_SCHEMA)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(ner_results)")]
+        if 'last_used' not in columns: # Cache written before rows were timestamped
+            self._conn.execute("ALTER TABLE ner_results ADD COLUMN last_used REAL NOT NULL DEFAULT 0")
+            self._conn.execute("UPDATE ner_results SET last_used = ?", (time.time(),))
+        self._conn.execute(_INDEX)
+        self._conn.commit()
+        self._evict()
+
+    def _evict(self):
+        """Deletes rows older than max_age_days, then the least recently used beyond max_entries."""
+        with self._conn:
+            evicted = self._conn.execute(
+                "DELETE FROM ner_results WHERE last_used < ?", (time.time() - self.max_age_days * 86400,)
+            ).rowcount
+            excess = self._conn.execute("SELECT COUNT(*) FROM ner_results").fetchone()[0] - self.max_entries
+            if excess > 0:
+                evicted += self._conn.execute(
+                    "DELETE FROM ner_results WHERE key IN "
+                    "(SELECT key FROM ner_results ORDER BY last_used LIMIT ?)", (excess,)
+                ).rowcount
+        if evicted:
+            print(f"NER cache: evicted {evicted} old entries.")
+
+    def reset_stats(self):
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.time_saved = 0.0 # Sum of the original inference time of every hit
+
+    def _remember(self, key, value):
+        self._lru[key] = value
+        self._lru.move_to_end(key)
+        if len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    @instrumentation.timed('ner_cache.get_many')
+    def get_many(self, keys):
+        """Returns {key: entities} for the keys that are cached; updates hit/miss stats."""
+        with self._lock:
+            found = {}
+            pending = []
+            for key in keys:
+                value = self._lru.get(key)
+                if value is None:
+                    pending.append(key)
+                else:
+                    self._lru.move_to_end(key)
+                    found[key] = value
+                    self.memory_hits += 1
+            unique_pending = list(dict.fromkeys(pending))
+            from_disk = {}
+            for start in range(0, len(unique_pending), _SQLITE_BATCH):
+                batch = unique_pending[start:start + _SQLITE_BATCH]
+                rows = self._conn.execute(
+                    f"SELECT key, entities, inference_seconds FROM ner_results WHERE key IN ({','.join('?' * len(batch))})",
+                    batch
+                )
+                for key, entities, seconds in rows:
+                    from_disk[key] = (json.loads(entities), seconds)
+            if from_disk:
+                # Only disk reads refresh last_used; LRU hits were refreshed when loaded
+                now = time.time()
+                with self._conn:
+                    self._conn.executemany("UPDATE ner_results SET last_used = ? WHERE key = ?",
+                                           [(now, key) for key in from_disk])
+            for key in pending:
+                value = from_disk.get(key) or found.get(key)
+                if value is None:
+                    self.misses += 1
+                    continue
+                if key not in found:
+                    self._remember(key, value)
+                    found[key] = value
+                self.disk_hits += 1
+            for key in keys:
+                if key in found:
+                    self.time_saved += found[key][1]
+            return {key: value[0] for key, value in found.items()}
+
+    @instrumentation.timed('ner_cache.put_many')
+    def put_many(self, items):
+        """Stores (key, entities, inference_seconds) tuples."""
+        with self._lock:
+            items = list(items)
+            now = time.time()
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO ner_results (key, fingerprint, entities, inference_seconds, last_used) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [(key, self.fingerprint, json.dumps(entities, ensure_ascii=False), seconds, now)
+                     for key, entities, seconds in items]
+                )
+            for key, entities, seconds in items:
+                self._remember(key, (entities, seconds))
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM ner_results").fetchone()[0]
+
+    def stats(self):
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        hits = self.memory_hits + self.disk_hits
+        return {
+            'lookups': lookups,
+            'hits': hits,
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': hits / lookups if lookups else 0.0,
+            'time_saved_seconds': self.time_saved
+        }
+
+    def close(self):
+        with self._lock:
+            self._evict()
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class CachedNerExtractor:
+    """Runs NerInferenceEngine.extract only on texts the cache has not seen.
+
+    Texts are whitespace-normalized before lookup *and* before inference, so a
+    cached result is exactly what the model would return for the text now.
+    Entity offsets are mapped back to the caller's text before returning (a
+    no-op for cleaned_text, which preprocessing already collapses).
+    """
+
+    def __init__(self, engine, cache):
+        self.engine = engine
+        self.cache = cache
+        self.inferred = 0 # Texts actually run through the model
+        self.inference_seconds = 0.0
+
+    @classmethod
+    def open(cls, engine, model_dir, db_path=NER_CACHE_DB, lru_size=DEFAULT_LRU_SIZE):
+        """Wraps `engine` with a cache fingerprinted from `model_dir`."""
+        return cls(engine, NerResultCache(db_path, model_fingerprint(model_dir), lru_size))
+
+    @instrumentation.timed('ner_cache.extract')
+    def extract(self, texts, batch_size=None, token_store=None):
+        """Entities of every text; misses are sliced from `token_store` (built from the
+        normalized texts) instead of re-tokenized when one is given."""
+        normalized = [normalize_for_cache(text) for text in texts]
+        keys = [cache_key(self.cache.fingerprint, text) for text in normalized]
+        results = self.cache.get_many(keys)
+
+        # Each distinct missing text is inferred once, even if repeated in this call
+        missing = OrderedDict()
+        for key, text in zip(keys, normalized):
+            if key not in results:
+                missing.setdefault(key, text)
+        if missing:
+            start = time.perf_counter()
+            if token_store is None:
+                entities = self.engine.extract(list(missing.values()), batch_size)
+            else:
+                entities = self.engine.extract_pretokenized(list(missing.values()), token_store, batch_size)
+            seconds = time.perf_counter() - start
+            self.inference_seconds += seconds
+            self.inferred += len(missing)
+            per_text = seconds / len(missing)
+            self.cache.put_many((key, found, per_text) for key, found in zip(missing, entities))
+            results.update(zip(missing, entities))
+        return [to_original_offsets(text, normalized_text, results[key])
+                for text, normalized_text, key in zip(texts, normalized, keys)]
+
+    def stats(self):
+        return dict(self.cache.stats(), inferred=self.inferred, inference_seconds=self.inference_seconds)
@@ -0,0 +1,277 @@
+# EthioMart_NER_Project/scripts/inference/ner_inference.py
+
+import json
+import os
+import sys
+import warnings
+
+import numpy as np
+import torch
+from transformers import AutoModelForTokenClassification, AutoTokenizer
+
+# Add the project root to the Python path to import config
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+sys.path.insert(0, PROJECT_ROOT)
+import config # Import configuration from config.py
+from scripts.profiling import instrumentation
+
+# --- Batched NER Inference ---
+# Loads the fine-tuned LoRA adapter once and runs token classification over many
+# texts in length-sorted, padded batches under torch.inference_mode. Entities are
+# decoded here with the same rules as transformers' pipeline("ner",
+# aggregation_strategy="simple"), so results match the per-message pipeline calls
+# used in the notebooks.
+
+NER_MODEL_DIR = os.path.join(PROJECT_ROOT, config.NER_MODEL_DIR)
+LABEL_NAMES = config.LABEL_NAMES
+DEFAULT_BATCH_SIZE = 32
+# Files that make a directory loadable by AutoTokenizer on its own
+TOKENIZER_FILES = ('tokenizer.json', 'sentencepiece.bpe.model', 'vocab.txt')
+
+
+def _adapter_num_labels(adapter_dir):
+    """Reads the classifier head size saved with the adapter (modules_to_save)."""
+    from safetensors import safe_open
+    with safe_open(os.path.join(adapter_dir, 'adapter_model.safetensors'), framework='pt') as f:
+        for key in f.keys():
+            if key.endswith('classifier.weight') or key.endswith('classifier.modules_to_save.default.weight'):
+                return f.get_slice(key).get_shape()[0]
+    return None
+
+
+def resolve_label_names(num_labels, label_names=None):
+    """Uses `label_names` (default config.LABEL_NAMES) when it fits the head size."""
+    label_names = list(label_names or LABEL_NAMES)
+    if num_labels is not None and len(label_names) != num_labels:
+        warnings.warn(
+            f"Classifier has {num_labels} outputs but {len(label_names)} label names were given; "
+            f"falling back to generic LABEL_<i> names."
+        )
+        label_names = [f"LABEL_{i}" for i in range(num_labels)]
+    return label_names
+
+
+def load_tokenizer(model_dir, base_model=None):
+    """Loads the tokenizer saved with a model, or the base model's if none was saved.
+
+    For an adapter directory the base model defaults to the adapter's
+    `base_model_name_or_path`.
+    """
+    if any(os.path.exists(os.path.join(model_dir, name)) for name in TOKENIZER_FILES):
+        return AutoTokenizer.from_pretrained(model_dir)
+    adapter_config_path = os.path.join(model_dir, 'adapter_config.json')
+    if base_model is None and os.path.exists(adapter_config_path):
+        with open(adapter_config_path, 'r', encoding='utf-8') as f:
+            base_model = json.load(f).get('base_model_name_or_path')
+    return AutoTokenizer.from_pretrained(base_model or model_dir)
+
+
+def load_ner_model(adapter_dir=NER_MODEL_DIR, base_model=None, label_names=None, device='cpu'):
+    """Loads the base model plus the PEFT LoRA adapter once.
+
+    Args:
+        adapter_dir: Directory with adapter_config.json / adapter_model.safetensors.
+        base_model: Base model name or path; defaults to the adapter's
+            `base_model_name_or_path`.
+        label_names: Label list in classifier order; defaults to config.LABEL_NAMES.
+        device: Torch device to load onto.
+
+    Returns:
+        (model, tokenizer), with the model in eval mode.
+    """
+    from peft import PeftModel
+
+    with open(os.path.join(adapter_dir, 'adapter_config.json'), 'r', encoding='utf-8') as f:
+        adapter_config = json.load(f)
+    base_model = base_model or adapter_config['base_model_name_or_path']
+    label_names = resolve_label_names(_adapter_num_labels(adapter_dir), label_names)
+
+    tokenizer = load_tokenizer(adapter_dir, base_model)
+    model = AutoModelForTokenClassification.from_pretrained(
+        base_model,
+        num_labels=len(label_names),
+        id2label={i: label for i, label in enumerate(label_names)},
+        label2id={label: i for i, label in enumerate(label_names)}
+    )
+    model = PeftModel.from_pretrained(model, adapter_dir)
+    model.to(device)
+    model.eval()
+    return model, tokenizer
+
+
+def _get_tag(entity_name):
+    """Splits 'B-PRICE' into ('B', 'PRICE'); labels without a prefix continue as 'I'."""
+    if entity_name.startswith("B-"):
+        return "B", entity_name[2:]
+    if entity_name.startswith("I-"):
+        return "I", entity_name[2:]
+    return "I", entity_name
+
+
+class NerInferenceEngine:
+    """Batched token-classification inference with pipeline-compatible entity decoding."""
+
+    def __init__(self, model, tokenizer, batch_size=DEFAULT_BATCH_SIZE, max_length=None):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.batch_size = batch_size
+        # The pipeline truncates to the tokenizer's model_max_length; cap it by the
+        # model's position embeddings for tokenizers that leave it unset.
+        model_limit = getattr(model.config, 'max_position_embeddings', None)
+        if model_limit and getattr(model.config, 'model_type', '') in ('xlm-roberta', 'roberta'):
+            model_limit -= 2 # RoBERTa position ids start after the padding index
+        self.max_length = max_length or min(tokenizer.model_max_length, model_limit or tokenizer.model_max_length)
+        self.id2label = model.config.id2label
+        self.device = next(model.parameters()).device
+
+    @classmethod
+    def from_pretrained(cls, adapter_dir=NER_MODEL_DIR, base_model=None, label_names=None, device='cpu', **kwargs):
+        model, tokenizer = load_ner_model(adapter_dir, base_model, label_names, device)
+        return cls(model, tokenizer, **kwargs)
+
+    @classmethod
+    def from_quantized(cls, model_dir=None, **kwargs):
+        """Loads the merged int8 model written by export_quantized_model.py (no PEFT needed)."""
+        from scripts.inference.export_quantized_model import QUANTIZED_NER_MODEL_DIR, load_quantized_model
+        model, tokenizer = load_quantized_model(model_dir or QUANTIZED_NER_MODEL_DIR)
+        return cls(model, tokenizer, **kwargs)
+
+    @instrumentation.timed('ner.encode')
+    def encode(self, texts):
+        """Tokenizes texts without padding.
+
+        Returns one dict per text with 'input_ids', 'offsets' and
+        'special_tokens_mask' lists.
+        """
+        encoded = self.tokenizer(
+            list(texts),
+            truncation=True,
+            max_length=self.max_length,
+            return_offsets_mapping=True,
+            return_special_tokens_mask=True
+        )
+        return [
+            {'input_ids': ids, 'offsets': offsets, 'special_tokens_mask': special}
+            for ids, offsets, special in zip(
+                encoded['input_ids'], encoded['offset_mapping'], encoded['special_tokens_mask']
+            )
+        ]
+
+    def iter_batches(self, lengths, batch_size=None):
+        """Groups indices into batches of similar length (longest first)."""
+        batch_size = batch_size or self.batch_size
+        order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+        for start in range(0, len(order), batch_size):
+            yield order[start:start + batch_size]
+
+    @instrumentation.timed('ner.forward')
+    def forward(self, batch_input_ids):
+        """Runs one padded batch; returns a list of float32 logits arrays, one per sequence."""
+        lengths = [len(ids) for ids in batch_input_ids]
+        max_len = max(lengths)
+        # Padded in NumPy so lists and (read-only, memory-mapped) arrays are both accepted
+        input_ids = np.full((len(batch_input_ids), max_len), self.tokenizer.pad_token_id, dtype=np.int64)
+        attention_mask = np.zeros((len(batch_input_ids), max_len), dtype=np.int64)
+        for row, ids in enumerate(batch_input_ids):
+            input_ids[row, :len(ids)] = ids
+            attention_mask[row, :len(ids)] = 1
+        with torch.inference_mode():
+            logits = self.model(
+                input_ids=torch.from_numpy(input_ids).to(self.device),
+                attention_mask=torch.from_numpy(attention_mask).to(self.device)
+            ).logits
+        logits = logits.to(torch.float32).cpu().numpy()
+        return [logits[row, :length] for row, length in enumerate(lengths)]
+
+    def predict_logits(self, encodings, batch_size=None):
+        """Logits for every encoding, computed in length-bucketed batches, in input order."""
+        results = [None] * len(encodings)
+        for batch in self.iter_batches([len(e['input_ids']) for e in encodings], batch_size):
+            for index, logits in zip(batch, self.forward([encodings[i]['input_ids'] for i in batch])):
+                results[index] = logits
+        return results
+
+    @instrumentation.timed('ner.decode_entities')
+    def decode_entities(self, text, encoding, logits):
+        """Turns token logits into entity groups exactly like aggregation_strategy="simple"."""
+        maxes = np.max(logits, axis=-1, keepdims=True)
+        shifted_exp = np.exp(logits - maxes)
+        scores = shifted_exp / shifted_exp.sum(axis=-1, keepdims=True)
+
+        tokens = self.tokenizer.convert_ids_to_tokens([int(i) for i in encoding['input_ids']])
+        unk_token_id = self.tokenizer.unk_token_id
+        entities = []
+        for idx, token_scores in enumerate(scores):
+            if encoding['special_tokens_mask'][idx]:
+                continue
+            start, end = (int(position) for position in encoding['offsets'][idx])
+            word = tokens[idx]
+            if encoding['input_ids'][idx] == unk_token_id:
+                word = text[start:end]
+            label_idx = int(token_scores.argmax())
+            entities.append({
+                'entity': self.id2label[label_idx],
+                'score': token_scores[label_idx],
+                'word': word,
+                'start': start,
+                'end': end
+            })
+        return [group for group in self._group_entities(entities) if group['entity_group'] != 'O']
+
+    def _group_sub_entities(self, entities):
+        return {
+            'entity_group': entities[0]['entity'].split("-", 1)[-1],
+            'score': float(np.mean(np.nanmean([entity['score'] for entity in entities]))),
+            'word': self.tokenizer.convert_tokens_to_string([entity['word'] for entity in entities]),
+            'start': entities[0]['start'],
+            'end': entities[-1]['end']
+        }
+
+    def _group_entities(self, entities):
+        groups = []
+        current = []
+        for entity in entities:
+            if not current:
+                current.append(entity)
+                continue
+            bi, tag = _get_tag(entity['entity'])
+            _, last_tag = _get_tag(current[-1]['entity'])
+            if tag == last_tag and bi != "B":
+                current.append(entity)
+            else:
+                groups.append(self._group_sub_entities(current))
+                current = [entity]
+        if current:
+            groups.append(self._group_sub_entities(current))
+        return groups
+
+    @instrumentation.timed('ner.extract')
+    def extract(self, texts, batch_size=None):
+        """Extracts entities for every text.
+
+        Returns one list per text of {'entity_group', 'score', 'word', 'start',
+        'end'} dicts, the same shape as pipeline("ner", aggregation_strategy="simple").
+        """
+        texts = [text or "" for text in texts]
+        encodings = self.encode(texts)
+        all_logits = self.predict_logits(encodings, batch_size)
+        return [
+            self.decode_entities(text, encoding, logits)
+            for text, encoding, logits in zip(texts, encodings, all_logits)
+        ]
+
+    @instrumentation.timed('ner.extract_pretokenized')
+    def extract_pretokenized(self, texts, token_store, batch_size=None):
+        """extract() with the token ids, offsets and masks sliced from a TokenStore.
+
+        `token_store` must have been built from these texts (token_store.py) with
+        this tokenizer and max_length; results are identical to extract(texts).
+        """
+        texts = [text or "" for text in texts]
+        token_store.check(self.tokenizer, self.max_length)
+        encodings = [token_store.encoding(row) for row in token_store.rows_for(texts)]
+        all_logits = self.predict_logits(encodings, batch_size)
+        return [
+            self.decode_entities(text, encoding, logits)
+            for text, encoding, logits in zip(texts, encodings, all_logits)
+        ]
@@ -0,0 +1,443 @@
+# EthioMart_NER_Project/scripts/inference/ner_server.py
+
+import argparse
+import json
+import os
+import queue
+import socketserver
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+# Add the project root to the Python path to import config
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+sys.path.insert(0, PROJECT_ROOT)
+import config # Import configuration from config.py
+
+# --- NER Extraction Server ---
+# Long-running HTTP service (TCP or Unix socket) around NerInferenceEngine. The
+# model is loaded once; request handler threads put texts on a bounded queue and
+# one batcher thread drains it into dynamic micro-batches: a batch is run as soon
+# as it holds `max_batch_size` texts or its oldest text has waited `max_wait_ms`.
+#
+# Endpoints:
+#   POST /extract       {"text": "..."} or {"texts": [...]} -> PRODUCT/PRICE/LOC spans
+#   POST /extract/bulk  JSONL in (one record or string per line), JSONL out, streamed
+#   GET  /metrics       queue depth, batch sizes, latency percentiles, throughput
+#   GET  /health
+#
+# Back-pressure: when the queue is full /extract answers 503 with Retry-After
+# straight away, and /extract/bulk stops reading its input until there is room.
+
+NER_SERVER_HOST = config.NER_SERVER_HOST
+NER_SERVER_PORT = config.NER_SERVER_PORT
+ENTITY_GROUPS = ('PRODUCT', 'PRICE', 'LOC')
+DEFAULT_MAX_BATCH_SIZE = 32
+DEFAULT_MAX_WAIT_MS = 10
+DEFAULT_MAX_QUEUE = 1024 # Texts waiting for the model
+BULK_WINDOW = 256 # Bulk records in flight per request
+LATENCY_WINDOW = 10000 # Recent requests kept for latency percentiles
+TEXT_FIELDS = ('text', 'cleaned_text', 'message') # Fields read from bulk JSON records, in order
+
+
+class QueueFull(Exception):
+    """Raised by MicroBatcher.submit when the queue has no room for the texts."""
+
+
+def entity_spans(entities):
+    """PRODUCT/PRICE/LOC entities as JSON-serializable span dicts."""
+    return [
+        {'entity_group': e['entity_group'], 'word': e['word'], 'start': int(e['start']), 'end': int(e['end']),
+         'score': float(e['score'])}
+        for e in entities if e['entity_group'] in ENTITY_GROUPS
+    ]
+
+
+class ServerMetrics:
+    """Thread-safe counters and recent latencies for /metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.requests = 0
+        self.rejected = 0
+        self.texts = 0
+        self.batches = 0
+        self.model_seconds = 0.0
+        self._latencies = deque(maxlen=LATENCY_WINDOW) # (finish time, seconds)
+        self._batch_sizes = deque(maxlen=LATENCY_WINDOW)
+
+    def record_batch(self, size, seconds):
+        with self._lock:
+            self.batches += 1
+            self.texts += size
+            self.model_seconds += seconds
+            self._batch_sizes.append(size)
+
+    def record_request(self, seconds):
+        with self._lock:
+            self.requests += 1
+            self._latencies.append((time.time(), seconds))
+
+    def record_rejected(self):
+        with self._lock:
+            self.rejected += 1
+
+    def snapshot(self, queue_depth=0):
+        with self._lock:
+            latencies = np.array([seconds for _, seconds in self._latencies]) * 1000
+            now = time.time()
+            recent = sum(1 for finished, _ in self._latencies if now - finished <= 60)
+            uptime = now - self.started
+            return {
+                'uptime_seconds': uptime,
+                'requests': self.requests,
+                'rejected': self.rejected,
+                'texts': self.texts,
+                'batches': self.batches,
+                'queue_depth': queue_depth,
+                'mean_batch_size': float(np.mean(self._batch_sizes)) if self._batch_sizes else 0.0,
+                'model_seconds': self.model_seconds,
+                'texts_per_second': self.texts / uptime if uptime else 0.0,
+                'requests_per_second_1m': recent / min(60.0, uptime) if uptime else 0.0,
+                'latency_ms': {
+                    name: float(np.percentile(latencies, q)) if len(latencies) else 0.0
+                    for name, q in (('p50', 50), ('p95', 95), ('p99', 99))
+                }
+            }
+
+
+class MicroBatcher:
+    """Collects texts from many threads into dynamic micro-batches for `extract_fn`.
+
+    `extract_fn(texts)` returns one entity list per text (NerInferenceEngine.extract
+    or CachedNerExtractor.extract).
+    """
+
+    def __init__(self, extract_fn, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS,
+                 max_queue=DEFAULT_MAX_QUEUE, metrics=None):
+        self.extract_fn = extract_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_queue = max_queue
+        self.metrics = metrics or ServerMetrics()
+        # Room is reserved in `_queued` under `_space` before anything is enqueued, so
+        # blocking and all-or-nothing submits can never overfill the queue between them
+        self._queue = queue.Queue()
+        self._queued = 0
+        self._space = threading.Condition()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='ner-batcher', daemon=True)
+        self._thread.start()
+
+    @property
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def submit(self, texts, block=False, timeout=None):
+        """Queues texts; returns one Future per text.
+
+        With block=False all texts are queued or none are (QueueFull). With
+        block=True each text waits for room, up to `timeout` seconds; on QueueFull
+        the texts this call already queued are cancelled unless a batch has
+        taken them.
+        """
+        futures = [Future() for _ in texts]
+        if not block:
+            with self._space:
+                if self.max_queue and self._queued + len(texts) > self.max_queue:
+                    raise QueueFull()
+                self._queued += len(texts)
+            for text, future in zip(texts, futures):
+                self._queue.put((text, future))
+            return futures
+        for position, (text, future) in enumerate(zip(texts, futures)):
+            with self._space:
+                if not self._space.wait_for(lambda: not self.max_queue or self._queued < self.max_queue, timeout):
+                    for queued in futures[:position]:
+                        queued.cancel()
+                    raise QueueFull()
+                self._queued += 1
+            self._queue.put((text, future))
+        return futures
+
+    def _release(self, count):
+        with self._space:
+            self._queued -= count
+            self._space.notify_all()
+
+    def _next_batch(self):
+        """Blocks for the first text, then gathers more until the batch is full or its wait is over."""
+        try:
+            batch = [self._queue.get(timeout=0.1)]
+        except queue.Empty:
+            return []
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        self._release(len(batch))
+        # Cancelled futures belong to a submit that gave up; their texts are skipped
+        return [(text, future) for text, future in batch if future.set_running_or_notify_cancel()]
+
+    def _run(self):
+        while not self._stopped.is_set():
+            batch = self._next_batch()
+            if not batch:
+                continue
+            texts = [text for text, _ in batch]
+            start = time.perf_counter()
+            try:
+                results = self.extract_fn(texts)
+            except Exception as e: # Fail this batch's requests, keep serving
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.metrics.record_batch(len(batch), time.perf_counter() - start)
+            for (_, future), entities in zip(batch, results):
+                future.set_result(entities)
+
+    def close(self):
+        self._stopped.set()
+        self._thread.join()
+
+
+def _record_text(line):
+    """Text of one bulk input line: a JSON string, or the first TEXT_FIELDS field of a JSON object.
+
+    Raises ValueError for invalid JSON, any other JSON value, or a non-string text field.
+    """
+    record = json.loads(line)
+    if isinstance(record, str):
+        return record, {'text': record}
+    if not isinstance(record, dict):
+        raise ValueError("Expected a JSON string or object.")
+    for field in TEXT_FIELDS:
+        if record.get(field) is not None:
+            if not isinstance(record[field], str):
+                raise ValueError(f"Field '{field}' must be a string.")
+            return record[field], record
+    return "", record
+
+
+class NerRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1' # Keep-alive and chunked responses
+    server_version = 'EthioMartNER/1.0'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def address_string(self):
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_lines(self):
+        """Yields request body lines, from a Content-Length or a chunked body."""
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            pending = b''
+            while True:
+                size = int(self.rfile.readline().split(b';')[0].strip() or b'0', 16)
+                if size == 0:
+                    self.rfile.readline() # Blank line after the last chunk
+                    break
+                pending += self.rfile.read(size)
+                self.rfile.readline()
+                *lines, pending = pending.split(b'\n')
+                yield from lines
+            if pending:
+                yield pending
+            return
+        remaining = int(self.headers.get('Content-Length') or 0)
+        while remaining > 0:
+            line = self.rfile.readline(remaining)
+            if not line:
+                break
+            remaining -= len(line)
+            yield line
+
+    def do_GET(self):
+        batcher = self.server.batcher
+        if self.path == '/health':
+            self._send_json(200, {'status': 'ok', 'model': self.server.model_name})
+        elif self.path == '/metrics':
+            self._send_json(200, batcher.metrics.snapshot(batcher.queue_depth))
+        else:
+            self._send_json(404, {'error': f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path == '/extract':
+            self._extract()
+        elif self.path == '/extract/bulk':
+            self._extract_bulk()
+        else:
+            self._send_json(404, {'error': f"Unknown path {self.path}"})
+
+    def _extract(self):
+        start = time.perf_counter()
+        batcher = self.server.batcher
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+            single = 'text' in payload
+            texts = [payload['text']] if single else payload['texts']
+            if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+                raise ValueError
+        except (ValueError, KeyError, TypeError):
+            self._send_json(400, {'error': 'Expected a JSON body with "text" (string) or "texts" (list of strings).'})
+            return
+        if batcher.max_queue and len(texts) > batcher.max_queue:
+            self._send_json(413, {'error': f"At most {batcher.max_queue} texts per request; use /extract/bulk."})
+            return
+        try:
+            futures = batcher.submit(texts)
+        except QueueFull:
+            batcher.metrics.record_rejected()
+            self._send_json(503, {'error': 'Server busy, retry later.'}, {'Retry-After': '1'})
+            return
+        try:
+            results = [entity_spans(future.result()) for future in futures]
+        except Exception as e:
+            self._send_json(500, {'error': str(e)})
+            return
+        batcher.metrics.record_request(time.perf_counter() - start)
+        self._send_json(200, {'entities': results[0]} if single else {'results': results})
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+
+    def _extract_bulk(self):
+        """Streams one output line per input line: the record plus its 'entities'."""
+        start = time.perf_counter()
+        batcher = self.server.batcher
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson; charset=utf-8')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        pending = deque() # (record, future) in input order
+        def write_ready(window):
+            # Emit finished results in order; block on the oldest while more than `window` are in flight
+            while pending and (pending[0][1] is None or pending[0][1].done() or len(pending) > window):
+                record, future = pending.popleft()
+                try:
+                    record['entities'] = entity_spans(future.result()) if future is not None else []
+                except Exception as e:
+                    record['error'] = str(e)
+                self._write_chunk((json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8'))
+
+        for line in self._read_lines():
+            if not line.strip():
+                continue
+            try:
+                text, record = _record_text(line)
+            except ValueError as e: # json.JSONDecodeError is a ValueError too
+                pending.append(({'error': f"Invalid line: {e}"}, None))
+                continue
+            # Blocking submit: a full queue pauses reading instead of rejecting
+            future = batcher.submit([text], block=True)[0] if text else None
+            pending.append((record, future))
+            write_ready(BULK_WINDOW)
+        write_ready(0)
+        self.wfile.write(b"0\r\n\r\n")
+        batcher.metrics.record_request(time.perf_counter() - start)
+
+
+class NerHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, batcher, model_name='', verbose=False):
+        self.batcher = batcher
+        self.model_name = model_name
+        self.verbose = verbose
+        super().__init__(address, NerRequestHandler)
+
+
+class NerUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """NerHTTPServer on a Unix domain socket (e.g. next to the scraper on the same host)."""
+    daemon_threads = True
+
+    def __init__(self, path, batcher, model_name='', verbose=False):
+        self.batcher = batcher
+        self.model_name = model_name
+        self.verbose = verbose
+        if os.path.exists(path):
+            os.remove(path)
+        super().__init__(path, NerRequestHandler)
+
+    def get_request(self):
+        request, _ = super().get_request()
+        return request, ('unix', 0)
+
+
+def create_server(extract_fn, host=NER_SERVER_HOST, port=NER_SERVER_PORT, unix_socket=None, model_name='',
+                  max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS, max_queue=DEFAULT_MAX_QUEUE,
+                  verbose=False):
+    """Builds the batcher and a TCP (or Unix-socket) server; call serve_forever() to run it."""
+    batcher = MicroBatcher(extract_fn, max_batch_size, max_wait_ms, max_queue)
+    if unix_socket:
+        return NerUnixHTTPServer(unix_socket, batcher, model_name, verbose)
+    return NerHTTPServer((host, port), batcher, model_name, verbose)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serve NER extraction over HTTP with dynamic micro-batching.")
+    parser.add_argument('--host', default=NER_SERVER_HOST)
+    parser.add_argument('--port', type=int, default=NER_SERVER_PORT)
+    parser.add_argument('--unix-socket', help="Listen on this Unix socket path instead of TCP.")
+    parser.add_argument('--adapter-dir', default=None, help="LoRA adapter directory (default: config.NER_MODEL_DIR).")
+    parser.add_argument('--base-model', default=None, help="Base model name/path (defaults to the adapter's base model).")
+    parser.add_argument('--quantized', action='store_true', help="Use the int8 model from export_quantized_model.py.")
+    parser.add_argument('--cache', action='store_true', help="Serve repeated texts from the NER result cache.")
+    parser.add_argument('--rules', action='store_true',
+                        help="Take PRICE spans from the rule-based extractor and send the model only what is left.")
+    parser.add_argument('--max-batch-size', type=int, default=DEFAULT_MAX_BATCH_SIZE)
+    parser.add_argument('--max-wait-ms', type=float, default=DEFAULT_MAX_WAIT_MS)
+    parser.add_argument('--max-queue', type=int, default=DEFAULT_MAX_QUEUE, help="Queued texts before requests get 503.")
+    parser.add_argument('--verbose', action='store_true', help="Log every request.")
+    args = parser.parse_args()
+
+    from scripts.inference.ner_inference import NER_MODEL_DIR, NerInferenceEngine
+    if args.quantized:
+        from scripts.inference.export_quantized_model import QUANTIZED_NER_MODEL_DIR
+        model_dir = QUANTIZED_NER_MODEL_DIR
+        engine = NerInferenceEngine.from_quantized(model_dir, batch_size=args.max_batch_size)
+    else:
+        model_dir = args.adapter_dir or NER_MODEL_DIR
+        engine = NerInferenceEngine.from_pretrained(model_dir, base_model=args.base_model, batch_size=args.max_batch_size)
+    extractor = engine
+    if args.cache:
+        from scripts.inference.ner_cache import CachedNerExtractor
+        extractor = CachedNerExtractor.open(engine, model_dir)
+    if args.rules:
+        from scripts.preprocessing.rule_based_extractor import RuleRoutedExtractor
+        extractor = RuleRoutedExtractor(extractor)
+
+    server = create_server(extractor.extract, args.host, args.port, args.unix_socket, os.path.basename(model_dir),
+                           args.max_batch_size, args.max_wait_ms, args.max_queue, args.verbose)
+    where = args.unix_socket or f"http://{args.host}:{args.port}"
+    print(f"NER server listening on {where} (max batch {args.max_batch_size}, max wait {args.max_wait_ms} ms, "
+          f"queue {args.max_queue})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down.")
+    finally:
+        server.server_close()
+        server.batcher.close()
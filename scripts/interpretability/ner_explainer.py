@@ -0,0 +1,263 @@
+# EthioMart_NER_Project/scripts/interpretability/ner_explainer.py
+
+import argparse
+import os
+import sys
+from collections import OrderedDict
+
+import numpy as np
+
+# Add the project root to the Python path to import project modules
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+sys.path.insert(0, PROJECT_ROOT)
+
+# --- Batched LIME/SHAP Explanations for NER ---
+# Model_Interpretability.ipynb explains one token per LIME run and sends all 1000
+# perturbed texts through the model each time. Here every explanation of a
+# sentence shares one set of forward passes:
+# 1. Perturbations mask whole words (LIME bow=False, so positions are stable); the
+#    prediction for word i is read at its first subword, masked or not.
+# 2. The classifier function returns the label probabilities of *every* word, so
+#    one LIME run fits a ridge model per (word, label) column, and one SHAP
+#    KernelExplainer run covers all words and labels.
+# 3. Masked variants are deduplicated, run in length-bucketed padded micro-batches
+#    and memoized (LRU), so repeated variants, LIME after SHAP and re-explaining a
+#    sentence cost no forward passes.
+
+LIME_MASK_STRING = 'UNKWORDZ' # LIME's own mask for bow=False
+DEFAULT_NUM_SAMPLES = 1000
+DEFAULT_NUM_FEATURES = 5
+DEFAULT_CACHE_SIZE = 100000 # Memoized masked variants
+EXAMPLE_SENTENCE = "አዲስ ስልክ iPhone 15 Pro Max ዋጋው 70000 ብር ሲሆን በአዲስ አበባ ይገኛል"
+
+
+def _softmax(logits):
+    shifted = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return shifted / shifted.sum(axis=-1, keepdims=True)
+
+
+class NerExplainer:
+    """Word-level LIME and SHAP explanations of a NerInferenceEngine's predictions."""
+
+    def __init__(self, engine, mask_string=LIME_MASK_STRING, cache_size=DEFAULT_CACHE_SIZE, batch_size=None):
+        self.engine = engine
+        self.mask_string = mask_string
+        self.cache_size = cache_size
+        self.batch_size = batch_size
+        self.label_names = [engine.id2label[i] for i in range(len(engine.id2label))]
+        self._memo = OrderedDict() # masked text -> (num_words, num_labels) probabilities
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.requested = 0 # Texts asked for by LIME/SHAP
+        self.memo_hits = 0
+        self.inferred = 0 # Distinct variants run through the model
+
+    def stats(self):
+        return {'requested': self.requested, 'memo_hits': self.memo_hits, 'inferred': self.inferred}
+
+    def _remember(self, text, probabilities):
+        self._memo[text] = probabilities
+        if len(self._memo) > self.cache_size:
+            self._memo.popitem(last=False)
+
+    def _infer(self, texts):
+        """Per-word probabilities of distinct texts, in padded micro-batches; returns {text: array}."""
+        encoded = self.engine.tokenizer(
+            [text.split() for text in texts], is_split_into_words=True,
+            truncation=True, max_length=self.engine.max_length
+        )
+        first_subwords = []
+        for i in range(len(texts)):
+            positions = {}
+            for position, word in enumerate(encoded.word_ids(batch_index=i)):
+                if word is not None:
+                    positions.setdefault(word, position)
+            first_subwords.append(positions)
+        input_ids = encoded['input_ids']
+        results = {}
+        for batch in self.engine.iter_batches([len(ids) for ids in input_ids], self.batch_size):
+            for index, logits in zip(batch, self.engine.forward([input_ids[i] for i in batch])):
+                probabilities = np.zeros((len(texts[index].split()), len(self.label_names)), dtype=np.float32)
+                words = first_subwords[index]
+                if words:
+                    rows = np.fromiter(words.keys(), dtype=np.int64)
+                    probabilities[rows] = _softmax(logits[np.fromiter(words.values(), dtype=np.int64)])
+                results[texts[index]] = probabilities # Words cut off by truncation stay at 0
+                self._remember(texts[index], probabilities)
+            self.inferred += len(batch)
+        return results
+
+    def word_probabilities(self, texts):
+        """(num_words, num_labels) label probabilities for every whitespace word of every text."""
+        self.requested += len(texts)
+        found, missing = {}, []
+        for text in dict.fromkeys(texts):
+            if text in self._memo:
+                self._memo.move_to_end(text)
+                found[text] = self._memo[text]
+            else:
+                missing.append(text)
+        self.memo_hits += len(texts) - len(missing)
+        if missing:
+            found.update(self._infer(missing))
+        return [found[text] for text in texts]
+
+    def classifier_fn(self, texts):
+        """LIME/SHAP prediction function: rows of every word's probabilities, flattened word-major."""
+        return np.stack([probabilities.reshape(-1) for probabilities in self.word_probabilities(texts)])
+
+    def _targets(self, words, target_labels=None):
+        """Label explained for each word: given in `target_labels` or predicted on the full text."""
+        predicted = self.word_probabilities([' '.join(words)])[0]
+        targets = []
+        for index in range(len(words)):
+            label_name = (target_labels or {}).get(index) or self.label_names[int(predicted[index].argmax())]
+            label = self.label_names.index(label_name)
+            targets.append((index, label, float(predicted[index, label])))
+        return targets
+
+    def lime_neighborhood(self, words, num_samples, random_state):
+        """LIME's perturbation set for a sentence: (masks, per-word probabilities, distances).
+
+        Same sampling as LimeTextExplainer (bow=False): the first row is the
+        original, every other row masks 1..num_words randomly chosen words.
+        """
+        from sklearn.metrics import pairwise_distances
+        from sklearn.utils import check_random_state
+
+        rng = check_random_state(random_state)
+        doc_size = len(words)
+        sizes = rng.randint(1, doc_size + 1, num_samples - 1)
+        data = np.ones((num_samples, doc_size))
+        features_range = range(doc_size)
+        for i, size in enumerate(sizes, start=1):
+            data[i, rng.choice(features_range, size, replace=False)] = 0
+        texts = [' '.join(word if keep else self.mask_string for word, keep in zip(words, row)) for row in data]
+        distances = pairwise_distances(data, data[:1], metric='cosine').ravel() * 100
+        return data, self.classifier_fn(texts), distances
+
+    @staticmethod
+    def _forward_selection(data, labels, weights, num_features):
+        """LimeBase.forward_selection (greedy, unregularized weighted least squares, best
+        weighted R^2 first) with every candidate feature of a round solved at once."""
+        total = weights.sum()
+        centered = data - weights @ data / total
+        target = labels - weights @ labels / total
+        weighted = centered * weights[:, None]
+        gram = centered.T @ weighted
+        moments = weighted.T @ target
+        target_ss = float(weights @ target ** 2)
+        used = []
+        for _ in range(min(num_features, data.shape[1])):
+            candidates = [feature for feature in range(data.shape[1]) if feature not in used]
+            sets = np.array([used + [feature] for feature in candidates])
+            systems = gram[sets[:, :, None], sets[:, None, :]]
+            rhs = moments[sets]
+            coefficients = np.einsum('mij,mj->mi', np.linalg.pinv(systems), rhs)
+            explained = np.einsum('mi,mi->m', coefficients, rhs)
+            scores = explained / target_ss if target_ss > 0 else np.zeros(len(candidates))
+            used.append(candidates[int(np.argmax(scores))]) # First of equal scores, like LimeBase
+        return used
+
+    def explain_lime(self, text, num_samples=DEFAULT_NUM_SAMPLES, num_features=DEFAULT_NUM_FEATURES,
+                     target_labels=None, random_state=42, kernel_width=25):
+        """LIME explanation of every word's label from one shared perturbation set.
+
+        Equivalent to one LimeTextExplainer(bow=False, split on whitespace) run per
+        word and label with feature_selection='auto'.
+
+        Args:
+            text: Sentence to explain (whitespace-separated words).
+            target_labels: Optional {word index: label name}; other words explain
+                their predicted label.
+            random_state: Seed of LIME's sampling.
+
+        Returns:
+            One dict per word: 'index', 'word', 'label', 'probability' and
+            'weights', a list of (word, weight) pairs sorted by |weight|.
+        """
+        from lime.lime_base import LimeBase
+
+        words = text.split()
+        if not words:
+            return []
+        num_labels = len(self.label_names)
+        targets = self._targets(words, target_labels)
+        data, probabilities, distances = self.lime_neighborhood(words, num_samples, random_state)
+        base = LimeBase(lambda d: np.sqrt(np.exp(-(d ** 2) / kernel_width ** 2)), random_state=random_state)
+        weights = base.kernel_fn(distances)
+
+        results = []
+        for index, label, probability in targets:
+            column = index * num_labels + label
+            if num_features <= 6: # 'auto' means forward selection here
+                used = self._forward_selection(data, probabilities[:, column], weights, num_features)
+                _, local_exp, _, _ = base.explain_instance_with_data(
+                    data[:, used], probabilities[:, [column]], distances, 0, len(used), feature_selection='none'
+                )
+                local_exp = [(used[feature], weight) for feature, weight in local_exp]
+            else:
+                _, local_exp, _, _ = base.explain_instance_with_data(data, probabilities, distances, column, num_features)
+            results.append({
+                'index': index, 'word': words[index], 'label': self.label_names[label], 'probability': probability,
+                'weights': [(words[feature], float(weight)) for feature, weight in local_exp]
+            })
+        return results
+
+    def shap_predict_fn(self, words):
+        """Memoized SHAP prediction function over binary word masks (1 = keep the word)."""
+        def predict(masks):
+            texts = [' '.join(word if keep else self.mask_string for word, keep in zip(words, row)) for row in masks]
+            return self.classifier_fn(texts)
+        return predict
+
+    def explain_shap(self, text, nsamples=DEFAULT_NUM_SAMPLES, target_labels=None):
+        """KernelSHAP values of every word's label; the background masks every word.
+
+        Returns one dict per word: 'index', 'word', 'label', 'probability' and
+        'shap_values', one value per word of the sentence.
+        """
+        import shap
+
+        words = text.split()
+        if not words:
+            return []
+        num_labels = len(self.label_names)
+        targets = self._targets(words, target_labels)
+        explainer = shap.KernelExplainer(self.shap_predict_fn(words), np.zeros((1, len(words))), link='identity')
+        values = np.asarray(explainer.shap_values(np.ones((1, len(words))), nsamples=nsamples, silent=True))
+        values = values.reshape(len(words), len(words) * num_labels) # (features, outputs) for the one sample
+        return [
+            {'index': index, 'word': words[index], 'label': self.label_names[label], 'probability': probability,
+             'shap_values': values[:, index * num_labels + label].tolist()}
+            for index, label, probability in targets
+        ]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Explain the NER model's label for every word of a sentence.")
+    parser.add_argument('--text', default=EXAMPLE_SENTENCE)
+    parser.add_argument('--method', choices=['lime', 'shap', 'both'], default='both')
+    parser.add_argument('--num-samples', type=int, default=DEFAULT_NUM_SAMPLES)
+    parser.add_argument('--quantized', action='store_true', help="Use the int8 model from export_quantized_model.py.")
+    args = parser.parse_args()
+
+    from scripts.inference.ner_inference import NerInferenceEngine
+    engine = NerInferenceEngine.from_quantized() if args.quantized else NerInferenceEngine.from_pretrained()
+    explainer = NerExplainer(engine)
+
+    if args.method in ('lime', 'both'):
+        print(f"\n--- LIME Explanations ---\n'{args.text}'")
+        for result in explainer.explain_lime(args.text, num_samples=args.num_samples):
+            features = ', '.join(f"'{word}': {weight:.4f}" for word, weight in result['weights'])
+            print(f"  {result['word']} -> {result['label']} ({result['probability']:.2f}): {features}")
+    if args.method in ('shap', 'both'):
+        print(f"\n--- SHAP Explanations ---\n'{args.text}'")
+        for result in explainer.explain_shap(args.text, nsamples=args.num_samples):
+            words = args.text.split()
+            top = np.argsort(np.abs(result['shap_values']))[::-1][:DEFAULT_NUM_FEATURES]
+            features = ', '.join(f"'{words[i]}': {result['shap_values'][i]:.4f}" for i in top)
+            print(f"  {result['word']} -> {result['label']} ({result['probability']:.2f}): {features}")
+    stats = explainer.stats()
+    print(f"\nModel ran on {stats['inferred']} distinct masked variants for {stats['requested']} requested texts.")
@@ -1,5 +1,7 @@
 # EthioMart_NER_Project/scripts/labeling_prep/extract_annotation_subset.py
 
+import argparse
+import itertools
 import json
 import os
 import sys
@@ -7,6 +9,9 @@ import sys
 # Add the project root to the Python path to import config
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 import config # Import configuration from config.py
+from scripts.data_io.message_stream import iter_records
+from scripts.preprocessing.near_duplicates import NearDuplicateIndex, is_representative, record_text
+from scripts.profiling import instrumentation
 
 INPUT_JSON_FILE = os.path.join(config.PREPROCESSED_DATA_DIR, config.PREPROCESSED_MESSAGES_FILE)
 SUBSET_OUTPUT_JSON_FILE = os.path.join(config.LABELED_DATA_DIR, config.ANNOTATION_SUBSET_FILE)
@@ -15,25 +20,50 @@ NUM_MESSAGES_TO_LABEL = config.NUM_MESSAGES_TO_LABEL
 # Ensure output directory exists
 os.makedirs(os.path.dirname(SUBSET_OUTPUT_JSON_FILE), exist_ok=True)
 
-def extract_subset(input_path, output_path, num_messages):
+def iter_unique_records(input_path):
+    """Streams records, skipping exact and near duplicates of earlier ones.
+
+    Uses the 'dup_cluster_id' tags written by near_duplicates.py when present;
+    otherwise clusters the file first (one extra streaming pass).
+    """
+    records = iter_records(input_path)
+    first = next(records, None)
+    if first is None:
+        return
+    if 'dup_cluster_id' in first:
+        for position, record in enumerate(itertools.chain([first], records)):
+            if is_representative(record, position):
+                yield record
+        return
+
+    index = NearDuplicateIndex()
+    index.add(itertools.chain([record_text(first)], (record_text(record) for record in records)))
+    cluster_ids = index.cluster_ids()
+    for position, record in enumerate(iter_records(input_path)):
+        if cluster_ids[position] == position:
+            yield record
+
+
+@instrumentation.stage('annotation_subset')
+def extract_subset(input_path, output_path, num_messages, unique=False):
     if not os.path.exists(input_path):
         print(f"Error: Input file '{input_path}' not found. Please ensure your preprocessed JSON exists.")
         return
 
+    # Stream only the first N messages (or fewer if the dataset is smaller)
+    # instead of parsing the whole file; with unique=True, the first N that are
+    # not duplicates of an earlier message
     try:
-        with open(input_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        records = iter_unique_records(input_path) if unique else iter_records(input_path)
+        subset = list(itertools.islice(records, num_messages))
     except json.JSONDecodeError as e:
         print(f"Error decoding JSON from '{input_path}': {e}")
         return
 
-    if len(data) == 0:
+    if len(subset) == 0:
         print("Error: Input JSON file is empty. Cannot extract a subset.")
         return
 
-    # Take the first N messages, or fewer if the dataset is smaller
-    subset = data[:min(num_messages, len(data))]
-
     # Prepare data for annotation tool (e.g., Doccano expects 'text' key)
     # We'll also keep the original 'id' for traceability
     annotation_ready_subset = []
@@ -45,9 +75,16 @@ def extract_subset(input_path, output_path, num_messages):
 
     with open(output_path, 'w', encoding='utf-8') as f:
         json.dump(annotation_ready_subset, f, ensure_ascii=False, indent=4)
-    
+    instrumentation.count(items=len(annotation_ready_subset), bytes_written=os.path.getsize(output_path))
+
     print(f"Extracted {len(annotation_ready_subset)} messages to '{output_path}' for annotation.")
     print("Please proceed to setting up Doccano and importing this file for manual labeling.")
 
 if __name__ == '__main__':
-    extract_subset(INPUT_JSON_FILE, SUBSET_OUTPUT_JSON_FILE, NUM_MESSAGES_TO_LABEL)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Extract a subset of preprocessed messages for annotation.")
+    parser.add_argument('--unique', action='store_true', help="Skip exact and near-duplicate messages (one per cluster).")
+    instrumentation.add_report_args(parser)
+    args = parser.parse_args()
+
+    with instrumentation.run_from_args('annotation_subset', args):
+        extract_subset(INPUT_JSON_FILE, SUBSET_OUTPUT_JSON_FILE, NUM_MESSAGES_TO_LABEL, unique=args.unique)
@@ -0,0 +1,354 @@
+# EthioMart_NER_Project/scripts/model_training/compare_models.py
+
+import argparse
+import copy
+import json
+import math
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+
+# Add the project root to the Python path to import config
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+sys.path.insert(0, PROJECT_ROOT)
+import config # Import configuration from config.py
+from scripts.data_io.token_store import DEFAULT_MAX_LENGTH, TokenStore, open_or_build_token_store, tokenizer_fingerprint
+from scripts.model_training.conll_data import parse_conll_file, tokenize_and_align_labels
+
+# --- Parallel NER Model Comparison ---
+# Scriptable version of Model_Comparison.ipynb that also measures cost:
+# 1. The CoNLL file is parsed and split (80/20, seed 42) once.
+# 2. Each distinct tokenizer tokenizes the sentences once into a memory-mapped
+#    token store (token_store.py) under data/token_store/labeled-<tokenizer>, so
+#    candidates (and later runs) sharing a tokenizer reuse it; workers slice their
+#    rows from the store and only align the labels.
+# 3. Candidates train in parallel CPU processes (one fresh process per candidate,
+#    each limited to `threads_per_worker` torch/BLAS threads), so peak RSS is per
+#    model. Training keeps the notebook's Trainer settings: AdamW, lr 2e-5, weight
+#    decay 0.01, batch size 8, gradient norm clipped at 1.0, truncation at the
+#    tokenizer's own maximum length, evaluation every epoch and the best-F1 epoch kept.
+# 4. The report puts seqeval entity metrics next to training wall time,
+#    single-message inference latency (p50/p95) and peak memory.
+#
+# --tiny swaps the Hugging Face checkpoints for small randomly initialized models
+# with a word-level tokenizer built from the CoNLL data, so the whole harness runs
+# offline (e.g. in CI) in seconds.
+
+LABELED_CONLL_FILE = config.LABELED_CONLL_FILE
+LABEL_NAMES = config.LABEL_NAMES
+MODEL_COMPARISON_DIR = config.MODEL_COMPARISON_DIR
+TOKEN_STORE_DIR = config.TOKEN_STORE_DIR
+
+MODEL_CANDIDATES = [
+    {"name": "XLM-R-Amharic-NER", "id": "mbeukman/xlm-roberta-base-finetuned-ner-amharic"},
+    {"name": "BERT-Medium-Amharic-NER", "id": "rasyosef/bert-medium-amharic-finetuned-ner"},
+    {"name": "mBERT-Base-Cased", "id": "bert-base-multilingual-cased"}
+]
+# Random-init stand-ins for offline runs; they share the tokenizer from build_offline_tokenizer
+TINY_CANDIDATES = [
+    {"name": "tiny-xlm-roberta", "model_type": "xlm-roberta"},
+    {"name": "tiny-bert", "model_type": "bert"}
+]
+TINY_MODEL_CONFIG = {"hidden_size": 32, "num_hidden_layers": 2, "num_attention_heads": 2, "intermediate_size": 64}
+TINY_MAX_LENGTH = 512 # model_max_length of the offline tokenizer, like the real checkpoints
+
+DEFAULT_TRAINING_ARGS = {
+    "learning_rate": 2e-5,
+    "batch_size": 8,
+    "epochs": 20,
+    "weight_decay": 0.01,
+    "max_grad_norm": 1.0, # Trainer's default
+    "max_length": None, # Tokenizer default (512 for the candidates), as in the notebook
+    "seed": 42
+}
+LATENCY_SAMPLES = 50 # Single-message forward passes timed per model
+_THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS')
+
+
+def train_eval_split(sentences, test_size=0.2, seed=42):
+    """Shuffled train/eval split with the same indices as datasets' train_test_split."""
+    n_test = math.ceil(test_size * len(sentences))
+    permutation = np.random.default_rng(seed).permutation(len(sentences))
+    return [sentences[i] for i in permutation[n_test:]], [sentences[i] for i in permutation[:n_test]]
+
+
+def build_offline_tokenizer(sentences, save_dir):
+    """Word-level fast tokenizer over the CoNLL vocabulary (for --tiny runs), saved to `save_dir`."""
+    from tokenizers import Tokenizer, models, pre_tokenizers, processors
+    from transformers import PreTrainedTokenizerFast
+
+    specials = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+    words = sorted({token for sentence in sentences for token in sentence["tokens"]})
+    vocab = {token: i for i, token in enumerate(specials + words)}
+    backend = Tokenizer(models.WordLevel(vocab, unk_token="[UNK]"))
+    backend.pre_tokenizer = pre_tokenizers.WhitespaceSplit()
+    backend.post_processor = processors.TemplateProcessing(
+        single="[CLS] $A [SEP]", special_tokens=[("[CLS]", vocab["[CLS]"]), ("[SEP]", vocab["[SEP]"])]
+    )
+    tokenizer = PreTrainedTokenizerFast(
+        tokenizer_object=backend, pad_token="[PAD]", unk_token="[UNK]", cls_token="[CLS]",
+        sep_token="[SEP]", mask_token="[MASK]", model_max_length=TINY_MAX_LENGTH
+    )
+    tokenizer.save_pretrained(save_dir)
+    return tokenizer
+
+
+def load_candidate_tokenizer(candidate, tiny_tokenizer_dir=None):
+    from transformers import AutoTokenizer
+    return AutoTokenizer.from_pretrained(candidate.get("id") or tiny_tokenizer_dir)
+
+
+def labeled_token_store(tokenizer, sentences, max_length, store_dir=TOKEN_STORE_DIR):
+    """Token store of the CoNLL sentences for this tokenizer, tokenized only when missing or stale.
+
+    max_length=None truncates at the tokenizer's own limit (capped at 512), like
+    the notebook. Returns the opened TokenStore.
+    """
+    path = os.path.join(store_dir, f"labeled-{tokenizer_fingerprint(tokenizer)[:16]}")
+    max_length = max_length or min(tokenizer.model_max_length, DEFAULT_MAX_LENGTH)
+    return open_or_build_token_store(path, [sentence["tokens"] for sentence in sentences], tokenizer,
+                                     max_length, is_split_into_words=True)
+
+
+def limit_threads(num_threads):
+    """Process pool initializer: caps torch and BLAS threads in the worker."""
+    for name in _THREAD_ENV_VARS:
+        os.environ[name] = str(num_threads)
+    import torch
+    torch.set_num_threads(num_threads)
+
+
+def _batches(features, batch_size, collator, shuffle_rng=None):
+    order = np.arange(len(features))
+    if shuffle_rng is not None:
+        shuffle_rng.shuffle(order)
+    for start in range(0, len(order), batch_size):
+        yield collator([features[i] for i in order[start:start + batch_size]])
+
+
+def evaluate_model(model, features, collator, id2label, batch_size):
+    """seqeval metrics (overall and per entity type), scored like the notebook's compute_metrics."""
+    import torch
+    from seqeval.metrics import accuracy_score, classification_report, f1_score, precision_score, recall_score
+
+    model.eval()
+    true_labels, true_predictions = [], []
+    with torch.inference_mode():
+        for batch in _batches(features, batch_size, collator):
+            labels = batch.pop('labels')
+            predictions = model(**batch).logits.argmax(dim=-1)
+            for prediction, label in zip(predictions.tolist(), labels.tolist()):
+                true_labels.append([id2label[l] for l in label if l != -100])
+                true_predictions.append([id2label[p] for p, l in zip(prediction, label) if l != -100])
+    report = classification_report(true_labels, true_predictions, output_dict=True, zero_division=0)
+    return {
+        "precision": precision_score(true_labels, true_predictions, zero_division=0),
+        "recall": recall_score(true_labels, true_predictions, zero_division=0),
+        "f1": f1_score(true_labels, true_predictions, zero_division=0),
+        "accuracy": accuracy_score(true_labels, true_predictions),
+        "per_entity_f1": {name: scores["f1-score"] for name, scores in report.items() if "avg" not in name}
+    }
+
+
+def measure_latency(model, features, samples=LATENCY_SAMPLES):
+    """p50/p95 milliseconds of single-message forward passes over the eval set."""
+    import torch
+    model.eval()
+    timings = []
+    with torch.inference_mode():
+        for i in range(samples if features else 0):
+            input_ids = torch.as_tensor(np.asarray(features[i % len(features)]['input_ids'], dtype=np.int64))[None]
+            start = time.perf_counter()
+            model(input_ids=input_ids, attention_mask=torch.ones_like(input_ids))
+            timings.append((time.perf_counter() - start) * 1000)
+    if not timings:
+        return float('nan'), float('nan')
+    return float(np.percentile(timings, 50)), float(np.percentile(timings, 95))
+
+
+def _load_model(job, tokenizer, label_names):
+    from transformers import AutoConfig, AutoModelForTokenClassification
+
+    candidate = job["candidate"]
+    id2label = {i: label for i, label in enumerate(label_names)}
+    label2id = {label: i for i, label in enumerate(label_names)}
+    if candidate.get("id"):
+        return AutoModelForTokenClassification.from_pretrained(
+            candidate["id"], num_labels=len(label_names), id2label=id2label, label2id=label2id,
+            ignore_mismatched_sizes=True
+        )
+    extra_positions = 2 if candidate["model_type"] in ("xlm-roberta", "roberta") else 0 # Position ids start after padding_idx
+    model_config = AutoConfig.for_model(
+        candidate["model_type"], vocab_size=len(tokenizer), pad_token_id=tokenizer.pad_token_id,
+        max_position_embeddings=(job["training_args"]["max_length"] or tokenizer.model_max_length) + extra_positions,
+        num_labels=len(label_names), id2label=id2label, label2id=label2id,
+        **dict(TINY_MODEL_CONFIG, **candidate.get("config", {}))
+    )
+    return AutoModelForTokenClassification.from_config(model_config)
+
+
+def run_candidate(job):
+    """Trains and evaluates one candidate; runs inside a pool worker process."""
+    import torch
+    from transformers import AutoTokenizer, DataCollatorForTokenClassification, get_linear_schedule_with_warmup
+
+    candidate, args, label_names = job["candidate"], job["training_args"], job["label_names"]
+    torch.manual_seed(args["seed"])
+    tokenizer = AutoTokenizer.from_pretrained(job["tokenizer"])
+    model = _load_model(job, tokenizer, label_names)
+    store = TokenStore(job["token_store"])
+    label2id = {label: i for i, label in enumerate(label_names)}
+    features = {}
+    for split, sentences in job["splits"].items():
+        encoding = tokenize_and_align_labels(tokenizer, sentences, label2id, max_length=store.max_length, token_store=store)
+        features[split] = [{'input_ids': ids, 'labels': labels}
+                           for ids, labels in zip(encoding['input_ids'], encoding['labels'])]
+    train_features, eval_features = features['train'], features['eval']
+    collator = DataCollatorForTokenClassification(tokenizer=tokenizer, return_tensors='pt')
+    id2label = dict(enumerate(label_names))
+
+    # Same optimizer setup as transformers' Trainer: no decay on biases and LayerNorm weights
+    no_decay = [name for name, _ in model.named_parameters() if name.endswith('bias') or 'LayerNorm' in name or 'layer_norm' in name]
+    optimizer = torch.optim.AdamW([
+        {'params': [p for n, p in model.named_parameters() if n not in no_decay], 'weight_decay': args["weight_decay"]},
+        {'params': [p for n, p in model.named_parameters() if n in no_decay], 'weight_decay': 0.0}
+    ], lr=args["learning_rate"])
+    steps_per_epoch = math.ceil(len(train_features) / args["batch_size"])
+    scheduler = get_linear_schedule_with_warmup(optimizer, 0, steps_per_epoch * args["epochs"])
+    shuffle_rng = np.random.default_rng(args["seed"])
+
+    best_metrics, best_state, best_epoch = None, None, 0
+    start = time.perf_counter()
+    for epoch in range(1, args["epochs"] + 1):
+        model.train()
+        for batch in _batches(train_features, args["batch_size"], collator, shuffle_rng):
+            loss = model(**batch).loss
+            loss.backward()
+            torch.nn.utils.clip_grad_norm_(model.parameters(), args["max_grad_norm"])
+            optimizer.step()
+            scheduler.step()
+            optimizer.zero_grad()
+        metrics = evaluate_model(model, eval_features, collator, id2label, args["batch_size"])
+        if best_metrics is None or metrics["f1"] > best_metrics["f1"]:
+            best_metrics, best_state, best_epoch = metrics, copy.deepcopy(model.state_dict()), epoch
+    train_seconds = time.perf_counter() - start
+    if best_state is not None:
+        model.load_state_dict(best_state)
+    else:
+        best_metrics = evaluate_model(model, eval_features, collator, id2label, args["batch_size"])
+
+    latency_p50, latency_p95 = measure_latency(model, eval_features)
+    if job.get("save_dir"):
+        model.save_pretrained(job["save_dir"])
+        tokenizer.save_pretrained(job["save_dir"])
+    return {
+        "model_name": candidate["name"],
+        "eval_precision": best_metrics["precision"],
+        "eval_recall": best_metrics["recall"],
+        "eval_f1": best_metrics["f1"],
+        "eval_accuracy": best_metrics["accuracy"],
+        "best_epoch": best_epoch,
+        "train_seconds": train_seconds,
+        "latency_p50_ms": latency_p50,
+        "latency_p95_ms": latency_p95,
+        "peak_memory_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, # ru_maxrss is KiB on Linux
+        "parameters": sum(p.numel() for p in model.parameters()),
+        "per_entity_f1": best_metrics["per_entity_f1"],
+        "model_path": job.get("save_dir")
+    }
+
+
+def compare_models(candidates, conll_file=LABELED_CONLL_FILE, output_dir=MODEL_COMPARISON_DIR, label_names=LABEL_NAMES,
+                   workers=2, threads_per_worker=1, store_dir=TOKEN_STORE_DIR, save_models=True, **training_args):
+    """Trains every candidate in parallel processes and returns the report DataFrame (best F1 first).
+
+    Candidates are dicts with a 'name' and either a Hugging Face 'id' or a
+    'model_type' for a tiny random-init model (see TINY_CANDIDATES).
+    """
+    training_args = dict(DEFAULT_TRAINING_ARGS, **training_args)
+    sentences = parse_conll_file(conll_file)
+    if not sentences:
+        print("No labeled data found. Model comparison will be skipped.")
+        return pd.DataFrame()
+    train_sentences, eval_sentences = train_eval_split(sentences, seed=training_args["seed"])
+    splits = {'train': train_sentences, 'eval': eval_sentences}
+    print(f"Loaded {len(sentences)} sentences: {len(train_sentences)} training, {len(eval_sentences)} evaluation.")
+
+    tiny_tokenizer_dir = None
+    if any(not candidate.get("id") for candidate in candidates):
+        tiny_tokenizer_dir = os.path.join(output_dir, 'tiny_tokenizer')
+        build_offline_tokenizer(train_sentences, tiny_tokenizer_dir)
+
+    jobs = []
+    for candidate in candidates:
+        tokenizer = load_candidate_tokenizer(candidate, tiny_tokenizer_dir)
+        store = labeled_token_store(tokenizer, sentences, training_args["max_length"], store_dir)
+        print(f"{candidate['name']}: tokens in {store.path} (max_length {store.max_length})")
+        jobs.append({
+            "candidate": candidate,
+            "tokenizer": candidate.get("id") or tiny_tokenizer_dir,
+            "token_store": store.path,
+            "splits": splits,
+            "label_names": list(label_names),
+            "training_args": training_args,
+            "save_dir": os.path.join(output_dir, f"{candidate['name']}_ner_output", 'final_model') if save_models else None
+        })
+
+    # Fresh spawned process per candidate: no shared threads and a per-model peak RSS
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=limit_threads, initargs=(threads_per_worker,),
+                             max_tasks_per_child=1) as pool:
+        futures = {pool.submit(run_candidate, job): job["candidate"]["name"] for job in jobs}
+        for future in as_completed(futures):
+            result = future.result()
+            print(f"Finished {futures[future]}: F1 {result['eval_f1']:.4f} in {result['train_seconds']:.1f}s")
+            results.append(result)
+
+    report = pd.DataFrame(results).sort_values(by='eval_f1', ascending=False).reset_index(drop=True)
+    os.makedirs(output_dir, exist_ok=True)
+    report.drop(columns=['per_entity_f1']).to_csv(os.path.join(output_dir, 'model_comparison.csv'), index=False)
+    with open(os.path.join(output_dir, 'model_comparison.json'), 'w', encoding='utf-8') as f:
+        json.dump({"training_args": training_args, "workers": workers, "threads_per_worker": threads_per_worker,
+                   "results": report.to_dict(orient='records')}, f, ensure_ascii=False, indent=2)
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Train and compare NER models on accuracy and cost.")
+    parser.add_argument('--conll', default=LABELED_CONLL_FILE, help="Labeled CoNLL file.")
+    parser.add_argument('--output-dir', default=MODEL_COMPARISON_DIR)
+    parser.add_argument('--models', nargs='+', help="Candidate names to run (default: all).")
+    parser.add_argument('--tiny', action='store_true', help="Use tiny random-init models and an offline tokenizer.")
+    parser.add_argument('--workers', type=int, default=2, help="Candidates trained at the same time.")
+    parser.add_argument('--threads-per-worker', type=int, default=max(1, (os.cpu_count() or 1) // 2))
+    parser.add_argument('--epochs', type=int, default=DEFAULT_TRAINING_ARGS["epochs"])
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_TRAINING_ARGS["batch_size"])
+    parser.add_argument('--learning-rate', type=float, default=DEFAULT_TRAINING_ARGS["learning_rate"])
+    parser.add_argument('--no-save', action='store_true', help="Do not save the trained models.")
+    args = parser.parse_args()
+
+    candidates = TINY_CANDIDATES if args.tiny else MODEL_CANDIDATES
+    if args.models:
+        candidates = [candidate for candidate in candidates if candidate["name"] in args.models]
+    report = compare_models(
+        candidates, args.conll, args.output_dir, workers=args.workers, threads_per_worker=args.threads_per_worker,
+        save_models=not args.no_save, epochs=args.epochs, batch_size=args.batch_size, learning_rate=args.learning_rate
+    )
+    if report.empty:
+        sys.exit(1)
+
+    print("\n--- Model Comparison Results ---")
+    print(report.drop(columns=['per_entity_f1', 'model_path']).to_string(index=False))
+    best_model_row = report.iloc[0]
+    print(f"\nBest performing model based on F1-score: {best_model_row['model_name']} (F1 {best_model_row['eval_f1']:.4f})")
+    if best_model_row['model_path']:
+        with open(os.path.join(args.output_dir, 'best_model_path.txt'), 'w') as f:
+            f.write(best_model_row['model_path'])
+        print(f"Path to best model for subsequent tasks: {best_model_row['model_path']}")
@@ -0,0 +1,102 @@
+# EthioMart_NER_Project/scripts/model_training/conll_data.py
+
+# --- Labeled CoNLL Data Helpers ---
+# The CoNLL parsing and subword label alignment used by the training and
+# comparison notebooks, shared here so scripts evaluate against exactly the
+# same word/label sequences the models were trained on.
+
+
+def parse_conll_file(file_path):
+    """Parses a CoNLL formatted file into a list of {'tokens', 'ner_tags'} dictionaries.
+
+    Sentences are separated by blank lines; each line holds a token and its tag
+    separated by a tab. Lines without exactly one tab are skipped, as in the
+    notebooks' parser.
+    """
+    try:
+        raw_text = open(file_path, "r", encoding="utf-8").read()
+    except FileNotFoundError:
+        print(f"Error: CoNLL file not found at {file_path}. Please upload it or check the path.")
+        return []
+
+    sentences = raw_text.strip().split("\n\n")
+    data = []
+    for sentence_str in sentences:
+        tokens = []
+        ner_tags = []
+        lines = sentence_str.split("\n")
+        for line in lines:
+            if line.strip():
+                parts = line.split("\t")
+                if len(parts) == 2:
+                    tokens.append(parts[0])
+                    ner_tags.append(parts[1])
+        if tokens and ner_tags:
+            data.append({"tokens": tokens, "ner_tags": ner_tags})
+    return data
+
+
+def align_labels_with_tokens(word_ids, word_labels, label2id):
+    """Aligns word-level label strings to subword tokens.
+
+    Special tokens get -100; the first subword of a word gets the word's label and
+    later subwords of a 'B-' word get the matching 'I-' label when it exists.
+    """
+    labels = []
+    previous_word_idx = None
+    for word_idx in word_ids:
+        if word_idx is None:
+            labels.append(-100)
+        elif word_idx != previous_word_idx:
+            labels.append(label2id[word_labels[word_idx]])
+        else:
+            label = word_labels[word_idx]
+            if label.startswith("B-") and "I-" + label[2:] in label2id:
+                label = "I-" + label[2:]
+            labels.append(label2id[label])
+        previous_word_idx = word_idx
+    return labels
+
+
+def tokenize_and_align_labels(tokenizer, sentences, label2id, max_length=None, token_store=None):
+    """Tokenizes pre-split sentences and aligns their labels.
+
+    Args:
+        tokenizer: A fast Hugging Face tokenizer.
+        sentences: Dicts with 'tokens' and 'ner_tags' (label strings), as returned
+            by parse_conll_file.
+        label2id: Mapping from label string to class id.
+        max_length: Truncation length (defaults to the tokenizer's).
+        token_store: Optional TokenStore holding these sentences (token_store.py
+            --conll); their ids are sliced from it instead of re-tokenized.
+
+    Returns:
+        The tokenizer's BatchEncoding with an added 'labels' list, or with a
+        token_store, a dict of 'input_ids', 'attention_mask' (zero-copy NumPy
+        views) and 'labels'.
+    """
+    if token_store is not None:
+        token_store.check(tokenizer, max_length)
+        rows = token_store.rows_for([sentence["tokens"] for sentence in sentences])
+        encodings = [token_store.encoding(row) for row in rows]
+        return {
+            "input_ids": [encoding["input_ids"] for encoding in encodings],
+            "attention_mask": [encoding["attention_mask"] for encoding in encodings],
+            "labels": [
+                align_labels_with_tokens([None if w < 0 else w for w in encoding["word_ids"].tolist()],
+                                         sentence["ner_tags"], label2id)
+                for encoding, sentence in zip(encodings, sentences)
+            ]
+        }
+
+    tokenized_inputs = tokenizer(
+        [sentence["tokens"] for sentence in sentences],
+        truncation=True,
+        max_length=max_length,
+        is_split_into_words=True
+    )
+    tokenized_inputs["labels"] = [
+        align_labels_with_tokens(tokenized_inputs.word_ids(batch_index=i), sentence["ner_tags"], label2id)
+        for i, sentence in enumerate(sentences)
+    ]
+    return tokenized_inputs
@@ -1,14 +1,21 @@
 # EthioMart_NER_Project/scripts/preprocessing/amharic_preprocessing.py
 
+import argparse
+import collections
+import concurrent.futures
+import itertools
 import json
 import os
 import re
+import time
 import unicodedata
 import sys
 
 # Add the project root to the Python path to import config
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 import config # Import configuration from config.py
+from scripts.data_io.message_stream import is_json_array_file, is_parquet_path, iter_jsonl_lines, iter_records, open_record_writer
+from scripts.profiling import instrumentation
 
 # Input and output file paths (loaded from config.py)
 COMBINED_RAW_JSON_FILE = os.path.join(config.PREPROCESSED_DATA_DIR, config.COMBINED_RAW_MESSAGES_FILE)
@@ -178,12 +185,79 @@ def clean_amharic_text(text):
     
     return cleaned_text
 
+# 8. Compiled Single-Pass Normalizer
+# Emoji ranges removed by clean_amharic_text, as (first, last) code points.
+EMOJI_RANGES = [
+    (0x1F600, 0x1F64F), # Emoticons
+    (0x1F300, 0x1F5FF), # Symbols & pictographs
+    (0x1F680, 0x1F6FF), # Transport & map symbols
+    (0x1F1E0, 0x1F1FF), # Regional indicators (flags)
+]
+
+class AmharicNormalizer:
+    """Reusable, precompiled equivalent of clean_amharic_text.
+
+    The character map, emoji ranges and punctuation sets are folded into a
+    single str.translate table when the object is built, so each text is
+    normalized in one pass, split once and filtered against a frozen stop-word
+    set. The output is byte-identical to clean_amharic_text (see
+    scripts/benchmarks/bench_normalizer.py for the differential check).
+
+    ENGLISH_PUNCTUATION is not a plain character class: the unescaped `]` after
+    `\\\\` closes the class, and the trailing `|` turns the rest into an
+    alternation of "class + ^ + ..." (which can never match mid-pattern) or the
+    literal run "}~]". All three of those characters are in AMHARIC_PUNCTUATION,
+    so deleting them through the translation table gives the same result.
+    """
+
+    def __init__(self, char_map=None, punctuation=None, emoji_ranges=None, stopwords=None):
+        char_map = AMHARIC_CHAR_NORM_MAP if char_map is None else char_map
+        punctuation = AMHARIC_PUNCTUATION if punctuation is None else punctuation
+        emoji_ranges = EMOJI_RANGES if emoji_ranges is None else emoji_ranges
+        stopwords = AMHARIC_STOP_WORDS if stopwords is None else stopwords
+
+        deleted = set(punctuation)
+        for first, last in emoji_ranges:
+            deleted.update(chr(cp) for cp in range(first, last + 1))
+
+        # Characters are mapped first and deleted afterwards, so fold the
+        # deletions into the mapped values as well. Identity entries are dropped.
+        table = {ord(ch): None for ch in deleted}
+        for src, dst in char_map.items():
+            mapped = ''.join(ch for ch in dst if ch not in deleted)
+            if mapped != src:
+                table[ord(src)] = mapped
+        self._table = table
+        self._stopwords = frozenset(stopwords)
+
+    def clean(self, text):
+        """Cleans a single text; same contract as clean_amharic_text."""
+        if not text:
+            return ""
+        stopwords = self._stopwords
+        # str.split() with no argument splits on the same Unicode whitespace
+        # as the `\s+` collapsing in tokenize_amharic and drops empty tokens.
+        return ' '.join([
+            token for token in text.translate(self._table).split()
+            if token.lower() not in stopwords
+        ])
+
+    def clean_many(self, texts):
+        """Cleans an iterable of texts, returning a list of cleaned strings."""
+        clean = self.clean
+        return [clean(text) for text in texts]
+
+    __call__ = clean
+
 # --- Main Preprocessing Script ---
+@instrumentation.stage('preprocess')
 def preprocess_telegram_data(input_file, output_file):
     print(f"Loading raw data from {input_file}...")
     try:
-        with open(input_file, 'r', encoding='utf-8') as f:
-            raw_data = json.load(f)
+        with instrumentation.stage('load') as load_stage:
+            with open(input_file, 'r', encoding='utf-8') as f:
+                raw_data = json.load(f)
+            load_stage.add(items=len(raw_data), bytes_read=os.path.getsize(input_file))
         print(f"Successfully loaded {len(raw_data)} messages.")
     except FileNotFoundError:
         print(f"Error: Input file '{input_file}' not found. Please ensure your combined raw JSON exists.")
@@ -192,30 +266,145 @@ def preprocess_telegram_data(input_file, output_file):
         print(f"Error decoding JSON from '{input_file}': {e}")
         return
 
+    normalizer = AmharicNormalizer()
     preprocessed_data = []
-    for i, message_entry in enumerate(raw_data):
-        if (i + 1) % 1000 == 0:
-            print(f"Processing message {i+1}/{len(raw_data)}...")
-
-        original_text = message_entry.get('message', '') # Use .get to handle missing 'message' key
-        
-        # Apply cleaning
-        cleaned_text = clean_amharic_text(original_text)
-        
-        # Add the cleaned text to the message entry
-        message_entry['cleaned_text'] = cleaned_text
-        
-        preprocessed_data.append(message_entry)
+    with instrumentation.stage('clean', items=len(raw_data)):
+        for i, message_entry in enumerate(raw_data):
+            if (i + 1) % 1000 == 0:
+                print(f"Processing message {i+1}/{len(raw_data)}...")
+
+            original_text = message_entry.get('message', '') # Use .get to handle missing 'message' key
+
+            # Apply cleaning (single-pass equivalent of clean_amharic_text)
+            cleaned_text = normalizer.clean(original_text)
+
+            # Add the cleaned text to the message entry
+            message_entry['cleaned_text'] = cleaned_text
+
+            preprocessed_data.append(message_entry)
+    instrumentation.count(items=len(preprocessed_data))
 
     print(f"Finished preprocessing {len(preprocessed_data)} messages.")
 
     print(f"Saving preprocessed data to {output_file}...")
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(preprocessed_data, f, ensure_ascii=False, indent=4)
+        with instrumentation.stage('save', items=len(preprocessed_data)) as save_stage:
+            with open(output_file, 'w', encoding='utf-8') as f:
+                json.dump(preprocessed_data, f, ensure_ascii=False, indent=4)
+            save_stage.add(bytes_written=os.path.getsize(output_file))
         print(f"Preprocessed data saved to {output_file}")
     except Exception as e:
         print(f"Error saving preprocessed JSON file: {e}")
 
+# --- Chunked / Multi-core Processing ---
+DEFAULT_CHUNK_SIZE = 2000 # Messages per chunk handed to a worker process
+
+_chunk_normalizer = None # Built once per process
+
+@instrumentation.timed('preprocess.preprocess_chunk')
+def preprocess_chunk(items, decode_json, serialize):
+    """Cleans one chunk of messages and returns them serialized for output.
+
+    `items` are raw JSONL lines when `decode_json` is True, otherwise decoded
+    records. Runs in worker processes, so decoding, cleaning and serialization
+    all happen off the reading process.
+    """
+    # Timed only with workers == 1; pool workers run without an active run
+    global _chunk_normalizer
+    if _chunk_normalizer is None:
+        _chunk_normalizer = AmharicNormalizer()
+    clean = _chunk_normalizer.clean
+    serialized = []
+    for item in items:
+        message_entry = json.loads(item) if decode_json else item
+        message_entry['cleaned_text'] = clean(message_entry.get('message', ''))
+        serialized.append(serialize(message_entry))
+    return serialized
+
+def iter_chunks(iterable, chunk_size):
+    """Yields consecutive lists of up to `chunk_size` items."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def iter_processed_chunks(chunks, workers, decode_json, serialize):
+    """Yields the result of preprocess_chunk for every chunk, in input order.
+
+    With workers > 1 the chunks run in a process pool. At most 2 * workers
+    chunks are in flight, so memory stays bounded while the pool is kept busy,
+    and results are yielded strictly in submission order.
+    """
+    if workers <= 1:
+        for chunk in chunks:
+            yield preprocess_chunk(chunk, decode_json, serialize)
+        return
+
+    max_pending = 2 * workers
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = collections.deque()
+        for chunk in chunks:
+            pending.append(executor.submit(preprocess_chunk, chunk, decode_json, serialize))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def stream_preprocess_telegram_data(input_file, output_file, workers=1, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Streaming, optionally multi-core variant of preprocess_telegram_data.
+
+    Reads records one at a time (JSONL, or a JSON array through the incremental
+    parser), cleans them in chunks and writes each chunk out immediately, so
+    memory use does not depend on input size. With workers > 1 the chunks are
+    cleaned in a process pool; output order always matches input order. The
+    output format follows the output extension: `.jsonl` for JSONL, anything
+    else for the historical indented JSON array.
+    """
+    if not os.path.exists(input_file):
+        print(f"Error: Input file '{input_file}' not found. Please ensure your combined raw JSON exists.")
+        return
+
+    print(f"Streaming raw data from {input_file} to {output_file} "
+          f"({workers} worker{'s' if workers != 1 else ''}, {chunk_size} messages per chunk)...")
+    start_time = time.perf_counter()
+    # JSONL lines are decoded in the workers; JSON arrays and Parquet are read here
+    decode_json = not is_parquet_path(input_file) and not is_json_array_file(input_file)
+    source = iter_jsonl_lines(input_file) if decode_json else iter_records(input_file)
+    try:
+        with instrumentation.stage('preprocess') as preprocess_stage:
+            with open_record_writer(output_file) as writer:
+                chunks = iter_chunks(source, chunk_size)
+                processed = iter_processed_chunks(chunks, workers, decode_json, writer.serialize)
+                for chunk_index, serialized_records in enumerate(processed, start=1):
+                    for text in serialized_records:
+                        writer.write_serialized(text)
+                    preprocess_stage.add(items=len(serialized_records))
+                    elapsed = time.perf_counter() - start_time
+                    print(f"Chunk {chunk_index}: {len(serialized_records)} messages "
+                          f"({writer.count} total, {writer.count / elapsed:,.0f} msg/s)")
+            preprocess_stage.add(bytes_read=instrumentation.path_size(input_file),
+                                 bytes_written=instrumentation.path_size(output_file))
+    except json.JSONDecodeError as e:
+        print(f"Error decoding JSON from '{input_file}': {e}")
+        return
+    print(f"Finished preprocessing {writer.count} messages in {time.perf_counter() - start_time:.1f}s. "
+          f"Output saved to {output_file}")
+
 if __name__ == '__main__':
-    preprocess_telegram_data(COMBINED_RAW_JSON_FILE, PREPROCESSED_JSON_FILE)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Clean and normalize scraped Amharic Telegram messages.")
+    parser.add_argument('--input', default=COMBINED_RAW_JSON_FILE, help="Raw messages (JSON array, JSONL or Parquet dataset).")
+    parser.add_argument('--output', default=PREPROCESSED_JSON_FILE,
+                        help="Output path; a .jsonl extension writes JSONL, .parquet a partitioned Parquet dataset.")
+    parser.add_argument('--stream', action='store_true', help="Process records one at a time with constant memory.")
+    parser.add_argument('--workers', type=int, default=1, help="Worker processes for cleaning (implies --stream when > 1).")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Messages per chunk in streaming mode.")
+    instrumentation.add_report_args(parser)
+    args = parser.parse_args()
+
+    with instrumentation.run_from_args('preprocess', args):
+        if args.stream or args.workers > 1 or is_parquet_path(args.input) or is_parquet_path(args.output):
+            stream_preprocess_telegram_data(args.input, args.output, workers=args.workers, chunk_size=args.chunk_size)
+        else:
+            preprocess_telegram_data(args.input, args.output)
\ No newline at end of file
@@ -0,0 +1,273 @@
+# EthioMart_NER_Project/scripts/preprocessing/near_duplicates.py
+
+import argparse
+import hashlib
+import os
+import sys
+
+import numpy as np
+
+# Add the project root to the Python path to import config
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import config # Import configuration from config.py
+from scripts.data_io.message_stream import iter_records, open_record_writer
+
+PREPROCESSED_JSON_FILE = os.path.join(config.PREPROCESSED_DATA_DIR, config.PREPROCESSED_MESSAGES_FILE)
+
+# --- Near-Duplicate Message Detection (MinHash + LSH) ---
+# Vendors repost the same ad with small edits (a new price, different emojis), and
+# channels forward each other's posts. Each record is tagged with `dup_cluster_id`,
+# the message key ('channel_id/id') of the first record of its duplicate cluster,
+# so `dup_cluster_id == message_key(record)` marks the representative to keep. The
+# key does not depend on record order, so the tags survive a Parquet round trip
+# (read back grouped by channel/month); records without an id fall back to
+# '#<position>'.
+#
+# 1. Exact duplicates: texts are lower-cased and whitespace-collapsed, then hashed;
+#    only the first text of each exact group goes on to the next steps.
+# 2. MinHash: each remaining text becomes a set of character shingles, hashed with
+#    `num_perm` multiply-shift hash functions; numpy does this for a whole chunk of
+#    texts at once (np.minimum.reduceat over the concatenated shingles).
+# 3. LSH: signatures are cut into `bands` bands. Texts whose band values collide
+#    (found by sorting the band keys, not by all-pairs comparison) are candidates.
+# 4. Verification: a candidate pair is merged (union-find) only if the fraction of
+#    equal MinHash values, an estimate of shingle Jaccard similarity, reaches
+#    `threshold`.
+
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_NUM_PERM = 64
+DEFAULT_BANDS = 16
+DEFAULT_SHINGLE_SIZE = 5
+SIGNATURE_CHUNK_SIZE = 5000 # Texts hashed per numpy batch
+_MASK32 = np.uint64(0xFFFFFFFF)
+_SHINGLE_BASE = np.uint64(1000003)
+
+
+def normalize_for_dedup(text):
+    """Lower-cases and collapses whitespace; the form compared for duplicates."""
+    return ' '.join((text or "").lower().split())
+
+
+def _exact_hash(text):
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest()
+
+
+class NearDuplicateIndex:
+    """Accumulates texts chunk by chunk and clusters exact and near duplicates.
+
+    Memory is one 8-byte hash per text plus one MinHash signature
+    (`num_perm` uint32 values) per exact-unique text; the texts themselves are
+    not kept, so callers can stream millions of records through `add`.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, num_perm=DEFAULT_NUM_PERM, bands=DEFAULT_BANDS,
+                 shingle_size=DEFAULT_SHINGLE_SIZE, seed=1):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands}).")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        # Multiply-shift hashing of 32-bit keys: ((a * x + b) mod 2^64) >> 32
+        self._a = rng.integers(1, 2**63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 2**63, size=num_perm, dtype=np.uint64)
+        self._band_multipliers = rng.integers(1, 2**63, size=num_perm // bands, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._first_by_hash = {} # exact hash -> position of its first text
+        self._exact_parent = [] # position -> position of its exact-group representative
+        self._signatures = [] # chunks of (n, num_perm) uint32 arrays, one row per exact-unique text
+        self._signature_positions = [] # position of each signature row
+
+    def __len__(self):
+        return len(self._exact_parent)
+
+    def add(self, texts):
+        """Adds a chunk of texts (in input order)."""
+        pending = []
+        for text in texts:
+            position = len(self._exact_parent)
+            normalized = normalize_for_dedup(text)
+            first = self._first_by_hash.setdefault(_exact_hash(normalized), position)
+            self._exact_parent.append(first)
+            if first == position:
+                pending.append(normalized)
+                self._signature_positions.append(position)
+            if len(pending) >= SIGNATURE_CHUNK_SIZE:
+                self._signatures.append(self.signatures(pending))
+                pending = []
+        if pending:
+            self._signatures.append(self.signatures(pending))
+
+    def signatures(self, texts):
+        """MinHash signatures (len(texts), num_perm) of already-normalized texts."""
+        k = self.shingle_size
+        # Pad short texts so every text has at least one shingle
+        texts = [text if len(text) >= k else text.ljust(k) for text in texts]
+        lengths = np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+        code_points = np.frombuffer(''.join(texts).encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+
+        # Polynomial hash of every k-character window of the concatenated texts
+        windows = len(code_points) - k + 1
+        window_hashes = np.zeros(windows, dtype=np.uint64)
+        for offset in range(k):
+            window_hashes = window_hashes * _SHINGLE_BASE + code_points[offset:offset + windows]
+        # Keep only windows that lie inside a single text
+        text_starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        shingle_counts = lengths - k + 1
+        shingle_offsets = np.concatenate(([0], np.cumsum(shingle_counts)[:-1]))
+        starts = np.repeat(text_starts - shingle_offsets, shingle_counts) + np.arange(shingle_counts.sum())
+        shingles = window_hashes[starts]
+        shingles = (shingles ^ (shingles >> np.uint64(32))) & _MASK32
+
+        signatures = np.empty((len(texts), self.num_perm), dtype=np.uint32)
+        for i in range(self.num_perm):
+            hashed = (self._a[i] * shingles + self._b[i]) >> np.uint64(32)
+            signatures[:, i] = np.minimum.reduceat(hashed, shingle_offsets)
+        return signatures
+
+    def _candidate_pairs(self, signatures):
+        """(left, right) row indices of texts sharing at least one LSH band."""
+        rows = self.num_perm // self.bands
+        lefts, rights = [], []
+        for band in range(self.bands):
+            block = signatures[:, band * rows:(band + 1) * rows].astype(np.uint64)
+            keys = (block * self._band_multipliers).sum(axis=1) # wraps mod 2^64
+            order = np.argsort(keys, kind='stable')
+            sorted_keys = keys[order]
+            # Link every member of a bucket to the bucket's first (lowest-row) member
+            new_bucket = np.empty(len(order), dtype=bool)
+            new_bucket[0] = True
+            new_bucket[1:] = sorted_keys[1:] != sorted_keys[:-1]
+            bucket_heads = order[np.flatnonzero(new_bucket)]
+            heads = np.repeat(bucket_heads, np.diff(np.append(np.flatnonzero(new_bucket), len(order))))
+            linked = ~new_bucket
+            lefts.append(heads[linked])
+            rights.append(order[linked])
+        if not lefts:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        pairs = np.unique(np.stack([np.concatenate(lefts), np.concatenate(rights)], axis=1), axis=0)
+        return pairs[:, 0], pairs[:, 1]
+
+    def _verified(self, signatures, left, right, batch=200000):
+        """Mask of candidate pairs whose estimated Jaccard similarity reaches the threshold."""
+        keep = np.empty(len(left), dtype=bool)
+        for start in range(0, len(left), batch):
+            stop = start + batch
+            similarity = (signatures[left[start:stop]] == signatures[right[start:stop]]).mean(axis=1)
+            keep[start:stop] = similarity >= self.threshold
+        return keep
+
+    def cluster_ids(self):
+        """Returns an int64 array: for each position, the position of its cluster representative."""
+        exact_parent = np.asarray(self._exact_parent, dtype=np.int64)
+        if not len(exact_parent):
+            return exact_parent
+        signatures = np.concatenate(self._signatures) if self._signatures else np.empty((0, self.num_perm), np.uint32)
+        left, right = self._candidate_pairs(signatures) if len(signatures) > 1 else (np.empty(0, np.int64),) * 2
+        keep = self._verified(signatures, left, right)
+
+        # Union-find over signature rows; rows follow input order, so the smallest
+        # row of a cluster is its earliest record
+        parent = list(range(len(signatures)))
+
+        def find(row):
+            while parent[row] != row:
+                parent[row] = parent[parent[row]]
+                row = parent[row]
+            return row
+
+        for a, b in zip(left[keep].tolist(), right[keep].tolist()):
+            root_a, root_b = find(a), find(b)
+            if root_a != root_b:
+                parent[max(root_a, root_b)] = min(root_a, root_b)
+        roots = np.fromiter((find(row) for row in range(len(parent))), dtype=np.int64, count=len(parent))
+
+        row_positions = np.asarray(self._signature_positions, dtype=np.int64)
+        row_of_position = np.empty(len(exact_parent), dtype=np.int64)
+        row_of_position[row_positions] = np.arange(len(row_positions))
+        return row_positions[roots[row_of_position[exact_parent]]]
+
+
+def find_duplicate_clusters(texts, **kwargs):
+    """Cluster ids (representative positions) for a list of texts; see NearDuplicateIndex."""
+    index = NearDuplicateIndex(**kwargs)
+    index.add(texts)
+    return index.cluster_ids()
+
+
+def record_text(record, text_field='cleaned_text'):
+    """Text compared for a record: `text_field`, falling back to the raw message."""
+    text = record.get(text_field)
+    return text if text is not None else record.get('message') or ""
+
+
+def message_key(record, position):
+    """Order-independent key of a record: 'channel_id/id', or '#position' without both."""
+    if record.get('channel_id') is None or record.get('id') is None:
+        return f"#{position}"
+    return f"{record['channel_id']}/{record['id']}"
+
+
+def is_representative(record, position):
+    """True for the record a duplicate cluster keeps (records must be tagged)."""
+    return record.get('dup_cluster_id') == message_key(record, position)
+
+
+def tag_duplicates(records, text_field='cleaned_text', **kwargs):
+    """Adds 'dup_cluster_id' to every record (in place) and returns the list."""
+    records = list(records)
+    cluster_ids = find_duplicate_clusters([record_text(record, text_field) for record in records], **kwargs)
+    keys = [message_key(record, position) for position, record in enumerate(records)]
+    for record, cluster_id in zip(records, cluster_ids.tolist()):
+        record['dup_cluster_id'] = keys[cluster_id]
+    return records
+
+
+def keep_representatives(records):
+    """Yields only the first record of each duplicate cluster (records must be tagged)."""
+    for position, record in enumerate(records):
+        if is_representative(record, position):
+            yield record
+
+
+def dedup_file(input_file, output_file, unique=False, text_field='cleaned_text', chunk_size=SIGNATURE_CHUNK_SIZE, **kwargs):
+    """Streams a message file twice: once to cluster, once to write tagged records.
+
+    With unique=True only cluster representatives are written.
+    """
+    index = NearDuplicateIndex(**kwargs)
+    chunk = []
+    for record in iter_records(input_file):
+        chunk.append(record_text(record, text_field))
+        if len(chunk) >= chunk_size:
+            index.add(chunk)
+            chunk = []
+    index.add(chunk)
+    cluster_ids = index.cluster_ids()
+    num_clusters = int((cluster_ids == np.arange(len(cluster_ids))).sum())
+    print(f"Found {num_clusters} distinct messages among {len(cluster_ids)} "
+          f"({len(cluster_ids) - num_clusters} exact or near duplicates).")
+
+    representative_keys = {} # Position -> key; a representative comes before its duplicates
+    with open_record_writer(output_file) as writer:
+        for position, record in enumerate(iter_records(input_file)):
+            cluster_id = int(cluster_ids[position])
+            if cluster_id == position:
+                representative_keys[position] = message_key(record, position)
+            elif unique:
+                continue
+            record['dup_cluster_id'] = representative_keys[cluster_id]
+            writer.write(record)
+    print(f"Wrote {writer.count} {'representative' if unique else 'tagged'} records to {output_file}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Tag exact and near-duplicate messages with a dup_cluster_id.")
+    parser.add_argument('--input', default=PREPROCESSED_JSON_FILE, help="Messages (JSON array, JSONL or Parquet dataset).")
+    parser.add_argument('--output', required=True, help="Output path; a .jsonl extension writes JSONL.")
+    parser.add_argument('--unique', action='store_true', help="Write only one representative per cluster.")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help="Minimum estimated Jaccard similarity.")
+    parser.add_argument('--text-field', default='cleaned_text', help="Record field to compare.")
+    args = parser.parse_args()
+
+    dedup_file(args.input, args.output, unique=args.unique, text_field=args.text_field, threshold=args.threshold)
@@ -0,0 +1,236 @@
+# EthioMart_NER_Project/scripts/preprocessing/rule_based_extractor.py
+
+import argparse
+import json
+import os
+import re
+import string
+import sys
+from collections import Counter, namedtuple
+
+# Add the project root to the Python path to import project modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+from scripts.preprocessing.amharic_preprocessing import AMHARIC_PUNCTUATION, AMHARIC_STOP_WORDS
+from scripts.profiling import instrumentation
+
+# --- Rule-Based Fast Path for PRICE and Contact Spans ---
+# Most posts state their price in a handful of fixed shapes ("ዋጋ 2500 ብር",
+# "2,500 ብር", "5000ETB", "፭ ሺህ ብር") and end with a phone number. Those spans are
+# found here with one compiled regex in a single left-to-right pass, before the
+# transformer runs:
+# 1. PRICE spans follow docs/annotation_guideline.md: amount, multiplier and
+#    currency are labeled, a leading "ዋጋ"/"ዋጋው" is not. A bare number counts only
+#    with a currency word or a price prefix (it could be a quantity or a date).
+# 2. Ge'ez numerals (፩-፻) and ሺህ/ሚሊዮን multipliers are converted to a 'value'.
+# 3. CONTACT spans (Ethiopian mobile numbers, Telegram handles and links) are not
+#    a model label; they are returned for routing and for downstream use.
+# 4. route() decides per message: 'skip' the model when nothing but rule spans and
+#    known non-entity words remain, 'shorten' the model input by cutting the rule
+#    spans out, or run the 'full' text when no rule matched.
+
+PRICE_PREFIXES = ['ዋጋ', 'ዋጋው', 'ዋጋዉ', 'price', 'Price', 'PRICE']
+CURRENCY_WORDS = ['ብር', 'ብ/ር', 'birr', 'Birr', 'BIRR', 'ETB', 'etb', 'Br', 'br']
+MULTIPLIERS = {'ሺህ': 1000, 'ሺሕ': 1000, 'ሺ': 1000, 'thousand': 1000, 'k': 1000, 'K': 1000,
+               'ሚሊዮን': 1000000, 'million': 1000000}
+GEEZ_NUMERALS = {
+    '፩': 1, '፪': 2, '፫': 3, '፬': 4, '፭': 5, '፮': 6, '፯': 7, '፰': 8, '፱': 9,
+    '፲': 10, '፳': 20, '፴': 30, '፵': 40, '፶': 50, '፷': 60, '፸': 70, '፹': 80, '፺': 90, '፻': 100,
+}
+# Words never labeled as an entity; with AMHARIC_STOP_WORDS they decide the 'skip' route
+OUTSIDE_WORDS = frozenset(PRICE_PREFIXES) | {
+    'ስልክ', 'ቁጥር', 'ይደውሉ', 'ይደውሉልን', 'አድራሻ', 'አድራሻችን', 'ለማዘዝ', 'ለበለጠ', 'መረጃ', 'በቅናሽ', 'ቅናሽ',
+    'ኦሪጅናል', 'ጥራት', 'ያለው', 'አዲስ', 'እቃ', 'ምርት', 'ያዙ', 'ይዘዙ', 'inbox', 'Inbox', 'Delivery', 'delivery',
+    'FREE', 'Free', 'free', 'Call', 'call',
+}
+ROUTE_SKIP, ROUTE_SHORTEN, ROUTE_FULL = 'skip', 'shorten', 'full'
+# Stripped from both ends of a token before the OUTSIDE_WORDS check ('ዋጋ፦', 'Price:')
+TOKEN_PUNCTUATION = ''.join(AMHARIC_PUNCTUATION) + string.punctuation
+
+
+def _alternation(words):
+    """Regex alternation of literal words, longest first so prefixes do not win."""
+    return '|'.join(re.escape(word) for word in sorted(words, key=len, reverse=True))
+
+
+_NUMBER = r'\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?|[፩-፻]+'
+_PHONE = r'(?:(?:\+|00)?251[\s-]?|0)[79]\d{2}[\s-]?\d{3}[\s-]?\d{3}'
+_HANDLE = r'@[A-Za-z][A-Za-z0-9_]{4,31}|(?:https?://)?t\.me/[A-Za-z0-9_/+]+'
+RULE_PATTERN = re.compile(
+    rf'(?<![\w+])(?P<contact>{_PHONE}|{_HANDLE})(?![\w])'
+    rf'|(?<![\w.,])(?:(?P<prefix>{_alternation(PRICE_PREFIXES)})\s*[:፡፦-]?\s*)?'
+    rf'(?!(?:{_PHONE})(?![\w]))(?P<amount>{_NUMBER})(?:\s*(?P<multiplier>{_alternation(MULTIPLIERS)}))?'
+    rf'(?:\s*(?P<currency>{_alternation(CURRENCY_WORDS)}))?(?![\w])'
+)
+
+
+def geez_to_int(numeral):
+    """Value of a Ge'ez numeral string, e.g. '፲፭' -> 15, '፲፪፻፴፬' -> 1234."""
+    total = current = 0
+    for char in numeral:
+        value = GEEZ_NUMERALS[char]
+        if value == 100:
+            total += (current or 1) * 100
+            current = 0
+        else:
+            current += value
+    return total + current
+
+
+def parse_amount(amount, multiplier=None):
+    """Numeric value of a matched amount ('2,500', '2.5', '፭') times its multiplier."""
+    if amount[0] in GEEZ_NUMERALS:
+        value = float(geez_to_int(amount))
+    else:
+        value = float(amount.replace(',', ''))
+    return value * MULTIPLIERS.get(multiplier, 1)
+
+
+def extract_rule_entities(text):
+    """High-confidence PRICE and CONTACT spans of a text, in one pass.
+
+    Returns entity dicts in the engine's format ('entity_group', 'score', 'word',
+    'start', 'end'); PRICE spans also carry the parsed 'value'.
+    """
+    entities = []
+    for match in RULE_PATTERN.finditer(text or ''):
+        if match.group('contact'):
+            start, end = match.span('contact')
+            entities.append({'entity_group': 'CONTACT', 'score': 1.0, 'word': text[start:end], 'start': start, 'end': end})
+            continue
+        if not (match.group('currency') or match.group('prefix')):
+            continue # Just a number
+        start = match.start('amount')
+        end = match.end()
+        entities.append({
+            'entity_group': 'PRICE', 'score': 1.0, 'word': text[start:end], 'start': start, 'end': end,
+            'value': parse_amount(match.group('amount'), match.group('multiplier'))
+        })
+    return entities
+
+
+def learn_outside_words(sentences, min_count=3):
+    """Words labeled 'O' at least `min_count` times and never part of an entity in CoNLL sentences."""
+    outside, inside = Counter(), set()
+    for sentence in sentences:
+        for token, tag in zip(sentence['tokens'], sentence['ner_tags']):
+            if tag == 'O':
+                outside[token] += 1
+            else:
+                inside.add(token)
+    return {token for token, count in outside.items() if count >= min_count and token not in inside}
+
+
+Route = namedtuple('Route', ['action', 'entities', 'model_text', 'offsets'])
+Route.__doc__ = """Routing decision for one message.
+
+action: 'skip', 'shorten' or 'full'. entities: the rule spans. model_text: text
+for the model (None when skipped). offsets: (model_start, original_start, length)
+for each piece of model_text, used to map model spans back.
+"""
+
+
+class RuleRouter:
+    """Runs the rule pass and decides how much of each message the model still has to see."""
+
+    def __init__(self, outside_words=None):
+        self.outside_words = frozenset(OUTSIDE_WORDS if outside_words is None else outside_words) | AMHARIC_STOP_WORDS
+
+    def _needs_model(self, token):
+        # Punctuation, emoji and bare numbers are never a PRODUCT or LOC on their own
+        word = token.strip(TOKEN_PUNCTUATION)
+        return word not in self.outside_words and any(char.isalpha() for char in word)
+
+    def route(self, text):
+        entities = extract_rule_entities(text)
+        if not entities:
+            tokens = (text or '').split()
+            if any(self._needs_model(token) for token in tokens):
+                return Route(ROUTE_FULL, [], text, [(0, 0, len(text))])
+            return Route(ROUTE_SKIP, [], None, [])
+
+        # Whitespace tokens outside every rule span, with their original offsets
+        pieces, previous_end = [], 0
+        for entity in entities + [{'start': len(text), 'end': len(text)}]:
+            for token in re.finditer(r'\S+', text[previous_end:entity['start']]):
+                pieces.append((token.group(), previous_end + token.start()))
+            previous_end = entity['end']
+        if not any(self._needs_model(token) for token, _ in pieces):
+            return Route(ROUTE_SKIP, entities, None, [])
+
+        model_text, offsets = '', []
+        for token, original_start in pieces:
+            if model_text:
+                model_text += ' '
+            offsets.append((len(model_text), original_start, len(token)))
+            model_text += token
+        return Route(ROUTE_SHORTEN, entities, model_text, offsets)
+
+    @staticmethod
+    def _to_original(text, offsets, start, end):
+        """Original (start, end) spans of model_text[start:end]; split wherever a rule span was cut out."""
+        spans = []
+        for model_start, original_start, length in offsets:
+            if model_start >= end:
+                break
+            if model_start + length <= start:
+                continue
+            piece_start = original_start + max(start - model_start, 0)
+            piece_end = original_start + min(end - model_start, length)
+            if spans and not text[spans[-1][1]:piece_start].strip():
+                spans[-1] = (spans[-1][0], piece_end) # Neighbours in the original text too
+            else:
+                spans.append((piece_start, piece_end))
+        return spans
+
+    def merge(self, text, route, model_entities):
+        """Rule spans plus the model's spans mapped back to `text`, ordered by start."""
+        merged = list(route.entities)
+        for entity in model_entities:
+            if route.action == ROUTE_FULL:
+                merged.append(entity)
+                continue
+            for start, end in self._to_original(text, route.offsets, entity['start'], entity['end']):
+                merged.append(dict(entity, start=start, end=end, word=text[start:end]))
+        return sorted(merged, key=lambda entity: entity['start'])
+
+
+class RuleRoutedExtractor:
+    """extract() wrapper that sends only what the rules cannot settle to the model.
+
+    Same interface as NerInferenceEngine and CachedNerExtractor, so it can wrap
+    either. With include_contacts=False (the default) CONTACT spans are dropped
+    from the results, which then contain only the model's labels.
+    """
+
+    def __init__(self, extractor, router=None, include_contacts=False):
+        self.extractor = extractor
+        self.router = router or RuleRouter()
+        self.include_contacts = include_contacts
+        self.routes = Counter()
+
+    @instrumentation.timed('rules.extract')
+    def extract(self, texts, batch_size=None):
+        routes = [self.router.route(text) for text in texts]
+        self.routes.update(route.action for route in routes)
+        to_model = [i for i, route in enumerate(routes) if route.action != ROUTE_SKIP]
+        model_results = self.extractor.extract([routes[i].model_text for i in to_model], batch_size=batch_size) if to_model else []
+        model_entities = dict(zip(to_model, model_results))
+        results = []
+        for i, (text, route) in enumerate(zip(texts, routes)):
+            entities = self.router.merge(text, route, model_entities.get(i, []))
+            if not self.include_contacts:
+                entities = [entity for entity in entities if entity['entity_group'] != 'CONTACT']
+            results.append(entities)
+        return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Show the rule-based PRICE/CONTACT spans and routing of messages.")
+    parser.add_argument('texts', nargs='*', help="Messages to check (default: a few examples).")
+    args = parser.parse_args()
+
+    router = RuleRouter()
+    for text in args.texts or ["ዋጋ 2,500 ብር 0911 234 567", "፭ ሺህ ብር @shop_addis", "የሴቶች ቦርሳ ዋጋው 1200 ብር ቦሌ", "የልጆች ቀሚስ ቦሌ"]:
+        route = router.route(text)
+        print(f"{text}\n  route: {route.action}, model input: {route.model_text!r}")
+        print(f"  {json.dumps(route.entities, ensure_ascii=False)}")
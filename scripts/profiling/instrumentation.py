@@ -0,0 +1,458 @@
+# EthioMart_NER_Project/scripts/profiling/instrumentation.py
+
+import argparse
+import contextlib
+import functools
+import inspect
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+# Add the project root to the Python path to import config
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+sys.path.insert(0, PROJECT_ROOT)
+import config # Import configuration from config.py
+
+# --- Pipeline Instrumentation (Run Reports) ---
+# Stage and function timers shared by the scraper, preprocessing, annotation
+# subset, NER and scorecard scripts. Nothing is recorded unless a run is active
+# (--report on a script, ETHIOMART_RUN_REPORT=<dir>, or run() in code):
+# 1. stage(name) times a block and collects items, bytes of data files read and
+#    written, syscall I/O (/proc/self/io) and the process peak RSS (VmHWM) when it
+#    ends. Stages opened inside another stage are reported as 'outer/inner'; a
+#    stage entered repeatedly (e.g. once per chunk) accumulates. stage() also
+#    works as a function decorator.
+# 2. @timed(name) records calls and seconds of a function (sync or async).
+# 3. count(items=...) adds to the innermost open stage, e.g. once per page.
+# 4. With a profile interval, a thread samples the stack of the instrumented
+#    thread and the report gets the hottest frames plus a '.folded' file
+#    (flamegraph.pl / speedscope input).
+# When no run is active, stage() yields a no-op handle and timed()/count() cost
+# one global lookup per call, so the hooks stay in the code permanently. Put them
+# at page/chunk/batch level, not inside per-character loops.
+
+RUN_REPORTS_DIR = os.path.join(PROJECT_ROOT, config.RUN_REPORTS_DIR)
+REPORT_DIR_ENV = 'ETHIOMART_RUN_REPORT' # Directory; enables reports for any instrumented script
+PROFILE_INTERVAL_ENV = 'ETHIOMART_PROFILE_INTERVAL' # Seconds between stack samples
+TOP_FRAMES = 25
+
+_run = None # The active RunRecorder; None means instrumentation is off
+
+
+def _proc_status_mb(field):
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far (VmHWM; ru_maxrss off Linux)."""
+    peak = _proc_status_mb('VmHWM')
+    if peak is None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+    return peak
+
+
+def io_counters():
+    """(bytes read, bytes written) by read/write syscalls of this process, or None if unavailable."""
+    try:
+        with open('/proc/self/io') as f:
+            fields = dict(line.split(':', 1) for line in f)
+        return int(fields['rchar']), int(fields['wchar'])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def path_size(path):
+    """Size in bytes of a file, or of every file under a directory (Parquet datasets); 0 if missing."""
+    if not path or not os.path.exists(path):
+        return 0
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def git_commit():
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT,
+                                capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+class StackSampler:
+    """Samples one thread's Python stack every `interval` seconds from a daemon thread.
+
+    Counts are kept per collapsed stack ('outer;...;inner'). Samples are taken
+    when the sampled thread lets go of the GIL (every few ms, or while it waits
+    in I/O or native code), so time inside torch or file reads is visible too.
+    """
+
+    def __init__(self, interval, thread_id=None, max_depth=64):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.max_depth = max_depth
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def frame_label(frame):
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+    def _sample(self):
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is None:
+            return
+        labels = []
+        while frame is not None and len(labels) < self.max_depth:
+            labels.append(self.frame_label(frame))
+            frame = frame.f_back
+        self.stacks[';'.join(reversed(labels))] += 1
+        self.samples += 1
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name='stack-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def top_frames(self, limit=TOP_FRAMES):
+        """Hottest frames by self samples (innermost frame) and inclusive samples."""
+        own, inclusive = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(';')
+            own[frames[-1]] += count
+            for frame in set(frames):
+                inclusive[frame] += count
+        total = self.samples or 1
+        return [{'frame': frame, 'self_samples': own[frame], 'self_share': own[frame] / total,
+                 'inclusive_share': inclusive[frame] / total}
+                for frame, _ in own.most_common(limit)]
+
+    def write_folded(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class _NullStage:
+    """Stage handle used when instrumentation is off."""
+
+    def add(self, items=0, bytes_read=0, bytes_written=0):
+        pass
+
+
+NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    """Handle yielded by stage(); add() accumulates into the stage's totals."""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def add(self, items=0, bytes_read=0, bytes_written=0):
+        stats = self.stats
+        stats['items'] += items
+        stats['bytes_read'] += bytes_read
+        stats['bytes_written'] += bytes_written
+
+
+class RunRecorder:
+    """Collects the stages, function timers and samples of one run and writes its report."""
+
+    def __init__(self, name, report_dir=RUN_REPORTS_DIR, sample_interval=None, params=None):
+        self.name = name
+        self.report_dir = report_dir
+        self.params = params or {}
+        self.stages = {} # 'outer/inner' -> totals, in first-entered order
+        self.functions = {} # name -> [calls, seconds]
+        self.sampler = StackSampler(sample_interval) if sample_interval else None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.started_at = datetime.now(timezone.utc)
+        self._start = time.perf_counter()
+        self._start_cpu = time.process_time()
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        stack = self._stack()
+        path = f"{stack[-1][0]}/{name}" if stack else name
+        with self._lock:
+            stats = self.stages.get(path)
+            if stats is None:
+                stats = self.stages[path] = {
+                    'calls': 0, 'seconds': 0.0, 'items': 0, 'bytes_read': 0, 'bytes_written': 0,
+                    'io_read_bytes': None, 'io_write_bytes': None, 'peak_rss_mb': None
+                }
+        handle = _Stage(stats)
+        stack.append((path, handle))
+        io_before = io_counters()
+        start = time.perf_counter()
+        try:
+            yield handle
+        finally:
+            seconds = time.perf_counter() - start
+            io_after = io_counters()
+            peak = peak_rss_mb()
+            stack.pop()
+            with self._lock:
+                stats['calls'] += 1
+                stats['seconds'] += seconds
+                if io_before and io_after:
+                    stats['io_read_bytes'] = (stats['io_read_bytes'] or 0) + io_after[0] - io_before[0]
+                    stats['io_write_bytes'] = (stats['io_write_bytes'] or 0) + io_after[1] - io_before[1]
+                stats['peak_rss_mb'] = max(stats['peak_rss_mb'] or 0.0, peak)
+
+    def current_stage(self):
+        stack = self._stack()
+        return stack[-1][1] if stack else NULL_STAGE
+
+    def add_call(self, name, seconds):
+        with self._lock:
+            totals = self.functions.get(name)
+            if totals is None:
+                totals = self.functions[name] = [0, 0.0]
+            totals[0] += 1
+            totals[1] += seconds
+
+    def report(self):
+        """The run report as a JSON-serializable dict."""
+        wall_seconds = time.perf_counter() - self._start
+        stages = []
+        for path, stats in self.stages.items():
+            children = [other for other in self.stages if other.startswith(path + '/') and '/' not in other[len(path) + 1:]]
+            stages.append(dict(
+                stats, name=path,
+                self_seconds=stats['seconds'] - sum(self.stages[child]['seconds'] for child in children),
+                items_per_second=stats['items'] / stats['seconds'] if stats['seconds'] else None
+            ))
+        functions = [{'name': name, 'calls': calls, 'seconds': seconds, 'mean_ms': seconds / calls * 1000}
+                     for name, (calls, seconds) in sorted(self.functions.items(), key=lambda item: -item[1][1])]
+        return {
+            'run': self.name,
+            'started_at': self.started_at.isoformat(),
+            'wall_seconds': wall_seconds,
+            'cpu_seconds': time.process_time() - self._start_cpu,
+            'peak_rss_mb': peak_rss_mb(),
+            'params': self.params,
+            'git_commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'argv': sys.argv,
+            'stages': stages,
+            'functions': functions,
+            'profile': {
+                'interval': self.sampler.interval, 'samples': self.sampler.samples,
+                'top_frames': self.sampler.top_frames()
+            } if self.sampler else None
+        }
+
+    def save(self):
+        """Writes <report_dir>/<name>-<UTC timestamp>.json (and .folded with sampling); returns the JSON path."""
+        os.makedirs(self.report_dir, exist_ok=True)
+        base = os.path.join(self.report_dir, f"{self.name}-{self.started_at.strftime('%Y%m%dT%H%M%S')}")
+        report = self.report()
+        if self.sampler:
+            self.sampler.write_folded(base + '.folded')
+            report['profile']['folded_file'] = base + '.folded'
+        with open(base + '.json', 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        return base + '.json'
+
+
+def active_run():
+    return _run
+
+
+def start_run(name, report_dir=RUN_REPORTS_DIR, sample_interval=None, params=None):
+    """Turns instrumentation on for this process; returns the RunRecorder."""
+    global _run
+    if _run is not None:
+        raise RuntimeError(f"Run '{_run.name}' is already being recorded.")
+    _run = RunRecorder(name, report_dir, sample_interval, params)
+    if _run.sampler:
+        _run.sampler.start()
+    return _run
+
+
+def finish_run():
+    """Turns instrumentation off and saves the report; returns (report path, report)."""
+    global _run
+    recorder, _run = _run, None
+    if recorder is None:
+        return None, None
+    if recorder.sampler:
+        recorder.sampler.stop()
+    path = recorder.save()
+    with open(path, encoding='utf-8') as f:
+        return path, json.load(f)
+
+
+@contextlib.contextmanager
+def run(name, report_dir=RUN_REPORTS_DIR, sample_interval=None, params=None):
+    """Records everything inside the block as one run; no-op when `report_dir` is None
+    or a run is already active (a script called from an instrumented pipeline)."""
+    if report_dir is None or _run is not None:
+        yield _run
+        return
+    recorder = start_run(name, report_dir, sample_interval, params)
+    try:
+        yield recorder
+    finally:
+        path, _ = finish_run()
+        print(f"Run report saved to {path}")
+
+
+@contextlib.contextmanager
+def stage(name, items=0):
+    """Times the block as pipeline stage `name`; yields a handle with add(items, bytes_read, bytes_written)."""
+    recorder = _run
+    if recorder is None:
+        yield NULL_STAGE
+        return
+    with recorder.stage(name) as handle:
+        if items:
+            handle.add(items)
+        yield handle
+
+
+def count(items=0, bytes_read=0, bytes_written=0):
+    """Adds to the innermost open stage of this thread (no-op when off)."""
+    recorder = _run
+    if recorder is not None:
+        recorder.current_stage().add(items, bytes_read, bytes_written)
+
+
+def timed(name):
+    """Decorator recording calls and seconds of a function under `name` while a run is active."""
+    def decorate(function):
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                recorder = _run
+                if recorder is None:
+                    return await function(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return await function(*args, **kwargs)
+                finally:
+                    recorder.add_call(name, time.perf_counter() - start)
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            recorder = _run
+            if recorder is None:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                recorder.add_call(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def add_report_args(parser):
+    """Adds --report [DIR] and --profile-interval to a script's argument parser."""
+    parser.add_argument('--report', nargs='?', const=RUN_REPORTS_DIR, default=os.environ.get(REPORT_DIR_ENV) or None,
+                        metavar='DIR', help=f"Write a JSON run report (default dir: {config.RUN_REPORTS_DIR}; "
+                                            f"also enabled by {REPORT_DIR_ENV}=<dir>).")
+    parser.add_argument('--profile-interval', type=float, default=float(os.environ.get(PROFILE_INTERVAL_ENV) or 0) or None,
+                        metavar='SECONDS', help="With --report, also sample the stack every SECONDS (e.g. 0.005).")
+
+
+def run_from_args(name, args):
+    """run() configured by the arguments of add_report_args()."""
+    params = {key: value for key, value in vars(args).items() if key not in ('report', 'profile_interval')}
+    return run(name, args.report, args.profile_interval, params)
+
+
+def format_report(report):
+    """Stage and function tables of a report, as text."""
+    lines = [f"Run '{report['run']}' at {report['started_at']} (commit {report['git_commit']}): "
+             f"{report['wall_seconds']:.2f}s wall, {report['cpu_seconds']:.2f}s CPU, peak RSS {report['peak_rss_mb']:.0f} MB",
+             f"{'Stage':<32}{'Seconds':>9}{'Self':>9}{'Items':>10}{'Items/s':>11}{'Read MB':>9}{'Write MB':>9}{'Peak MB':>9}"]
+    for stage_stats in report['stages']:
+        rate = stage_stats['items_per_second']
+        lines.append(f"{stage_stats['name']:<32}{stage_stats['seconds']:>9.2f}{stage_stats['self_seconds']:>9.2f}"
+                     f"{stage_stats['items']:>10,}{(f'{rate:,.0f}' if rate else '-'):>11}"
+                     f"{stage_stats['bytes_read'] / 1e6:>9.1f}{stage_stats['bytes_written'] / 1e6:>9.1f}"
+                     f"{stage_stats['peak_rss_mb'] or 0:>9.0f}")
+    if report['functions']:
+        lines.append(f"{'Function':<36}{'Calls':>5}{'Seconds':>9}{'Mean ms':>10}")
+        for function in report['functions']:
+            lines.append(f"{function['name']:<36}{function['calls']:>5,}{function['seconds']:>9.2f}{function['mean_ms']:>10.2f}")
+    if report.get('profile'):
+        profile = report['profile']
+        lines.append(f"Hottest frames ({profile['samples']} samples every {profile['interval'] * 1000:g} ms):")
+        for frame in profile['top_frames'][:10]:
+            lines.append(f"  {frame['self_share']:>6.1%} self {frame['inclusive_share']:>6.1%} incl.  {frame['frame']}")
+    return '\n'.join(lines)
+
+
+def compare_reports(old, new):
+    """Per-stage seconds and items/s of two reports side by side, as text."""
+    old_stages = {stage_stats['name']: stage_stats for stage_stats in old['stages']}
+    lines = [f"{old['run']} {old['started_at']} ({old['git_commit']}) -> {new['run']} {new['started_at']} ({new['git_commit']})",
+             f"{'Stage':<32}{'Old s':>9}{'New s':>9}{'Change':>9}{'Old items/s':>13}{'New items/s':>13}"]
+    for stage_stats in new['stages']:
+        before = old_stages.get(stage_stats['name'])
+        if before is None:
+            lines.append(f"{stage_stats['name']:<32}{'-':>9}{stage_stats['seconds']:>9.2f}")
+            continue
+        change = stage_stats['seconds'] / before['seconds'] - 1 if before['seconds'] else 0.0
+        rates = [f"{rate:,.0f}" if rate else '-' for rate in (before['items_per_second'], stage_stats['items_per_second'])]
+        lines.append(f"{stage_stats['name']:<32}{before['seconds']:>9.2f}{stage_stats['seconds']:>9.2f}{change:>+9.1%}"
+                     f"{rates[0]:>13}{rates[1]:>13}")
+    lines.append(f"{'wall':<32}{old['wall_seconds']:>9.2f}{new['wall_seconds']:>9.2f}"
+                 f"{new['wall_seconds'] / old['wall_seconds'] - 1:>+9.1%}")
+    lines.append(f"Peak RSS: {old['peak_rss_mb']:.0f} MB -> {new['peak_rss_mb']:.0f} MB")
+    return '\n'.join(lines)
+
+
+def load_report(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Show or compare JSON run reports.")
+    parser.add_argument('reports', nargs='+', help="One report to show, or an older and a newer one to compare.")
+    args = parser.parse_args()
+
+    if len(args.reports) == 1:
+        print(format_report(load_report(args.reports[0])))
+    else:
+        print(compare_reports(load_report(args.reports[0]), load_report(args.reports[-1])))
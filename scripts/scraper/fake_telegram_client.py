@@ -0,0 +1,133 @@
+# EthioMart_NER_Project/scripts/scraper/fake_telegram_client.py
+
+import asyncio
+import bisect
+import math
+import os
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from telethon import errors
+from telethon.tl.functions.contacts import ResolveUsernameRequest
+
+# Add the project root to the Python path to import project modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+from scripts.benchmarks.synthetic_corpus import generate_message_text
+
+# --- Offline Stand-in for telethon.TelegramClient ---
+# Implements just the calls telegram_scraper.py makes (connect, get_entity,
+# GetHistoryRequest via __call__, disconnect) against synthetic channel histories,
+# with simulated network latency and a server-side request-rate limit that raises
+# real telethon FloodWaitErrors. Used to benchmark throughput and back-off offline.
+
+
+class FakeTelegramClient:
+    """Serves synthetic channel histories with Telegram-like paging semantics.
+
+    channels: {channel username: number of messages in its history}
+    latency: simulated round-trip time per request, in seconds
+    max_requests_per_second: server-side limit; requests over it get a FloodWaitError
+    flood_wait_seconds: the wait demanded by each FloodWaitError
+    resolve_flood_waits: FloodWaitErrors raised by each channel's first get_entity
+        calls (ResolveUsername is among Telegram's most flood-limited requests)
+    """
+
+    def __init__(self, channels, latency=0.05, max_requests_per_second=20.0, flood_wait_seconds=1, seed=0,
+                 resolve_flood_waits=0):
+        self.latency = latency
+        self.max_requests_per_second = max_requests_per_second
+        self.flood_wait_seconds = flood_wait_seconds
+        self.resolve_flood_waits = resolve_flood_waits
+        self._resolve_attempts = {}
+        self.requests = 0
+        self.flood_errors = 0
+        self._tokens = max_requests_per_second
+        self._last_refill = None
+        self._entities = {}
+        self._histories = {}
+        rng = random.Random(seed)
+        start_date = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        for index, (username, num_messages) in enumerate(channels.items()):
+            entity = SimpleNamespace(id=2000000 + index, title=f"Fake {username.lstrip('@')}", username=username)
+            self._entities[username] = entity
+            # Ascending ids; GetHistoryRequest returns them newest first
+            self._histories[entity.id] = [
+                SimpleNamespace(
+                    id=message_id,
+                    date=start_date + timedelta(minutes=30 * message_id),
+                    sender_id=None,
+                    message=generate_message_text(rng),
+                    views=rng.randrange(0, 20000),
+                    forwards=rng.randrange(0, 50),
+                    replies=None,
+                    media=None
+                )
+                for message_id in range(1, num_messages + 1)
+            ]
+
+    def add_messages(self, username, count, seed=1):
+        """Appends `count` newer messages to a channel (simulates new posts)."""
+        rng = random.Random(seed)
+        history = self._histories[self._entities[username].id]
+        last = history[-1] if history else None
+        for _ in range(count):
+            message_id = (last.id if last else 0) + 1
+            last = SimpleNamespace(
+                id=message_id,
+                date=datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=30 * message_id),
+                sender_id=None,
+                message=generate_message_text(rng),
+                views=rng.randrange(0, 20000),
+                forwards=0,
+                replies=None,
+                media=None
+            )
+            history.append(last)
+
+    async def connect(self):
+        return True
+
+    async def is_user_authorized(self):
+        return True
+
+    async def disconnect(self):
+        return None
+
+    async def get_entity(self, channel_id):
+        await asyncio.sleep(self.latency)
+        attempts = self._resolve_attempts.get(channel_id, 0)
+        self._resolve_attempts[channel_id] = attempts + 1
+        if attempts < self.resolve_flood_waits:
+            self.flood_errors += 1
+            raise errors.FloodWaitError(request=ResolveUsernameRequest(channel_id.lstrip('@')),
+                                        capture=math.ceil(self.flood_wait_seconds))
+        return self._entities[channel_id]
+
+    def _take_token(self, request):
+        """Token-bucket rate limit; raises FloodWaitError when the bucket is empty."""
+        now = asyncio.get_running_loop().time()
+        if self._last_refill is not None:
+            elapsed = now - self._last_refill
+            self._tokens = min(self.max_requests_per_second, self._tokens + elapsed * self.max_requests_per_second)
+        self._last_refill = now
+        if self._tokens < 1:
+            self.flood_errors += 1
+            raise errors.FloodWaitError(request=request, capture=math.ceil(self.flood_wait_seconds))
+        self._tokens -= 1
+
+    async def __call__(self, request):
+        self.requests += 1
+        self._take_token(request)
+        await asyncio.sleep(self.latency)
+        history = self._histories[request.peer.id]
+        # Newest first, strictly older than offset_id (0 = from the newest),
+        # strictly newer than min_id, at most `limit` messages.
+        end = bisect.bisect_left([message.id for message in history], request.offset_id) if request.offset_id else len(history)
+        page = []
+        for message in reversed(history[max(0, end - request.limit):end]):
+            if message.id <= request.min_id:
+                break
+            page.append(message)
+        return SimpleNamespace(messages=page)
@@ -0,0 +1,137 @@
+# EthioMart_NER_Project/scripts/scraper/scrape_state.py
+
+import json
+import os
+import re
+import sqlite3
+from datetime import datetime, timezone
+
+# --- Incremental Scrape State ---
+# Per-channel high-water marks and resume cursors, stored in SQLite next to the
+# Telethon session file, plus append-only per-channel JSONL shards. Together they
+# let a run fetch only messages newer than the last completed run and let an
+# interrupted run continue from the last page it finished.
+#
+# History is paged newest -> oldest. For each channel we keep:
+#   high_water_id    newest message id of the last *completed* run (used as min_id)
+#   resume_offset_id oldest message id written so far by an unfinished run (offset_id)
+#   pending_max_id   newest message id written by the unfinished run
+# When a run reaches the end of the channel (an empty page above min_id),
+# pending_max_id is promoted to high_water_id and the cursor is cleared.
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS channel_state (
+    channel TEXT PRIMARY KEY,
+    channel_id INTEGER,
+    high_water_id INTEGER NOT NULL DEFAULT 0,
+    resume_offset_id INTEGER,
+    pending_max_id INTEGER,
+    updated_at TEXT
+)
+"""
+
+
+class ScrapeStateStore:
+    """SQLite-backed per-channel scrape progress."""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path)
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+    def get(self, channel):
+        """Returns {'high_water_id', 'resume_offset_id', 'pending_max_id'} for a channel."""
+        row = self._conn.execute(
+            "SELECT high_water_id, resume_offset_id, pending_max_id FROM channel_state WHERE channel = ?",
+            (channel,)
+        ).fetchone()
+        if row is None:
+            return {'high_water_id': 0, 'resume_offset_id': None, 'pending_max_id': None}
+        return {'high_water_id': row[0], 'resume_offset_id': row[1], 'pending_max_id': row[2]}
+
+    def record_page(self, channel, channel_id, newest_id, oldest_id):
+        """Marks a page (already persisted to its shard) as finished."""
+        now = datetime.now(timezone.utc).isoformat()
+        with self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO channel_state (channel, channel_id, resume_offset_id, pending_max_id, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(channel) DO UPDATE SET
+                    channel_id = excluded.channel_id,
+                    resume_offset_id = excluded.resume_offset_id,
+                    pending_max_id = MAX(COALESCE(channel_state.pending_max_id, 0), excluded.pending_max_id),
+                    updated_at = excluded.updated_at
+                """,
+                (channel, channel_id, oldest_id, newest_id, now)
+            )
+
+    def complete(self, channel):
+        """Promotes the finished run's newest id to the channel's high-water mark."""
+        now = datetime.now(timezone.utc).isoformat()
+        with self._conn:
+            self._conn.execute(
+                """
+                UPDATE channel_state SET
+                    high_water_id = MAX(high_water_id, COALESCE(pending_max_id, 0)),
+                    resume_offset_id = NULL,
+                    pending_max_id = NULL,
+                    updated_at = ?
+                WHERE channel = ?
+                """,
+                (now, channel)
+            )
+
+    def completed_marks(self):
+        """{numeric channel id: high_water_id} of every channel the scraper has seen."""
+        rows = self._conn.execute("SELECT channel_id, high_water_id FROM channel_state WHERE channel_id IS NOT NULL")
+        return {channel_id: high_water_id for channel_id, high_water_id in rows}
+
+    def reset(self, channel=None):
+        """Forgets progress for one channel, or for all channels."""
+        with self._conn:
+            if channel is None:
+                self._conn.execute("DELETE FROM channel_state")
+            else:
+                self._conn.execute("DELETE FROM channel_state WHERE channel = ?", (channel,))
+
+    def close(self):
+        self._conn.close()
+
+
+def shard_path(shards_dir, channel):
+    """Per-channel JSONL shard path, e.g. '@ZemenExpress' -> <dir>/ZemenExpress.jsonl."""
+    name = re.sub(r'[^A-Za-z0-9_.-]+', '_', channel.lstrip('@')) or 'channel'
+    return os.path.join(shards_dir, f"{name}.jsonl")
+
+
+def repair_shard(path):
+    """Drops a trailing partial line left by a crash in the middle of a write."""
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb+') as f:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        position = end
+        while position > 0:
+            step = min(4096, position)
+            f.seek(position - step)
+            block = f.read(step)
+            newline = block.rfind(b'\n')
+            if newline != -1:
+                position = position - step + newline + 1
+                break
+            position -= step
+        if position != end:
+            f.truncate(position)
+
+
+def append_to_shard(path, records):
+    """Appends records to a JSONL shard and forces them to disk."""
+    with open(path, 'a', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write('\n')
+        f.flush()
+        os.fsync(f.fileno())
@@ -8,20 +8,26 @@ from telethon.tl.types import (
     MessageMediaDocument,
     MessageMediaPhoto
 )
+from telethon import errors
+import argparse
 import asyncio
 import os
-import json
 from datetime import datetime
 import sys
 
 # Add the project root to the Python path to import config
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 import config # Import configuration from config.py
+from scripts.data_io.message_stream import iter_records, open_record_writer
+from scripts.profiling import instrumentation
+from scripts.scraper.scrape_state import ScrapeStateStore, append_to_shard, repair_shard, shard_path
 
 # --- Configuration (loaded from config.py) ---
-API_ID = config.API_ID
-API_HASH = config.API_HASH
-PHONE_NUMBER = config.PHONE_NUMBER
+# Credentials are read lazily so the scraping logic can be imported (e.g. by the
+# offline benchmark) before they have been filled in.
+API_ID = getattr(config, 'API_ID', None)
+API_HASH = getattr(config, 'API_HASH', None)
+PHONE_NUMBER = getattr(config, 'PHONE_NUMBER', None)
 SESSION_NAME = config.SESSION_NAME
 
 # List of Telegram channel usernames or links to scrape
@@ -42,124 +48,320 @@ CHANNELS = [
 COMBINED_RAW_JSON_PATH = os.path.join(config.PREPROCESSED_DATA_DIR, config.COMBINED_RAW_MESSAGES_FILE)
 # Directory for Telethon session files
 RAW_DATA_SESSION_DIR = config.RAW_DATA_DIR
+# Incremental scrape state and per-channel JSONL shards
+SCRAPE_STATE_DB_PATH = config.SCRAPE_STATE_DB
+RAW_SHARDS_DIR = config.RAW_SHARDS_DIR
 
 # Ensure output directories exist
 os.makedirs(os.path.dirname(COMBINED_RAW_JSON_PATH), exist_ok=True)
 os.makedirs(RAW_DATA_SESSION_DIR, exist_ok=True)
+os.makedirs(RAW_SHARDS_DIR, exist_ok=True)
 
+# Number of channels scraped at the same time on the shared client
+DEFAULT_CONCURRENCY = 3
+PAGE_LIMIT = 100 # Max limit per API call, pagination handles fetching all
+# Shortest gap between requests; the limiter never speeds up beyond ~20 requests/sec
+MIN_REQUEST_INTERVAL = 0.05
 
-async def connect_and_scrape():
-    client = TelegramClient(os.path.join(RAW_DATA_SESSION_DIR, SESSION_NAME), API_ID, API_HASH)
 
+class AdaptiveRateLimiter:
+    """Paces GetHistoryRequest calls shared by all channel tasks on one client.
+
+    Requests are spaced `interval` seconds apart. Every successful call shrinks
+    the interval towards `min_interval`; a FloodWaitError blocks all tasks for
+    the number of seconds Telegram asks for and multiplies the interval by
+    `backoff_factor` (up to `max_interval`), so the scraper settles just below
+    the server's limit instead of sleeping a fixed second after every page.
+    """
+
+    def __init__(self, initial_interval=0.1, min_interval=MIN_REQUEST_INTERVAL, max_interval=10.0,
+                 backoff_factor=2.0, recovery_factor=0.8, max_retries=5):
+        self.interval = initial_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff_factor = backoff_factor
+        self.recovery_factor = recovery_factor
+        self.max_retries = max_retries
+        self.requests = 0
+        self.flood_waits = 0
+        self.flood_wait_seconds = 0
+        self._next_slot = 0.0
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Waits for this task's request slot."""
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            slot = max(loop.time(), self._next_slot, self._blocked_until)
+            self._next_slot = slot + self.interval
+        delay = slot - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        # A flood wait reported while we were sleeping pushes this request back too
+        while loop.time() < self._blocked_until:
+            await asyncio.sleep(self._blocked_until - loop.time())
+
+    def on_success(self):
+        self.interval = max(self.min_interval, self.interval * self.recovery_factor)
+
+    def on_flood_wait(self, seconds):
+        loop = asyncio.get_running_loop()
+        self.flood_waits += 1
+        self.flood_wait_seconds += seconds
+        self._blocked_until = max(self._blocked_until, loop.time() + seconds)
+        self.interval = min(self.max_interval, max(self.interval, self.min_interval, MIN_REQUEST_INTERVAL) * self.backoff_factor)
+
+    async def call(self, make_request):
+        """Runs `make_request()` (a coroutine factory), retrying after flood waits."""
+        for attempt in range(self.max_retries + 1):
+            await self.acquire()
+            self.requests += 1
+            try:
+                result = await make_request()
+            except errors.FloodWaitError as e:
+                self.on_flood_wait(e.seconds)
+                print(f"  Flood wait of {e.seconds}s requested; request interval now {self.interval:.2f}s.")
+                if attempt == self.max_retries:
+                    raise
+                continue
+            self.on_success()
+            return result
+
+
+def message_to_dict(message, entity):
+    """Converts a Telethon message into the record format stored on disk."""
+    message_data = {
+        'id': message.id,
+        'channel_id': entity.id, # Include channel ID for traceability
+        'channel_name': entity.title, # Include channel name for traceability
+        'date': message.date.isoformat(),
+        'sender_id': message.sender_id,
+        'message': message.message,
+        'views': message.views,
+        'forwards': message.forwards,
+        'replies_count': message.replies.replies if message.replies else 0,
+        'media_type': None,
+        'file_name': None,
+        'file_path': None # This will remain None as files are not downloaded
+    }
+
+    # Handle media (images, documents) - ONLY RECORD METADATA, DO NOT DOWNLOAD
+    if message.media:
+        message_data['media_type'] = type(message.media).__name__
+
+        if isinstance(message.media, MessageMediaDocument) and message.media.document:
+            found_filename = False
+            for attr in message.media.document.attributes:
+                if isinstance(attr, DocumentAttributeFilename):
+                    message_data['file_name'] = attr.file_name
+                    found_filename = True
+                    break
+                elif isinstance(attr, DocumentAttributeVideo):
+                    message_data['media_type'] = 'VideoDocument' # More specific type
+                    # You could add message_data['video_duration'] = attr.duration, etc. if needed
+            if not found_filename:
+                # If no specific filename attribute, assign a generic name
+                message_data['file_name'] = 'unknown_document_file'
+
+            message_data['file_path'] = "Not Downloaded (document/video)"
+
+        elif isinstance(message.media, MessageMediaPhoto):
+            message_data['media_type'] = 'Photo'
+            message_data['file_name'] = f"photo_{message.id}.jpg" # Assign a generic name for photos
+            message_data['file_path'] = "Not Downloaded (photo)"
+        else:
+            # Catch any other unhandled media types (e.g., sticker, gif)
+            pass
+
+    return message_data
+
+
+@instrumentation.timed('scraper.scrape_channel')
+async def scrape_channel(client, channel_id, limiter, on_page, min_id=0, offset_id=0):
+    """Pages through one channel's history, newest first.
+
+    Only messages newer than `min_id` are fetched, starting below `offset_id`
+    (0 = from the newest message). `on_page(channel_id, entity, records)` is
+    called with the converted records of every page as soon as it arrives.
+    Returns the number of messages fetched.
+    """
+    print(f"\nScraping channel: {channel_id}" + (f" (messages newer than {min_id})" if min_id else ""))
+    # Resolving a username is itself flood-limited; it goes through the limiter too
+    entity = await limiter.call(lambda: client.get_entity(channel_id))
+    channel_messages_count = 0 # To track messages fetched for current channel
+
+    while True:
+        history = await limiter.call(lambda: client(GetHistoryRequest(
+            peer=entity,
+            offset_id=offset_id,
+            offset_date=None,
+            add_offset=0,
+            limit=PAGE_LIMIT,
+            max_id=0,
+            min_id=min_id,
+            hash=0
+        )))
+        messages = history.messages
+        if not messages:
+            break
+
+        on_page(channel_id, entity, [message_to_dict(message, entity) for message in messages])
+
+        offset_id = messages[-1].id
+        channel_messages_count += len(messages)
+        print(f"  Fetched {len(messages)} messages. Total for {entity.title}: {channel_messages_count}")
+
+    print(f"Finished scraping {channel_messages_count} messages from {entity.title}")
+    return channel_messages_count
+
+
+async def scrape_channels(client, channels, on_page, concurrency=DEFAULT_CONCURRENCY, limiter=None, state=None):
+    """Scrapes `channels` as concurrent tasks on one client.
+
+    At most `concurrency` channels are in flight; all of them share one
+    AdaptiveRateLimiter. With a ScrapeStateStore, each channel starts from
+    its saved high-water mark / resume cursor, every page is recorded after
+    `on_page` has persisted it, and the mark advances once the channel is
+    complete. A failing channel is reported and does not stop the others.
+    Returns {channel: messages fetched, or None on error}.
+    """
+    limiter = limiter or AdaptiveRateLimiter()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    def on_page_with_state(channel_id, entity, records):
+        on_page(channel_id, entity, records)
+        state.record_page(channel_id, entity.id, newest_id=records[0]['id'], oldest_id=records[-1]['id'])
+
+    async def run(channel_id):
+        async with semaphore:
+            try:
+                if state is None:
+                    return await scrape_channel(client, channel_id, limiter, on_page)
+                progress = state.get(channel_id)
+                count = await scrape_channel(
+                    client, channel_id, limiter, on_page_with_state,
+                    min_id=progress['high_water_id'],
+                    offset_id=progress['resume_offset_id'] or 0
+                )
+                state.complete(channel_id)
+                return count
+            except Exception as e:
+                print(f"Error scraping channel {channel_id}: {e}")
+                return None
+
+    counts = await asyncio.gather(*(run(channel_id) for channel_id in channels))
+    return dict(zip(channels, counts))
+
+
+def combine_shards(channels, shards_dir, output_path):
+    """Streams every channel shard into one combined file, in `channels` order.
+
+    A page can appear twice in a shard if a run was interrupted between
+    writing it and recording it in the state store; such duplicates are
+    dropped here. A shard only holds its own channel, so message ids are
+    tracked per shard and memory is bounded by the largest channel, not the
+    whole archive. Returns the number of messages written.
+    """
+    with open_record_writer(output_path) as writer:
+        for channel_id in channels:
+            path = shard_path(shards_dir, channel_id)
+            if not os.path.exists(path):
+                continue
+            seen_ids = set()
+            for record in iter_records(path):
+                if record['id'] in seen_ids:
+                    continue
+                seen_ids.add(record['id'])
+                writer.write(record)
+    return writer.count
+
+
+async def connect_and_scrape(concurrency=DEFAULT_CONCURRENCY, full_refresh=False, client=None,
+                             output_path=COMBINED_RAW_JSON_PATH, channels=None,
+                             state_db_path=SCRAPE_STATE_DB_PATH, shards_dir=RAW_SHARDS_DIR):
+    """Incrementally scrapes `channels` (default CHANNELS) and rebuilds the combined raw file.
+
+    The combined file is written to `output_path` as a JSON array, JSONL or a
+    Parquet dataset, chosen by extension. Each run fetches only messages newer than the per-channel high-water mark
+    saved in `state_db_path`, appending every page to the channel's JSONL shard
+    in `shards_dir` as it arrives; an interrupted run resumes from the last
+    finished page. `full_refresh` discards the saved state and shards first.
+    """
+    channels = channels or CHANNELS
+    # flood_sleep_threshold=0: Telethon raises every FloodWaitError instead of sleeping
+    # through short ones itself, so AdaptiveRateLimiter sees them and backs off
+    client = client or TelegramClient(os.path.join(RAW_DATA_SESSION_DIR, SESSION_NAME), API_ID, API_HASH,
+                                      flood_sleep_threshold=0)
+
+    # Every request, including login, is paced by the limiter so flood waits are retried
+    limiter = AdaptiveRateLimiter()
     print("Connecting to Telegram...")
     try:
         await client.connect()
         if not await client.is_user_authorized():
-            await client.send_code_request(PHONE_NUMBER)
+            await limiter.call(lambda: client.send_code_request(PHONE_NUMBER))
+            code = input('Enter the code from Telegram: ')
             # Handle 2FA password if enabled
-            from telethon import errors
             try:
-                await client.sign_in(PHONE_NUMBER, input('Enter the code from Telegram: '))
+                await limiter.call(lambda: client.sign_in(PHONE_NUMBER, code))
             except errors.SessionPasswordNeededError:
-                await client.sign_in(password=input('Two-step verification enabled. Enter your password: '))
+                password = input('Two-step verification enabled. Enter your password: ')
+                await limiter.call(lambda: client.sign_in(password=password))
         print("Connected to Telegram!")
     except Exception as e:
         print(f"Error connecting to Telegram: {e}")
         return
 
-    # Initialize a single list to hold all messages from all channels
-    all_combined_messages = []
-    
-    for channel_id in CHANNELS:
-        print(f"\nScraping channel: {channel_id}")
-        try:
-            entity = await client.get_entity(channel_id)
-            offset_id = 0
-            limit = 100 # Max limit per API call, pagination handles fetching all
-            channel_messages_count = 0 # To track messages fetched for current channel
-
-            while True:
-                history = await client(GetHistoryRequest(
-                    peer=entity,
-                    offset_id=offset_id,
-                    offset_date=None,
-                    add_offset=0,
-                    limit=limit,
-                    max_id=0,
-                    min_id=0,
-                    hash=0
-                ))
-                messages = history.messages
-                if not messages:
-                    break
+    os.makedirs(shards_dir, exist_ok=True)
+    state = ScrapeStateStore(state_db_path)
+    for channel_id in channels:
+        path = shard_path(shards_dir, channel_id)
+        if full_refresh:
+            state.reset(channel_id)
+            if os.path.exists(path):
+                os.remove(path)
+        else:
+            repair_shard(path)
+
+    new_messages = 0
 
-                for message in messages:
-                    message_data = {
-                        'id': message.id,
-                        'channel_id': entity.id, # Include channel ID for traceability
-                        'channel_name': entity.title, # Include channel name for traceability
-                        'date': message.date.isoformat(),
-                        'sender_id': message.sender_id,
-                        'message': message.message,
-                        'views': message.views,
-                        'forwards': message.forwards,
-                        'replies_count': message.replies.replies if message.replies else 0,
-                        'media_type': None,
-                        'file_name': None,
-                        'file_path': None # This will remain None as files are not downloaded
-                    }
-
-                    # Handle media (images, documents) - ONLY RECORD METADATA, DO NOT DOWNLOAD
-                    if message.media:
-                        message_data['media_type'] = type(message.media).__name__
-
-                        if isinstance(message.media, MessageMediaDocument) and message.media.document:
-                            found_filename = False
-                            for attr in message.media.document.attributes:
-                                if isinstance(attr, DocumentAttributeFilename):
-                                    message_data['file_name'] = attr.file_name
-                                    found_filename = True
-                                    break
-                                elif isinstance(attr, DocumentAttributeVideo):
-                                    message_data['media_type'] = 'VideoDocument' # More specific type
-                                    # You could add message_data['video_duration'] = attr.duration, etc. if needed
-                            if not found_filename:
-                                # If no specific filename attribute, assign a generic name
-                                message_data['file_name'] = 'unknown_document_file'
-
-                            message_data['file_path'] = "Not Downloaded (document/video)"
-
-                        elif isinstance(message.media, MessageMediaPhoto):
-                            message_data['media_type'] = 'Photo'
-                            message_data['file_name'] = f"photo_{message.id}.jpg" # Assign a generic name for photos
-                            message_data['file_path'] = "Not Downloaded (photo)"
-                        else:
-                            # Catch any other unhandled media types (e.g., sticker, gif)
-                            pass 
-
-                    all_combined_messages.append(message_data)
-                
-                offset_id = messages[-1].id
-                channel_messages_count += len(messages)
-                print(f"  Fetched {len(messages)} messages. Total for {entity.title}: {channel_messages_count}")
-                await asyncio.sleep(1) # Simple delay to avoid hitting rate limits
-
-            print(f"Finished scraping {channel_messages_count} messages from {entity.title}")
-
-        except Exception as e:
-            print(f"Error scraping channel {channel_id}: {e}")
-
-    await client.disconnect()
+    def persist_page(channel_id, entity, records):
+        nonlocal new_messages
+        append_to_shard(shard_path(shards_dir, channel_id), records)
+        new_messages += len(records)
+        instrumentation.count(items=len(records))
+
+    shard_paths = [shard_path(shards_dir, channel_id) for channel_id in channels]
+    shard_bytes = sum(instrumentation.path_size(path) for path in shard_paths)
+    with instrumentation.stage('scrape') as scrape_stage:
+        try:
+            await scrape_channels(client, channels, persist_page, concurrency=concurrency, limiter=limiter, state=state)
+        finally:
+            state.close()
+            await client.disconnect()
+        scrape_stage.add(bytes_written=sum(instrumentation.path_size(path) for path in shard_paths) - shard_bytes)
     print("\nDisconnected from Telegram.")
-    print(f"Total messages scraped from all channels: {len(all_combined_messages)}")
+    print(f"New messages scraped from all channels: {new_messages} "
+          f"({limiter.requests} requests, {limiter.flood_waits} flood waits)")
 
-    # Save all collected messages to a single JSON file
+    # Rebuild the single combined JSON file from the shards
     try:
-        with open(COMBINED_RAW_JSON_PATH, 'w', encoding='utf-8') as f:
-            json.dump(all_combined_messages, f, ensure_ascii=False, indent=4)
-        print(f"All messages saved to {COMBINED_RAW_JSON_PATH}")
+        with instrumentation.stage('combine_shards') as combine_stage:
+            total = combine_shards(channels, shards_dir, output_path)
+            combine_stage.add(items=total, bytes_read=sum(instrumentation.path_size(path) for path in shard_paths),
+                              bytes_written=instrumentation.path_size(output_path))
+        print(f"All {total} messages saved to {output_path}")
     except Exception as e:
         print(f"Error saving combined JSON file: {e}")
 
 if __name__ == '__main__':
-    asyncio.run(connect_and_scrape())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Scrape Ethiopian e-commerce Telegram channels.")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help="Channels scraped at the same time.")
+    parser.add_argument('--full-refresh', action='store_true', help="Ignore saved high-water marks and re-fetch all history.")
+    parser.add_argument('--output', default=COMBINED_RAW_JSON_PATH,
+                        help="Combined output; a .jsonl extension writes JSONL, .parquet a partitioned Parquet dataset.")
+    instrumentation.add_report_args(parser)
+    args = parser.parse_args()
+    with instrumentation.run_from_args('scrape', args):
+        asyncio.run(connect_and_scrape(concurrency=args.concurrency, full_refresh=args.full_refresh, output_path=args.output))
@@ -0,0 +1,42 @@
+# EthioMart_NER_Project/tests/conftest.py
+
+import os
+import sys
+
+import pytest
+
+# Add the project root to the Python path to import project modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import config # Import configuration from config.py
+from scripts.benchmarks.synthetic_corpus import generate_labeled_sentences
+
+
+@pytest.fixture(scope='session')
+def labeled_sentences():
+    return generate_labeled_sentences(60, seed=3)
+
+
+@pytest.fixture(scope='session')
+def tiny_tokenizer(labeled_sentences, tmp_path_factory):
+    """Word-level tokenizer over the labeled vocabulary, as compare_models --tiny builds it."""
+    from scripts.model_training.compare_models import build_offline_tokenizer
+    return build_offline_tokenizer(labeled_sentences, str(tmp_path_factory.mktemp('tiny_tokenizer')))
+
+
+@pytest.fixture(scope='session')
+def tiny_engine(tiny_tokenizer):
+    """NerInferenceEngine on a randomly initialized two-layer BERT (no download, no training)."""
+    import torch
+    from transformers import AutoConfig, AutoModelForTokenClassification
+    from scripts.inference.ner_inference import NerInferenceEngine
+    from scripts.model_training.compare_models import TINY_MAX_LENGTH, TINY_MODEL_CONFIG
+
+    torch.manual_seed(0)
+    model_config = AutoConfig.for_model(
+        'bert', vocab_size=len(tiny_tokenizer), pad_token_id=tiny_tokenizer.pad_token_id,
+        max_position_embeddings=TINY_MAX_LENGTH, num_labels=len(config.LABEL_NAMES),
+        id2label=dict(enumerate(config.LABEL_NAMES)), label2id={label: i for i, label in enumerate(config.LABEL_NAMES)},
+        **TINY_MODEL_CONFIG
+    )
+    model = AutoModelForTokenClassification.from_config(model_config).eval()
+    return NerInferenceEngine(model, tiny_tokenizer, batch_size=8)
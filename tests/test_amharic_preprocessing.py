@@ -0,0 +1,32 @@
+# EthioMart_NER_Project/tests/test_amharic_preprocessing.py
+
+import filecmp
+
+import pytest
+
+from scripts.benchmarks.bench_normalizer import generate_fuzz_texts
+from scripts.benchmarks.synthetic_corpus import generate_messages, generate_texts
+from scripts.data_io.message_stream import open_record_writer
+from scripts.preprocessing.amharic_preprocessing import AmharicNormalizer, clean_amharic_text, stream_preprocess_telegram_data
+
+
+def test_normalizer_matches_clean_amharic_text():
+    normalizer = AmharicNormalizer()
+    for text in generate_texts(300, seed=5) + generate_fuzz_texts(2000, seed=5):
+        expected = clean_amharic_text(text)
+        assert normalizer.clean(text).encode('utf-8', 'surrogatepass') == expected.encode('utf-8', 'surrogatepass'), repr(text)
+
+
+@pytest.mark.parametrize('extension', ['.jsonl', '.json'])
+def test_parallel_preprocessing_matches_serial(tmp_path, extension):
+    input_path = str(tmp_path / f'raw{extension}')
+    with open_record_writer(input_path) as writer:
+        for record in generate_messages(500, seed=9):
+            writer.write(record)
+
+    outputs = []
+    for workers in (1, 2):
+        output_path = str(tmp_path / f'out_{workers}{extension}')
+        stream_preprocess_telegram_data(input_path, output_path, workers=workers, chunk_size=64)
+        outputs.append(output_path)
+    assert filecmp.cmp(*outputs, shallow=False)
@@ -0,0 +1,30 @@
+# EthioMart_NER_Project/tests/test_message_stream.py
+
+import io
+import json
+import random
+
+import pytest
+
+from scripts.data_io.message_stream import iter_json_array
+
+# Numbers cut at a chunk edge ('1.', '1.5e', '-') must not decode as a shorter prefix
+DOCUMENTS = [
+    '[1.5, -2.25e-3, 10, 1e5, -0.0, 3.14159, 12345678901234567890, 1E+2]',
+    '[ ]',
+    '["\\u12a0\\u12f5", "ዋጋ 2,500 ብር", true, false, null, -7]',
+    json.dumps([{'id': i, 'views': random.Random(i).uniform(-1e6, 1e6), 'tags': [1.5e10, -3, 'x'], 'media': None}
+                for i in range(20)], ensure_ascii=False),
+]
+
+
+@pytest.mark.parametrize('chunk_size', range(1, 9))
+@pytest.mark.parametrize('document', DOCUMENTS)
+def test_iter_json_array_matches_json_load(document, chunk_size):
+    assert list(iter_json_array(io.StringIO(document), chunk_size)) == json.loads(document)
+
+
+@pytest.mark.parametrize('document', ['[1.x]', '[1 2]', '[1,]', '[1', '{"a": 1}'])
+def test_iter_json_array_rejects_malformed_input(document):
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_array(io.StringIO(document), 2))
@@ -0,0 +1,45 @@
+# EthioMart_NER_Project/tests/test_rule_based_extractor.py
+
+import pytest
+
+from scripts.benchmarks.bench_rule_extractor import ROUTE_CASES
+from scripts.benchmarks.synthetic_corpus import generate_texts
+from scripts.preprocessing.amharic_preprocessing import AmharicNormalizer
+from scripts.preprocessing.rule_based_extractor import (ROUTE_FULL, ROUTE_SKIP, RuleRoutedExtractor, RuleRouter,
+                                                         extract_rule_entities)
+
+ENTITY_CASES = [
+    ("ዋጋ 2,500 ብር 0911 234 567", [('PRICE', '2,500 ብር', 2500), ('CONTACT', '0911 234 567', None)]),
+    ("፭ ሺህ ብር @shop_addis", [('PRICE', '፭ ሺህ ብር', 5000), ('CONTACT', '@shop_addis', None)]),
+    ("የሴቶች ቦርሳ ዋጋው 1200 ብር ቦሌ", [('PRICE', '1200 ብር', 1200)]),
+    ("Price: 1.5k", [('PRICE', '1.5k', 1500)]),
+    ("3 ቀሚስ", []), # A bare number is not a price
+    ("የልጆች ቀሚስ ቦሌ", []),
+]
+
+
+@pytest.mark.parametrize('text, expected', ENTITY_CASES)
+def test_extract_rule_entities(text, expected):
+    entities = extract_rule_entities(text)
+    assert [(e['entity_group'], e['word'], e.get('value')) for e in entities] == expected
+    assert all(text[e['start']:e['end']] == e['word'] for e in entities)
+
+
+@pytest.mark.parametrize('text, action', ROUTE_CASES)
+def test_route_cases(text, action):
+    assert RuleRouter().route(text).action == action
+
+
+def test_routed_extractor_agrees_with_model(tiny_engine):
+    texts = AmharicNormalizer().clean_many(generate_texts(200, seed=15))
+    texts += [text for text, _ in ROUTE_CASES + ENTITY_CASES] # The synthetic messages all carry a price
+    router = RuleRouter()
+    routed = RuleRoutedExtractor(tiny_engine, router).extract(texts)
+    assert len(routed) == len(texts)
+
+    full = [i for i, text in enumerate(texts) if router.route(text).action == ROUTE_FULL]
+    assert full and [routed[i] for i in full] == tiny_engine.extract([texts[i] for i in full])
+    for text, entities in zip(texts, routed):
+        assert all(text[e['start']:e['end']] == e['word'] for e in entities)
+        if router.route(text).action == ROUTE_SKIP:
+            assert all(e['entity_group'] == 'PRICE' and e['score'] == 1.0 for e in entities)
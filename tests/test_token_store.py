@@ -0,0 +1,59 @@
+# EthioMart_NER_Project/tests/test_token_store.py
+
+import os
+
+import numpy as np
+import pytest
+
+import config # Import configuration from config.py
+from scripts.benchmarks.synthetic_corpus import generate_texts
+from scripts.data_io.token_store import TokenStore, build_token_store, open_or_build_token_store
+from scripts.model_training.conll_data import tokenize_and_align_labels
+from scripts.preprocessing.amharic_preprocessing import AmharicNormalizer
+
+LABEL2ID = {label: i for i, label in enumerate(config.LABEL_NAMES)}
+
+
+@pytest.fixture(scope='module')
+def texts():
+    return AmharicNormalizer().clean_many(generate_texts(80, seed=21)) + ["", "ቦርሳ"]
+
+
+def test_labeled_store_round_trip(tmp_path, tiny_tokenizer, labeled_sentences):
+    store = build_token_store(str(tmp_path / 'labeled'), [sentence['tokens'] for sentence in labeled_sentences],
+                              tiny_tokenizer, max_length=16, is_split_into_words=True, chunk_size=7)
+    expected = tokenize_and_align_labels(tiny_tokenizer, labeled_sentences, LABEL2ID, max_length=16)
+    # A shuffled subset, like one side of a train/eval split
+    subset = labeled_sentences[::-3]
+    actual = tokenize_and_align_labels(tiny_tokenizer, subset, LABEL2ID, max_length=16, token_store=TokenStore(store.path))
+    indices = range(len(labeled_sentences))[::-3]
+    assert [ids.tolist() for ids in actual['input_ids']] == [expected['input_ids'][i] for i in indices]
+    assert [mask.tolist() for mask in actual['attention_mask']] == [expected['attention_mask'][i] for i in indices]
+    assert actual['labels'] == [expected['labels'][i] for i in indices]
+
+
+def test_extract_pretokenized_matches_extract(tmp_path, tiny_engine, texts):
+    store = build_token_store(str(tmp_path / 'messages'), texts, tiny_engine.tokenizer, tiny_engine.max_length, chunk_size=16)
+    expected = tiny_engine.extract(texts)
+    assert any(expected)
+    assert tiny_engine.extract_pretokenized(texts, store) == expected
+
+
+def test_store_rejects_other_rows_and_settings(tmp_path, tiny_tokenizer, texts):
+    store = build_token_store(str(tmp_path / 'messages'), texts[:10], tiny_tokenizer, max_length=32)
+    with pytest.raises(ValueError):
+        store.rows_for(texts[:11])
+    with pytest.raises(ValueError):
+        store.check(tiny_tokenizer, max_length=64)
+    assert np.array_equal(store.rows_for(texts[:10][::-1]), np.arange(10)[::-1])
+
+
+def test_open_or_build_reuses_an_up_to_date_store(tmp_path, tiny_tokenizer, texts):
+    path = str(tmp_path / 'messages')
+    open_or_build_token_store(path, texts[:40], tiny_tokenizer, max_length=32)
+    meta_mtime = os.stat(os.path.join(path, 'meta.json')).st_mtime_ns
+    open_or_build_token_store(path, texts[:20], tiny_tokenizer, max_length=32) # A subset: reused
+    assert os.stat(os.path.join(path, 'meta.json')).st_mtime_ns == meta_mtime
+
+    store = open_or_build_token_store(path, texts, tiny_tokenizer, max_length=32) # New rows: rebuilt
+    assert len(store.rows_for(texts)) == len(texts)